@@ -0,0 +1 @@
+"""Micro-benchmarks for ContentOS hot paths (run from Backend/: python -m benchmarks.<name>)."""
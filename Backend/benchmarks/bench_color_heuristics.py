@@ -0,0 +1,91 @@
+"""
+Benchmark: fused color heuristics in VisionService.analyze_opencv.
+
+Compares per-image time of:
+- legacy : full-resolution decode + one cv2.inRange mask and sum per class
+- fused  : same full-resolution image, single LUT + histogram pass
+- fused+normalized : reduced-resolution decode + single pass (production path)
+
+Also checks that the fused pass returns the same ratios as the legacy masks.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_color_heuristics
+    python -m benchmarks.bench_color_heuristics --megapixels 1 12 --repeat 20
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from config import settings
+from services.image_normalizer import decode_for_analysis
+from services.vision_service import compute_color_ratios
+from benchmarks.bench_image_normalization import make_fixture
+
+
+def legacy_color_ratios(img: np.ndarray) -> dict:
+    """Original multi-mask implementation, kept here as the baseline."""
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    total = img.shape[0] * img.shape[1]
+
+    skin = cv2.inRange(hsv, np.array([0, 20, 70], np.uint8), np.array([20, 255, 255], np.uint8))
+    red1 = cv2.inRange(hsv, np.array([0, 100, 100], np.uint8), np.array([10, 255, 255], np.uint8))
+    red2 = cv2.inRange(hsv, np.array([160, 100, 100], np.uint8), np.array([180, 255, 255], np.uint8))
+    green = cv2.inRange(hsv, np.array([35, 30, 30], np.uint8), np.array([85, 255, 255], np.uint8))
+    pink = cv2.inRange(hsv, np.array([140, 20, 100], np.uint8), np.array([170, 255, 255], np.uint8))
+
+    return {
+        "skin_ratio": np.sum(skin > 0) / total,
+        "red_ratio": (np.sum(red1 > 0) + np.sum(red2 > 0)) / total,
+        "green_ratio": np.sum(green > 0) / total,
+        "pink_ratio": np.sum(pink > 0) / total,
+        "dark_ratio": np.sum(gray < 40) / total,
+        "bright_ratio": np.sum(gray > 150) / total,
+    }
+
+
+def per_image_ms(fn, repeat: int) -> float:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(megapixels: float, repeat: int) -> None:
+    data = make_fixture(megapixels)
+    full = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+    # Same pixels in, same ratios out
+    legacy = legacy_color_ratios(full)
+    fused = compute_color_ratios(full)
+    mismatch = max(abs(legacy[k] - fused[k]) for k in legacy)
+
+    decode = lambda: cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    legacy_ms = per_image_ms(lambda: legacy_color_ratios(decode()), repeat)
+    fused_ms = per_image_ms(lambda: compute_color_ratios(decode()), repeat)
+    normalized_ms = per_image_ms(
+        lambda: compute_color_ratios(decode_for_analysis(data, settings.image_max_side_opencv)),
+        repeat,
+    )
+
+    print(f"\n=== {megapixels:g} MP ({full.shape[1]}x{full.shape[0]}) ===")
+    print(f"legacy (full res, 5 masks) : {legacy_ms:8.2f} ms/image")
+    print(f"fused  (full res, 1 pass)  : {fused_ms:8.2f} ms/image")
+    print(f"fused + normalized decode  : {normalized_ms:8.2f} ms/image")
+    print(f"max ratio mismatch (same pixels): {mismatch:.2e}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[1, 12])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    for mp in args.megapixels:
+        run(mp, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: downscale-before-analyze image normalization.
+
+Compares the legacy full-resolution decode against the normalization stage
+on synthetic phone-camera JPEGs (with EXIF), reporting:
+- decode latency and peak traced memory
+- bytes that would be uploaded to cloud providers
+- color-ratio drift between full-resolution and normalized analysis
+
+Usage (from Backend/):
+    python -m benchmarks.bench_image_normalization
+    python -m benchmarks.bench_image_normalization --megapixels 12 48
+"""
+import argparse
+import io
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from config import settings
+from services.image_normalizer import decode_for_analysis, encode_for_cloud
+
+
+def make_fixture(megapixels: float, seed: int = 0) -> bytes:
+    """Synthesize a photo-like JPEG (gradients + skin/green/red patches + noise)."""
+    rng = np.random.default_rng(seed)
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    img[..., 0] = (x / width * 200).astype(np.uint8)
+    img[..., 1] = (y / height * 180).astype(np.uint8)
+    img[..., 2] = ((x + y) / (width + height) * 255).astype(np.uint8)
+
+    # Color patches exercised by the heuristics (BGR)
+    img[: height // 3, : width // 3] = (120, 160, 220)            # skin-ish
+    img[height // 3: 2 * height // 3, width // 3: 2 * width // 3] = (40, 160, 40)  # green
+    img[2 * height // 3:, 2 * width // 3:] = (30, 30, 200)        # red
+    noise = rng.integers(-12, 12, size=img.shape, dtype=np.int16)
+    img = np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+    exif = Image.Exif()
+    exif[0x010F] = "BenchCam"   # Make
+    exif[0x0110] = "Model 48"   # Model
+    exif[0x0112] = 1            # Orientation
+
+    out = io.BytesIO()
+    Image.fromarray(img[..., ::-1]).save(out, format="JPEG", quality=92, exif=exif.tobytes())
+    return out.getvalue()
+
+
+def color_ratios(img: np.ndarray) -> dict:
+    """Reference skin/green/red ratios used to measure accuracy drift."""
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    total = img.shape[0] * img.shape[1]
+    skin = cv2.inRange(hsv, (0, 20, 70), (20, 255, 255))
+    green = cv2.inRange(hsv, (35, 30, 30), (85, 255, 255))
+    red = cv2.inRange(hsv, (0, 100, 100), (10, 255, 255)) | cv2.inRange(hsv, (160, 100, 100), (180, 255, 255))
+    return {
+        "skin": np.count_nonzero(skin) / total,
+        "green": np.count_nonzero(green) / total,
+        "red": np.count_nonzero(red) / total,
+    }
+
+
+def measure(fn, *args):
+    """Run fn once, returning (result, seconds, peak traced bytes)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run(megapixels: float) -> None:
+    data = make_fixture(megapixels)
+
+    full, full_s, full_peak = measure(
+        lambda b: cv2.imdecode(np.frombuffer(b, np.uint8), cv2.IMREAD_COLOR), data
+    )
+    small, small_s, small_peak = measure(decode_for_analysis, data, settings.image_max_side_opencv)
+    cloud, cloud_s, _ = measure(encode_for_cloud, data)
+
+    ref = color_ratios(full)
+    got = color_ratios(small)
+    drift = max(abs(ref[k] - got[k]) for k in ref)
+
+    print(f"\n=== {megapixels:g} MP fixture ({len(data) / 1e6:.1f} MB JPEG) ===")
+    print(f"full decode      : {full_s * 1000:8.1f} ms  peak {full_peak / 1e6:7.1f} MB  {full.shape[1]}x{full.shape[0]}")
+    print(f"normalized decode: {small_s * 1000:8.1f} ms  peak {small_peak / 1e6:7.1f} MB  {small.shape[1]}x{small.shape[0]}")
+    print(f"cloud payload    : {len(data) / 1e3:8.0f} KB -> {len(cloud) / 1e3:.0f} KB ({cloud_s * 1000:.1f} ms, EXIF stripped)")
+    print(f"max ratio drift  : {drift:.4f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[1, 12])
+    args = parser.parse_args()
+    for mp in args.megapixels:
+        run(mp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: precompiled language/transliteration detector.
+
+Compares the legacy TranslationService path (detect_language +
+detect_transliteration: two hint-list scans plus langdetect on every
+miss) against LanguageDetector.detect on a mixed corpus of native-script,
+transliterated and English captions. Reports per-call latency, how often
+each detection method decides, and agreement with the legacy result.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_language_detection
+    python -m benchmarks.bench_language_detection --repeat 2000
+"""
+import argparse
+import time
+from collections import Counter
+
+from langdetect import detect, LangDetectException
+
+from services.language_detection import LanguageDetector
+from services.translation_service import TranslationService, SupportedLanguage
+
+CORPUS = [
+    "నమస్కారం, మీరు ఎలా ఉన్నారు?",
+    "आज का मौसम बहुत अच्छा है और हम बाहर जा रहे हैं",
+    "இன்று ஒரு நல்ல நாள், நாம் கடற்கரைக்கு செல்வோம்",
+    "আমি আজ বাজারে যাব এবং কিছু ফল কিনব",
+    "ನಾನು ನಾಳೆ ಬೆಂಗಳೂರಿಗೆ ಹೋಗುತ್ತೇನೆ",
+    "ഞാൻ ഇന്ന് വീട്ടിൽ ഉണ്ട്",
+    "હું આજે ઘરે છું અને આરામ કરું છું",
+    "ମୁଁ ଆଜି ଘରେ ଅଛି",
+    "nenu chala bagundi, meeru ela unnaru?",
+    "mujhe bahut acha laga, aap kaise hain",
+    "naan romba nalla irukku, neenga epdi",
+    "ami bhalo achi, tumi kemon acho",
+    "Check out our new product launch this Friday! #launch #startup",
+    "Five tips to grow your audience on Instagram in 2024",
+    "Thanks everyone for the amazing support on our last post",
+    "New blog post: how we scaled our content pipeline 🚀 #devlife",
+    "Bonjour à tous, merci pour votre soutien incroyable",
+]
+
+
+def legacy_detect(text: str, hints: dict, supported: set) -> tuple:
+    """Original detect_language + detect_transliteration, kept as the baseline."""
+    words = text.lower().split()
+    language = None
+    for lang_code, lang_hints in hints.items():
+        if sum(1 for w in words if w in lang_hints) >= 2:
+            language = lang_code
+            break
+    if language is None:
+        try:
+            detected = detect(text)
+            language = detected if detected in supported else "en"
+        except LangDetectException:
+            language = "en"
+
+    words = text.lower().split()
+    transliterated = None
+    for lang_code, lang_hints in hints.items():
+        if sum(1 for w in words if w in lang_hints) >= 2:
+            transliterated = lang_code
+            break
+    return language, transliterated is not None
+
+
+def per_call_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in CORPUS:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(CORPUS)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    hints = TranslationService.TRANSLITERATION_HINTS
+    supported = {lang.value for lang in SupportedLanguage}
+    detector = LanguageDetector(hints, supported)
+
+    legacy_us = per_call_us(lambda t: legacy_detect(t, hints, supported), args.repeat)
+    fast_us = per_call_us(detector.detect, args.repeat)
+
+    methods = Counter()
+    agree = 0
+    print(f"{'text':<48} {'legacy':<10} {'fast':<10} method")
+    for text in CORPUS:
+        legacy = legacy_detect(text, hints, supported)
+        result = detector.detect(text)
+        methods[result.method] += 1
+        agree += legacy == (result.language, result.is_transliterated)
+        print(f"{text[:46]:<48} {legacy[0]:<10} {result.language:<10} {result.method}")
+
+    print(f"\nlegacy (hint scans x2 + langdetect): {legacy_us:9.1f} us/call")
+    print(f"LanguageDetector.detect           : {fast_us:9.1f} us/call ({legacy_us / fast_us:.0f}x)")
+    print(f"agreement with legacy             : {agree}/{len(CORPUS)}")
+    print(f"decided by                        : {dict(methods)}")
+    print(f"langdetect cache                  : {detector.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
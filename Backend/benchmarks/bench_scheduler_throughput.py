@@ -0,0 +1,138 @@
+"""
+Benchmark: scheduler publish throughput with per-post vs batched status writes.
+
+Queues N posts that are all due, dispatches them through
+TaskSchedulerService (load -> claim -> publish -> status write) against a
+throwaway SQLite database, and reports posts/s plus the number of
+statements and commits issued. Publishing uses an instant fake platform,
+so the numbers are the scheduler's own database overhead. Compares:
+- per-post: every batch limited to one post, i.e. one SELECT, one claim
+  UPDATE and one status UPDATE + commit per post (the old behaviour)
+- batched:  default coalescing (loads/claims per event-loop tick, status
+  writes every SCHEDULER_STATUS_FLUSH_MS / SCHEDULER_STATUS_BATCH_SIZE)
+
+DATABASE_URL is pointed at a temporary file; your database is not touched.
+
+Usage (from Backend/):
+    python -m benchmarks.bench_scheduler_throughput
+    python -m benchmarks.bench_scheduler_throughput --posts 10000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmp.name}/bench.db"
+os.environ["DEBUG"] = "false"
+
+from sqlalchemy import event, insert, select, func
+
+from config import settings
+from database import Base, engine, init_db, async_session_maker
+from models.schedule import ScheduledPost, ScheduleStatus
+from models.user import User
+from services.social.base import SocialPublishResult
+from services.task_scheduler import TaskSchedulerService
+
+PLATFORM = "bench"
+
+
+class InstantPlatform:
+    """Fake platform service that publishes immediately."""
+
+    async def publish(self, user_id: int, content: str, **kwargs) -> SocialPublishResult:
+        return SocialPublishResult(success=True, platform=PLATFORM, post_id=f"bench-{content}")
+
+
+async def reset_posts(posts: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await init_db()
+
+    now = datetime.now(timezone.utc)
+    async with async_session_maker() as db:
+        db.add(User(id=1, email="bench@example.com", name="bench", hashed_password="x"))
+        await db.flush()
+        await db.execute(insert(ScheduledPost), [
+            {
+                "user_id": 1,
+                "title": f"post {i}",
+                "description": str(i),
+                "scheduled_at": now,
+                "platform": PLATFORM,
+                "status": ScheduleStatus.QUEUED.value,
+            }
+            for i in range(posts)
+        ])
+        await db.commit()
+
+
+async def run(name: str, posts: int, batched: bool) -> None:
+    await reset_posts(posts)
+
+    statements: Counter = Counter()
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.split(None, 1)[0].upper()
+        statements[f"{verb}{' (executemany)' if executemany else ''}"] += 1
+
+    def count_commit(conn):
+        statements["COMMIT"] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    event.listen(engine.sync_engine, "commit", count_commit)
+
+    service = TaskSchedulerService()
+    service.register_social_service(PLATFORM, InstantPlatform())
+    service.is_running = True  # timer bookkeeping without APScheduler
+    if not batched:
+        for coalescer in (service._loads, service._claims, service.status_writes):
+            coalescer.max_size = 1
+
+    start = time.perf_counter()
+    await service._load_window()
+    service._fire_due(time.time())
+    while service._in_flight:
+        await asyncio.gather(*list(service._in_flight.values()))
+    await service.status_writes.drain()
+    elapsed = time.perf_counter() - start
+
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+    event.remove(engine.sync_engine, "commit", count_commit)
+
+    async with async_session_maker() as db:
+        published = await db.scalar(
+            select(func.count()).where(ScheduledPost.status == ScheduleStatus.PUBLISHED.value)
+        )
+
+    updates = statements["UPDATE"] + statements["UPDATE (executemany)"]
+    print(
+        f"{name:<9} {posts / elapsed:8.0f} posts/s  ({elapsed:6.2f} s, {published}/{posts} published) | "
+        f"UPDATE stmts {updates:6d}  commits {statements['COMMIT']:6d}  "
+        f"claim batches {service._claims.batches}  status batches {service.status_writes.batches}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    settings.scheduler_max_concurrency = args.concurrency
+    settings.scheduler_platform_default_concurrency = args.concurrency
+    print(f"{args.posts} due posts, concurrency {args.concurrency}\n")
+
+    await run("per-post", args.posts, batched=False)
+    await run("batched", args.posts, batched=True)
+
+    await engine.dispose()
+    _tmp.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+Benchmark: event-loop latency while large files upload to local storage.
+
+Runs concurrent uploads of large files and, alongside them, a probe
+coroutine standing in for every other request: it sleeps for 2 ms in a
+loop and records how late it wakes up. Compares:
+- legacy: mkdir + Path.write_bytes inside the coroutine (the old
+  LocalStorageProvider.upload)
+- executor: LocalStorageProvider.upload (chunked writes on the storage
+  I/O executor)
+
+Usage (from Backend/):
+    python -m benchmarks.bench_storage_io
+    python -m benchmarks.bench_storage_io --size-mb 256 --uploads 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import List
+
+from services.storage_service import LocalStorageProvider, shutdown_storage_io
+
+PROBE_INTERVAL = 0.002
+
+
+async def probe(lags: List[float], stop: asyncio.Event) -> None:
+    """Record how late a 2 ms sleep wakes up (ms) until stopped."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append((time.perf_counter() - start - PROBE_INTERVAL) * 1000)
+
+
+async def legacy_upload(root: Path, data: bytes) -> None:
+    """The old provider body: blocking mkdir and write_bytes on the loop."""
+    target_dir = root / "legacy"
+    target_dir.mkdir(parents=True, exist_ok=True)
+    (target_dir / f"{uuid.uuid4().hex}.bin").write_bytes(data)
+
+
+async def run(name: str, make_upload, uploads: int) -> None:
+    lags: List[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(0.05)  # probe baseline before the uploads start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(make_upload() for _ in range(uploads)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(
+        f"{name:<10} uploads {elapsed * 1000:8.0f} ms | probe lag "
+        f"p50 {statistics.median(lags):7.2f} ms  p99 {p99:7.2f} ms  "
+        f"max {lags[-1]:7.2f} ms  ({len(lags)} samples)"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--uploads", type=int, default=4)
+    args = parser.parse_args()
+
+    data = os.urandom(args.size_mb * 1024 * 1024)
+    print(f"{args.uploads} concurrent uploads of {args.size_mb} MB\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        provider = LocalStorageProvider()
+        provider.storage_path = root
+
+        await run("legacy", lambda: legacy_upload(root, data), args.uploads)
+        await run("executor", lambda: provider.upload(data, "bench.bin", "application/octet-stream"), args.uploads)
+
+    shutdown_storage_io()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
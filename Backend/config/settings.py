@@ -5,7 +5,7 @@ AWS-first configuration with automatic fallback to free alternatives.
 Follows 12-factor app principles for environment-based configuration.
 """
 from functools import lru_cache
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 import os
 from pydantic_settings import BaseSettings
 from pydantic import Field
@@ -36,6 +36,10 @@ class Settings(BaseSettings):
     use_aws_translate: bool = Field(default=True, alias="USE_AWS_TRANSLATE")
     use_aws_comprehend: bool = Field(default=True, alias="USE_AWS_COMPREHEND")
     
+    # boto3 client pooling (clients are shared across worker threads)
+    aws_max_pool_connections: int = Field(default=20, alias="AWS_MAX_POOL_CONNECTIONS")
+    aws_max_retries: int = Field(default=3, alias="AWS_MAX_RETRIES")
+    
     # LLM Fallback Chain
     # ===========================================
     grok_api_key: Optional[str] = Field(default=None, alias="GROK_API_KEY")
@@ -52,6 +56,21 @@ class Settings(BaseSettings):
     storage_path: str = Field(default="./uploads", alias="STORAGE_PATH")
     storage_base_url: str = Field(default="/uploads", alias="STORAGE_BASE_URL")
     
+    # Uploads are streamed in chunks (never held whole in memory); S3 switches
+    # to multipart uploads once a file exceeds one part (S3 minimum: 5 MiB)
+    upload_max_bytes: int = Field(default=50 * 1024 * 1024, alias="UPLOAD_MAX_BYTES")
+    upload_chunk_size: int = Field(default=1024 * 1024, alias="UPLOAD_CHUNK_SIZE")
+    s3_multipart_part_size: int = Field(default=8 * 1024 * 1024, alias="S3_MULTIPART_PART_SIZE")
+    s3_multipart_concurrency: int = Field(default=4, alias="S3_MULTIPART_CONCURRENCY")
+    
+    # Threads for blocking storage I/O (file writes, boto3, Firebase SDK)
+    storage_io_workers: int = Field(default=8, alias="STORAGE_IO_WORKERS")
+    
+    # Content-addressed mode: files keyed by SHA-256 and reference-counted,
+    # so duplicate uploads share one stored copy (streams are spooled and
+    # hashed first; a duplicate never reaches the provider)
+    storage_dedup_enabled: bool = Field(default=True, alias="STORAGE_DEDUP_ENABLED")
+    
     # ===========================================
     # Social Media APIs
     # ===========================================
@@ -61,6 +80,8 @@ class Settings(BaseSettings):
     twitter_email: Optional[str] = Field(default=None, alias="TWITTER_EMAIL")
     twitter_password: Optional[str] = Field(default=None, alias="TWITTER_PASSWORD")
     twitter_cookies_path: str = Field(default="./twitter_cookies.json", alias="TWITTER_COOKIES_PATH")
+    # Logged-in twikit clients kept in memory (least recently used evicted)
+    twitter_client_pool_size: int = Field(default=64, alias="TWITTER_CLIENT_POOL_SIZE")
     
     # Instagram/Facebook
     facebook_app_id: Optional[str] = Field(default=None, alias="FACEBOOK_APP_ID")
@@ -69,6 +90,10 @@ class Settings(BaseSettings):
         default="http://localhost:8000/api/v1/social/instagram/callback",
         alias="INSTAGRAM_REDIRECT_URI"
     )
+    # Media containers are polled (backoff from the initial interval, max
+    # 10 s apart) until processed, for at most the timeout
+    instagram_container_poll_interval: float = Field(default=1.0, alias="INSTAGRAM_CONTAINER_POLL_INTERVAL")
+    instagram_container_timeout: int = Field(default=300, alias="INSTAGRAM_CONTAINER_TIMEOUT")
     
     # LinkedIn
     linkedin_client_id: Optional[str] = Field(default=None, alias="LINKEDIN_CLIENT_ID")
@@ -78,11 +103,126 @@ class Settings(BaseSettings):
         alias="LINKEDIN_REDIRECT_URI"
     )
     
+    # OAuth tokens live in social_accounts; each worker keeps a read cache
+    # (entries never outlive the token). The daily refresh job renews tokens
+    # expiring within the refresh window.
+    social_token_cache_ttl: int = Field(default=300, alias="SOCIAL_TOKEN_CACHE_TTL")  # seconds
+    social_token_refresh_window_hours: int = Field(default=72, alias="SOCIAL_TOKEN_REFRESH_WINDOW_HOURS")
+    social_token_refresh_concurrency: int = Field(default=5, alias="SOCIAL_TOKEN_REFRESH_CONCURRENCY")
+    
+    # Outbound rate governor: per-account rolling-window quotas as
+    # "platform:kind=limit/window_seconds,..." (kind "post" counts publishes,
+    # "call" counts API requests). Posts over a quota are delayed, not failed.
+    social_rate_limits: str = Field(
+        default=(
+            "instagram:post=25/86400,instagram:call=200/3600,"
+            "linkedin:post=150/86400,"
+            "twitter:post=300/10800,twitter:post=2400/86400"
+        ),
+        alias="SOCIAL_RATE_LIMITS"
+    )
+    # Quota events are written in batches and re-read (for other workers'
+    # events) at most this often per account
+    social_rate_flush_ms: int = Field(default=500, alias="SOCIAL_RATE_FLUSH_MS")
+    social_rate_sync_seconds: int = Field(default=60, alias="SOCIAL_RATE_SYNC_SECONDS")
+    
     # ===========================================
     # Task Scheduler
     # ===========================================
     scheduler_enabled: bool = Field(default=True, alias="SCHEDULER_ENABLED")
-    scheduler_check_interval: int = Field(default=60, alias="SCHEDULER_CHECK_INTERVAL")
+    
+    # Posts fire from an in-memory timer loaded with the next
+    # scheduler_window_seconds of queued posts; the DB is re-read every
+    # scheduler_check_interval seconds as a safety net
+    scheduler_check_interval: int = Field(default=300, alias="SCHEDULER_CHECK_INTERVAL")
+    scheduler_window_seconds: int = Field(default=900, alias="SCHEDULER_WINDOW_SECONDS")
+    
+    # Instances claim a post before publishing it; a claim not released
+    # within the lease (crashed instance) can be taken over by another one.
+    # Leases of posts being published are renewed every third of this
+    scheduler_lease_seconds: int = Field(default=300, alias="SCHEDULER_LEASE_SECONDS")
+    
+    # On shutdown, publishes already in flight get this long to finish
+    # before they are cancelled (their claims then expire and are retried)
+    scheduler_shutdown_timeout: float = Field(default=30.0, alias="SCHEDULER_SHUTDOWN_TIMEOUT")
+    
+    # Failed publishes are retried with jittered exponential backoff
+    # (base * 2^(attempt-1), capped, never sooner than the platform's
+    # Retry-After) and dead-lettered after scheduler_max_attempts
+    scheduler_max_attempts: int = Field(default=5, alias="SCHEDULER_MAX_ATTEMPTS")
+    scheduler_retry_base_seconds: float = Field(default=30.0, alias="SCHEDULER_RETRY_BASE_SECONDS")
+    scheduler_retry_max_seconds: float = Field(default=3600.0, alias="SCHEDULER_RETRY_MAX_SECONDS")
+    
+    # Publish outcomes are buffered and written back in one executemany
+    # UPDATE per batch: flushed at this size or after this many ms
+    scheduler_status_batch_size: int = Field(default=500, alias="SCHEDULER_STATUS_BATCH_SIZE")
+    scheduler_status_flush_ms: int = Field(default=200, alias="SCHEDULER_STATUS_FLUSH_MS")
+    
+    # Concurrent publishing: overall cap and per-platform caps ("platform=N,...");
+    # platforms not listed use scheduler_platform_default_concurrency
+    scheduler_max_concurrency: int = Field(default=50, alias="SCHEDULER_MAX_CONCURRENCY")
+    scheduler_platform_concurrency: str = Field(
+        default="twitter=2,instagram=4,linkedin=4",
+        alias="SCHEDULER_PLATFORM_CONCURRENCY"
+    )
+    scheduler_platform_default_concurrency: int = Field(default=8, alias="SCHEDULER_PLATFORM_DEFAULT_CONCURRENCY")
+    
+    # ===========================================
+    # Speech-to-Text (Whisper worker pool)
+    # ===========================================
+    whisper_backend: str = Field(default="openai", alias="WHISPER_BACKEND")  # openai | faster_whisper
+    whisper_model_size: str = Field(default="base", alias="WHISPER_MODEL_SIZE")  # tiny/base/small/medium
+    whisper_compute_type: str = Field(default="int8", alias="WHISPER_COMPUTE_TYPE")  # faster-whisper only
+    whisper_workers: int = Field(default=2, alias="WHISPER_WORKERS")
+    whisper_cpu_threads: int = Field(default=0, alias="WHISPER_CPU_THREADS")  # 0 = library default
+    whisper_beam_size: int = Field(default=5, alias="WHISPER_BEAM_SIZE")
+    whisper_max_queue: int = Field(default=32, alias="WHISPER_MAX_QUEUE")  # 0 = unbounded
+    whisper_job_history: int = Field(default=200, alias="WHISPER_JOB_HISTORY")
+    
+    # Voice activity detection: long audio is split on silence and the
+    # chunks are transcribed in parallel across the worker pool
+    audio_vad_enabled: bool = Field(default=True, alias="AUDIO_VAD_ENABLED")
+    audio_vad_threshold_db: float = Field(default=-45.0, alias="AUDIO_VAD_THRESHOLD_DB")
+    audio_vad_min_silence_ms: int = Field(default=400, alias="AUDIO_VAD_MIN_SILENCE_MS")
+    audio_vad_max_chunk_seconds: float = Field(default=30.0, alias="AUDIO_VAD_MAX_CHUNK_SECONDS")
+    
+    # ===========================================
+    # Translation (cache: in-process LRU + SQLite table, batching)
+    # ===========================================
+    translation_cache_enabled: bool = Field(default=True, alias="TRANSLATION_CACHE_ENABLED")
+    translation_cache_persistent: bool = Field(default=True, alias="TRANSLATION_CACHE_PERSISTENT")
+    translation_cache_size: int = Field(default=5000, alias="TRANSLATION_CACHE_SIZE")  # LRU entries
+    translation_cache_ttl_hours: float = Field(default=720, alias="TRANSLATION_CACHE_TTL_HOURS")  # 30 days
+    
+    # Batch translation: max provider calls in flight
+    translation_batch_concurrency: int = Field(default=8, alias="TRANSLATION_BATCH_CONCURRENCY")
+    
+    # Long documents are segmented into units of at most this many UTF-8 bytes
+    # (fits Google's 5000-char and AWS Translate's 10 KB request limits)
+    translation_max_chunk_bytes: int = Field(default=4500, alias="TRANSLATION_MAX_CHUNK_BYTES")
+    
+    # Memoized langdetect fallback (distinct texts)
+    language_detect_cache_size: int = Field(default=4096, alias="LANGUAGE_DETECT_CACHE_SIZE")
+    
+    # ===========================================
+    # Image Normalization (downscale before analysis)
+    # ===========================================
+    # Longest-side caps per analyzer (pixels)
+    image_max_side_opencv: int = Field(default=640, alias="IMAGE_MAX_SIDE_OPENCV")
+    image_max_side_prefilter: int = Field(default=320, alias="IMAGE_MAX_SIDE_PREFILTER")
+    image_max_side_nsfw: int = Field(default=448, alias="IMAGE_MAX_SIDE_NSFW")  # Caffe input is 224
+    image_max_side_cloud: int = Field(default=1600, alias="IMAGE_MAX_SIDE_CLOUD")
+    image_cloud_jpeg_quality: int = Field(default=85, alias="IMAGE_CLOUD_JPEG_QUALITY")
+    
+    # Derived assets generated in the background for every uploaded image:
+    # thumbnail JPEG, moderation-size JPEG (IMAGE_MAX_SIDE_CLOUD, read by
+    # moderation and Instagram publishing), WebP display copy
+    derived_assets_enabled: bool = Field(default=True, alias="DERIVED_ASSETS_ENABLED")
+    derived_assets_workers: int = Field(default=2, alias="DERIVED_ASSETS_WORKERS")
+    derived_assets_queue_size: int = Field(default=256, alias="DERIVED_ASSETS_QUEUE_SIZE")
+    image_thumbnail_side: int = Field(default=320, alias="IMAGE_THUMBNAIL_SIDE")
+    image_display_max_side: int = Field(default=2048, alias="IMAGE_DISPLAY_MAX_SIDE")
+    image_display_webp_quality: int = Field(default=80, alias="IMAGE_DISPLAY_WEBP_QUALITY")
     
     # ===========================================
     # External Services
@@ -109,6 +249,8 @@ class Settings(BaseSettings):
     )
     algorithm: str = Field(default="HS256", alias="ALGORITHM")
     access_token_expire_minutes: int = Field(default=1440, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
+    # Comma-separated emails of users allowed to call admin endpoints
+    admin_emails: str = Field(default="", alias="ADMIN_EMAILS")
     
     # Rate Limiting
     rate_limit_per_minute: int = Field(default=60, alias="RATE_LIMIT_PER_MINUTE")
@@ -133,6 +275,35 @@ class Settings(BaseSettings):
         """Parse CORS origins from comma-separated string."""
         return [origin.strip() for origin in self.cors_origins.split(",")]
     
+    @property
+    def admin_email_list(self) -> List[str]:
+        """Parse admin emails from comma-separated string (lowercased)."""
+        return [email.strip().lower() for email in self.admin_emails.split(",") if email.strip()]
+    
+    @property
+    def scheduler_platform_limits(self) -> Dict[str, int]:
+        """Parse per-platform publish concurrency from "platform=N,..."."""
+        limits = {}
+        for item in self.scheduler_platform_concurrency.split(","):
+            name, _, value = item.partition("=")
+            if name.strip() and value.strip().isdigit():
+                limits[name.strip().lower()] = max(1, int(value))
+        return limits
+    
+    @property
+    def social_rate_limit_rules(self) -> Dict[str, Dict[str, List[Tuple[int, int]]]]:
+        """Parse rate quotas: {platform: {kind: [(limit, window_seconds), ...]}}."""
+        rules: Dict[str, Dict[str, List[Tuple[int, int]]]] = {}
+        for item in self.social_rate_limits.split(","):
+            key, _, quota = item.partition("=")
+            platform, _, kind = key.strip().lower().partition(":")
+            limit, _, window = quota.strip().partition("/")
+            if platform and kind and limit.isdigit() and window.isdigit():
+                rules.setdefault(platform, {}).setdefault(kind, []).append(
+                    (max(1, int(limit)), max(1, int(window)))
+                )
+        return rules
+    
     @property
     def aws_configured(self) -> bool:
         """Check if AWS credentials are available."""
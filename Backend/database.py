@@ -7,6 +7,7 @@ Can be swapped to PostgreSQL for production scaling.
 import logging
 from typing import AsyncGenerator
 
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
@@ -44,11 +45,44 @@ async def init_db() -> None:
     """
     async with engine.begin() as conn:
         # Import models to register them
-        from models import user, content, schedule
+        from models import user, content, schedule, translation_cache, stored_object, derived_asset, social_account, quota_event, publish_receipt
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
     logger.info("Database tables created successfully")
 
 
+def _add_missing_columns(connection) -> None:
+    """
+    Add model columns that existing tables don't have yet.
+    
+    create_all() only creates missing tables and there are no migrations,
+    so columns added to a model later are ALTERed in here. New columns must
+    be nullable or carry a server_default.
+    """
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    ddl_compiler = connection.dialect.ddl_compiler(connection.dialect, None)
+    
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = (
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN {preparer.format_column(column)} "
+                f"{column.type.compile(dialect=connection.dialect)}"
+            )
+            default = ddl_compiler.get_column_default_string(column)
+            if default is not None:
+                ddl += f" DEFAULT {default}"
+            connection.execute(text(ddl))
+            logger.info(f"Added column {table.name}.{column.name}")
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency injection for database sessions.
@@ -55,10 +55,19 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     
     # Shutdown
     if settings.scheduler_enabled:
-        from services.task_scheduler import stop_scheduler
-        stop_scheduler()
+        from services.task_scheduler import shutdown_scheduler
+        await shutdown_scheduler()
         logger.info("Background scheduler stopped")
     
+    from services.transcription_pool import shutdown_transcription_pool
+    shutdown_transcription_pool()
+    
+    from services.derived_assets import get_derived_asset_worker
+    await get_derived_asset_worker().stop()
+    
+    from services.storage_service import shutdown_storage_io
+    shutdown_storage_io()
+    
     logger.info("Content Room Backend Shutting Down...")
 
 
@@ -2,6 +2,12 @@
 from models.user import User
 from models.content import Content, ContentType, ModerationStatus
 from models.schedule import ScheduledPost, ScheduleStatus
+from models.translation_cache import TranslationCacheEntry
+from models.stored_object import StoredObject
+from models.derived_asset import DerivedAsset
+from models.social_account import SocialAccount, SocialPlatform
+from models.quota_event import QuotaEvent
+from models.publish_receipt import PublishReceipt
 
 __all__ = [
     "User",
@@ -10,4 +16,11 @@ __all__ = [
     "ModerationStatus",
     "ScheduledPost",
     "ScheduleStatus",
+    "TranslationCacheEntry",
+    "StoredObject",
+    "DerivedAsset",
+    "SocialAccount",
+    "SocialPlatform",
+    "QuotaEvent",
+    "PublishReceipt",
 ]
@@ -0,0 +1,73 @@
+"""
+Derived Asset Model for ContentOS
+
+Renditions generated from an uploaded image (thumbnail JPEG, moderation
+JPEG, WebP display copy), stored next to the original.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, DateTime, Text, Integer, BigInteger, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base
+
+
+class DerivedAsset(Base):
+    """
+    One rendition of an uploaded image.
+    
+    Attributes:
+        id: Primary key
+        
+        provider: Storage provider holding both original and rendition
+        original_key: Key of the uploaded original
+        original_url: URL of the uploaded original (for lookups by URL)
+        rendition: Rendition name ("thumbnail", "moderation", "display")
+        
+        key: Key of the rendition
+        url: URL of the rendition
+        content_type: MIME type of the rendition
+        width: Rendition width in pixels
+        height: Rendition height in pixels
+        size: Rendition size in bytes
+    """
+    __tablename__ = "derived_assets"
+    __table_args__ = (
+        UniqueConstraint("provider", "original_key", "rendition", name="uq_derived_asset"),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    
+    provider: Mapped[str] = mapped_column(String(20), nullable=False)
+    original_key: Mapped[str] = mapped_column(String(500), nullable=False, index=True)
+    original_url: Mapped[Optional[str]] = mapped_column(String(1000), nullable=True, index=True)
+    rendition: Mapped[str] = mapped_column(String(20), nullable=False)
+    
+    key: Mapped[str] = mapped_column(String(500), nullable=False)
+    url: Mapped[str] = mapped_column(Text, nullable=False)
+    content_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    width: Mapped[int] = mapped_column(Integer, nullable=False)
+    height: Mapped[int] = mapped_column(Integer, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+    
+    def to_dict(self) -> dict:
+        return {
+            "rendition": self.rendition,
+            "provider": self.provider,
+            "key": self.key,
+            "url": self.url,
+            "content_type": self.content_type,
+            "width": self.width,
+            "height": self.height,
+            "size": self.size,
+        }
+    
+    def __repr__(self) -> str:
+        return f"<DerivedAsset({self.rendition} of {self.original_key}, provider={self.provider})>"
@@ -0,0 +1,47 @@
+"""
+Publish Receipt Model for ContentOS
+
+One row per idempotency key that has been published to a social platform,
+so a retried or reclaimed scheduled post is answered from here instead of
+being posted a second time.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, DateTime, Text, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base
+
+
+class PublishReceipt(Base):
+    """
+    A completed publish for an idempotency key.
+    
+    Attributes:
+        idempotency_key: Key the publish was made under (primary key)
+        
+        platform: Social media platform
+        user_id: Account owner
+        post_id: Platform post ID
+        post_url: Platform post URL
+        
+        published_at: When the platform accepted the post
+    """
+    __tablename__ = "social_publish_receipts"
+    
+    idempotency_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    
+    platform: Mapped[str] = mapped_column(String(50), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    post_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    post_url: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    
+    published_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        index=True,
+    )
+    
+    def __repr__(self) -> str:
+        return f"<PublishReceipt({self.platform} {self.idempotency_key} -> {self.post_id})>"
@@ -0,0 +1,41 @@
+"""
+Quota Event Model for ContentOS
+
+One row per counted outbound action (a publish, an API call) of a user's
+account on a social platform. The rate governor sums them over rolling
+windows.
+"""
+from datetime import datetime
+
+from sqlalchemy import String, DateTime, Integer, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base
+
+
+class QuotaEvent(Base):
+    """
+    A counted action against a platform quota.
+    
+    Attributes:
+        id: Primary key
+        
+        user_id: Account owner
+        platform: Social media platform
+        kind: What was counted ("post", "call")
+        occurred_at: When it happened
+    """
+    __tablename__ = "social_quota_events"
+    __table_args__ = (
+        Index("ix_quota_event_account", "platform", "user_id", "kind", "occurred_at"),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    platform: Mapped[str] = mapped_column(String(50), nullable=False)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    
+    def __repr__(self) -> str:
+        return f"<QuotaEvent({self.platform}/{self.user_id} {self.kind} at {self.occurred_at})>"
@@ -16,8 +16,10 @@ from database import Base
 class ScheduleStatus(str, Enum):
     """Scheduled post status values."""
     QUEUED = "queued"
+    PUBLISHING = "publishing"  # claimed by a scheduler instance
     PUBLISHED = "published"
     FAILED = "failed"
+    DEAD_LETTER = "dead_letter"  # retries exhausted
     CANCELLED = "cancelled"
 
 
@@ -41,6 +43,15 @@ class ScheduledPost(Base):
         
         ai_optimized: Whether AI optimized the timing
         original_scheduled_at: Original time before AI optimization
+        
+        claimed_by: Scheduler instance currently publishing the post
+        claimed_until: Lease expiry; after it another instance may reclaim
+        idempotency_key: Stable key sent with every publish attempt
+        external_post_id: Platform post id once published
+        
+        attempts: Publish attempts so far
+        next_attempt_at: When a failed post is retried (backoff)
+        last_error: Error of the latest failed attempt
     """
     __tablename__ = "scheduled_posts"
     
@@ -80,6 +91,23 @@ class ScheduledPost(Base):
         nullable=True
     )
     
+    # Publish claim (multi-instance schedulers)
+    claimed_by: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    claimed_until: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), 
+        nullable=True
+    )
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    external_post_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    
+    # Retries
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    next_attempt_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), 
+        nullable=True
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
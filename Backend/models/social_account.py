@@ -7,7 +7,7 @@ from datetime import datetime
 from typing import Optional
 from enum import Enum
 
-from sqlalchemy import String, DateTime, Text, Integer, ForeignKey, Boolean, func, JSON
+from sqlalchemy import String, DateTime, Text, Integer, ForeignKey, Boolean, func, JSON, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from database import Base
@@ -40,9 +40,12 @@ class SocialAccount(Base):
         
         is_active: Whether the connection is active
         last_used_at: Last time this account was used to post
-        metadata: Additional platform-specific data
+        extra_data: Additional platform-specific data ("metadata" column)
     """
     __tablename__ = "social_accounts"
+    __table_args__ = (
+        UniqueConstraint("user_id", "platform", name="uq_social_account_user_platform"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
@@ -67,8 +70,9 @@ class SocialAccount(Base):
         nullable=True
     )
     
-    # Platform-specific metadata (JSON)
-    metadata: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # Platform-specific metadata (JSON); "metadata" is reserved on
+    # declarative models, so the attribute is named extra_data
+    extra_data: Mapped[Optional[dict]] = mapped_column("metadata", JSON, nullable=True)
     
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
@@ -0,0 +1,55 @@
+"""
+Stored Object Model for ContentOS
+
+Index of content-addressed media: one row per distinct file (by SHA-256)
+with a reference count, so identical uploads share one stored copy.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, DateTime, Text, Integer, BigInteger, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base
+
+
+class StoredObject(Base):
+    """
+    Deduplicated stored file.
+
+    Attributes:
+        sha256: Hex SHA-256 of the file contents (also the moderation cache key)
+
+        provider: Storage provider holding the file ("s3", "firebase", "local")
+        key: Provider object key
+        url: Public URL returned to uploaders
+        size: File size in bytes
+        content_type: MIME type of the first upload
+
+        ref_count: Number of live uploads pointing at this file
+        last_referenced_at: Time of the latest duplicate upload
+    """
+    __tablename__ = "stored_objects"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    provider: Mapped[str] = mapped_column(String(20), nullable=False)
+    key: Mapped[str] = mapped_column(String(500), nullable=False, index=True)
+    url: Mapped[str] = mapped_column(Text, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    content_type: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+
+    ref_count: Mapped[int] = mapped_column(Integer, default=1)
+    last_referenced_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+
+    def __repr__(self) -> str:
+        return f"<StoredObject({self.sha256[:12]}, refs={self.ref_count}, provider={self.provider})>"
@@ -0,0 +1,63 @@
+"""
+Translation Cache Model for ContentOS
+
+Persistent tier of the translation cache (the in-process LRU sits in
+front of it). One row per (normalized text, source, target, provider).
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, DateTime, Text, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base
+
+
+class TranslationCacheEntry(Base):
+    """
+    Cached translation result.
+    
+    Attributes:
+        cache_key: sha256 of provider + language pair + normalized text
+        text_hash: sha256 of the normalized source text
+        
+        source_lang: Source language code
+        target_lang: Target language code
+        provider: Provider that produced the translation
+        translated_text: Cached translation
+        
+        hit_count: Number of times served from cache
+        expires_at: When the entry stops being served (TTL)
+    """
+    __tablename__ = "translation_cache"
+    
+    cache_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    text_hash: Mapped[str] = mapped_column(String(64), index=True)
+    
+    source_lang: Mapped[str] = mapped_column(String(10), nullable=False)
+    target_lang: Mapped[str] = mapped_column(String(10), nullable=False)
+    provider: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    translated_text: Mapped[str] = mapped_column(Text, nullable=False)
+    
+    hit_count: Mapped[int] = mapped_column(Integer, default=0)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        index=True
+    )
+    last_hit_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
+    
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+    
+    def __repr__(self) -> str:
+        return (
+            f"<TranslationCacheEntry({self.source_lang}->{self.target_lang}, "
+            f"provider={self.provider})>"
+        )
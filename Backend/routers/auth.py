@@ -157,6 +157,16 @@ async def get_current_user(
     return user
 
 
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Current user, if listed in ADMIN_EMAILS (required)."""
+    if current_user.email.lower() not in settings.admin_email_list:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
+
+
 # ===========================================
 # API Endpoints (Only 4: register, login, profile, logout)
 # ===========================================
@@ -17,6 +17,8 @@ from pydantic import BaseModel
 from services.llm_service import get_llm_service, AllProvidersFailedError
 from services.vision_service import get_vision_service
 from services.speech_service import get_speech_service
+from services.storage_service import spool_upload_to_temp
+from config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -198,13 +200,12 @@ async def extract_and_generate(
         
         # Extract from video (use first frame for now)
         if video:
-            import tempfile
             import os
-            video_bytes = await video.read()
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(video.filename or ".mp4")[1]) as tmp:
-                tmp.write(video_bytes)
-                tmp_path = tmp.name
+            tmp_path = await spool_upload_to_temp(
+                video,
+                suffix=os.path.splitext(video.filename or ".mp4")[1],
+                max_bytes=settings.upload_max_bytes,
+            )
             
             try:
                 import cv2
@@ -2,6 +2,7 @@
 Media Router for ContentOS
 
 Handles file uploads with S3 → Firebase → Local fallback.
+Uploads are streamed to storage in chunks (never read whole into memory).
 """
 import logging
 from typing import Optional
@@ -9,7 +10,14 @@ from typing import Optional
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from pydantic import BaseModel
 
-from services.storage_service import get_storage_service, UploadError
+from config import settings
+from services.storage_service import (
+    get_storage_service,
+    iter_upload_file,
+    UploadError,
+    FileTooLargeError,
+    EmptyUploadError,
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -23,6 +31,10 @@ class UploadResponse(BaseModel):
     provider: str
     size: int
     content_type: str
+    sha256: Optional[str] = None
+    deduplicated: bool = False
+    ref_count: Optional[int] = None
+    derived_pending: bool = False
 
 
 class StorageStatusResponse(BaseModel):
@@ -51,25 +63,17 @@ async def upload_file(
     """
     storage = get_storage_service()
     
+    max_size = settings.upload_max_bytes
+    
     try:
-        # Read file contents
-        file_data = await file.read()
-        
-        if not file_data:
-            raise HTTPException(status_code=400, detail="Empty file")
-        
-        # Validate file size (max 50MB)
-        max_size = 50 * 1024 * 1024
-        if len(file_data) > max_size:
-            raise HTTPException(status_code=413, detail="File too large (max 50MB)")
-        
-        # Upload
-        result = await storage.upload(
-            file_data=file_data,
+        # Stream to storage; size limit is enforced while streaming
+        result = await storage.upload_stream(
+            iter_upload_file(file),
             filename=file.filename or "unnamed",
             content_type=file.content_type,
             folder=folder,
             preferred_provider=preferred_provider,
+            max_bytes=max_size,
         )
         
         return UploadResponse(
@@ -79,8 +83,19 @@ async def upload_file(
             provider=result["provider"],
             size=result["size"],
             content_type=result["content_type"],
+            sha256=result.get("sha256"),
+            deduplicated=result.get("deduplicated", False),
+            ref_count=result.get("ref_count"),
+            derived_pending=result.get("derived_pending", False),
         )
         
+    except FileTooLargeError:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large (max {max_size // (1024 * 1024)}MB)"
+        )
+    except EmptyUploadError:
+        raise HTTPException(status_code=400, detail="Empty file")
     except UploadError as e:
         logger.error(f"Upload failed: {e}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
@@ -96,11 +111,38 @@ async def storage_status():
     return StorageStatusResponse(providers=storage.get_status())
 
 
+@router.get("/derived/{provider}/{file_key:path}")
+async def get_derived_assets(provider: str, file_key: str):
+    """
+    Renditions generated for an uploaded image.
+    
+    Returns thumbnail, moderation and display (WebP) entries with url,
+    dimensions and size. Empty until the background worker has run.
+    """
+    storage = get_storage_service()
+    derived = await storage.get_derived(file_key, provider)
+    return {"key": file_key, "provider": provider, "ready": bool(derived), "derived": derived}
+
+
+@router.get("/savings")
+async def storage_savings():
+    """
+    Storage saved by content-addressed deduplication.
+    
+    Reports distinct stored files, total references, stored vs logical
+    (without deduplication) bytes and the savings ratio.
+    """
+    storage = get_storage_service()
+    return await storage.savings_report()
+
+
 @router.delete("/{provider}/{file_key:path}")
 async def delete_file(provider: str, file_key: str):
     """
     Delete a file from storage.
     
+    Deduplicated files are only removed when their last reference is deleted.
+    
     Args:
         provider: Storage provider ("s3", "firebase", "local")
         file_key: File key/path
@@ -4,7 +4,7 @@ Moderation Router for ContentOS
 Handles multimodal content moderation - NO AUTH REQUIRED.
 - Text moderation
 - Image moderation  
-- Audio moderation
+- Audio moderation (+ background transcription jobs)
 - Video moderation
 
 Now saves results to database for analytics tracking.
@@ -17,6 +17,10 @@ from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.moderation_service import get_moderation_service
+from services.speech_service import get_speech_service, SpeechError
+from services.transcription_pool import get_transcription_pool
+from services.storage_service import spool_upload_to_temp, FileTooLargeError
+from config import settings
 from database import get_db
 from models.content import Content, ModerationStatus
 from models.user import User
@@ -181,6 +185,40 @@ async def moderate_audio(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/audio/transcribe")
+async def submit_transcription(
+    audio: UploadFile = File(...),
+    language: Optional[str] = Form(None),
+):
+    """
+    Queue audio for background transcription.
+    Returns a job id immediately; poll /audio/jobs/{job_id} for progress.
+    NO AUTHENTICATION REQUIRED.
+    """
+    audio_bytes = await audio.read()
+    try:
+        job = await get_speech_service().submit_transcription_job(audio_bytes, audio.filename, language)
+    except SpeechError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return job.to_dict(include_result=False)
+
+
+@router.get("/audio/jobs/{job_id}")
+async def get_transcription_job(job_id: str):
+    """Get status, progress, real-time factor and (when done) the transcript."""
+    job = get_transcription_pool().get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Transcription job not found")
+    return job.to_dict()
+
+
+@router.get("/audio/pool")
+async def get_transcription_pool_stats():
+    """Whisper pool configuration, queue depth and real-time factor per backend."""
+    return get_transcription_pool().stats()
+
+
 @router.post("/video")
 async def moderate_video(
     video: UploadFile = File(...),
@@ -192,16 +230,15 @@ async def moderate_video(
     Extracts frames and analyzes them for moderation.
     NO AUTHENTICATION REQUIRED.
     """
-    import tempfile
     import os
     
     try:
-        video_bytes = await video.read()
-        
-        # Save to temp file for processing
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(video.filename or ".mp4")[1]) as tmp:
-            tmp.write(video_bytes)
-            tmp_path = tmp.name
+        # Stream to a temp file for processing (never held whole in memory)
+        tmp_path = await spool_upload_to_temp(
+            video,
+            suffix=os.path.splitext(video.filename or ".mp4")[1],
+            max_bytes=settings.upload_max_bytes,
+        )
         
         try:
             import cv2
@@ -236,8 +273,8 @@ async def moderate_video(
                     _, buffer = cv2.imencode('.jpg', frame)
                     frame_bytes = buffer.tobytes()
                     
-                    # Analyze frame
-                    frame_result = await moderation.moderate_image(frame_bytes)
+                    # Analyze frame (moderation only, content labels unused)
+                    frame_result = await moderation.moderate_image(frame_bytes, include_labels=False)
                     frame_results.append({
                         "frame_index": idx,
                         "timestamp": idx / fps if fps > 0 else 0,
@@ -298,6 +335,8 @@ async def moderate_video(
                 
     except HTTPException:
         raise
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"Video moderation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -11,11 +11,13 @@ from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 
+from config import settings
 from database import get_db
 from models.schedule import ScheduledPost, ScheduleStatus
 from services.vision_service import VisionService
+from services.task_scheduler import get_scheduler_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -44,12 +46,23 @@ class ScheduleResponse(BaseModel):
     ai_optimized: bool
     moderation_passed: bool = True
     moderation_reason: Optional[str] = None
+    attempts: int = 0
+    next_attempt_at: Optional[datetime] = None
+    last_error: Optional[str] = None
     created_at: datetime
-
+    
     class Config:
         from_attributes = True
 
 
+class RequeueRequest(BaseModel):
+    """Request for putting failed posts back in the queue."""
+    post_ids: Optional[List[int]] = None  # None = every matching post
+    statuses: List[str] = [ScheduleStatus.FAILED.value, ScheduleStatus.DEAD_LETTER.value]
+    platform: Optional[str] = None
+    user_id: int = 1  # Default user for demo
+
+
 class ModerationResult(BaseModel):
     """Moderation check result."""
     passed: bool
@@ -78,34 +91,40 @@ async def schedule_post(
     # Run moderation check if media URL is provided
     if request.media_url and not request.skip_moderation:
         try:
-            import httpx
+            from services.storage_service import get_storage_service
             
-            # Download the image
-            async with httpx.AsyncClient() as client:
-                response = await client.get(request.media_url, timeout=30.0)
+            # Our own uploads have a small EXIF-free moderation rendition;
+            # other URLs (or renditions not ready yet) are downloaded whole
+            image_data = await get_storage_service().download_rendition(request.media_url, "moderation")
+            if image_data is None:
+                import httpx
+                
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(request.media_url, timeout=30.0)
                 if response.status_code == 200:
                     image_data = response.content
+            
+            if image_data is not None:
+                # Run moderation
+                vision_service = VisionService()
+                result = await vision_service.analyze_image(image_data)
+                
+                # Check if content is safe
+                if not result.get("is_safe", True):
+                    moderation_passed = False
+                    moderation_reason = f"Content flagged: {', '.join(result.get('labels', ['inappropriate content']))}"
                     
-                    # Run moderation
-                    vision_service = VisionService()
-                    result = await vision_service.analyze_image(image_data)
-                    
-                    # Check if content is safe
-                    if not result.get("is_safe", True):
-                        moderation_passed = False
-                        moderation_reason = f"Content flagged: {', '.join(result.get('labels', ['inappropriate content']))}"
-                        
-                        # Reject the post
-                        raise HTTPException(
-                            status_code=400,
-                            detail={
-                                "error": "moderation_failed",
-                                "message": "Content did not pass moderation check",
-                                "reason": moderation_reason,
-                                "labels": result.get("labels", []),
-                                "confidence": result.get("confidence", 0),
-                            }
-                        )
+                    # Reject the post
+                    raise HTTPException(
+                        status_code=400,
+                        detail={
+                            "error": "moderation_failed",
+                            "message": "Content did not pass moderation check",
+                            "reason": moderation_reason,
+                            "labels": result.get("labels", []),
+                            "confidence": result.get("confidence", 0),
+                        }
+                    )
         except HTTPException:
             raise
         except Exception as e:
@@ -153,6 +172,7 @@ async def schedule_post(
     db.add(post)
     await db.commit()
     await db.refresh(post)
+    get_scheduler_service().track(post.id, post.scheduled_at)
     
     logger.info(f"Post scheduled: {post.id} for {post.scheduled_at} on {post.platform}")
     
@@ -177,44 +197,62 @@ async def schedule_post_with_media(
     Schedule a post with media upload and moderation.
     
     ⚠️ MODERATION CHECK: Uploaded media must pass content moderation.
+    Images are moderated in memory; audio/video are streamed straight to
+    storage without being read whole.
     """
-    # Read and moderate the uploaded file
-    file_data = await file.read()
-    
-    if not file_data:
-        raise HTTPException(status_code=400, detail="Empty file")
+    from services.storage_service import (
+        get_storage_service,
+        iter_upload_file,
+        FileTooLargeError,
+        EmptyUploadError,
+    )
     
-    # Run moderation on uploaded image
-    try:
-        vision_service = VisionService()
-        result = await vision_service.analyze_image(file_data)
+    # Vision moderation only applies to images
+    if not (file.content_type or "").startswith(("video/", "audio/")):
+        file_data = await file.read()
         
-        if not result.get("is_safe", True):
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "error": "moderation_failed",
-                    "message": "Uploaded content did not pass moderation",
-                    "reason": f"Content flagged: {', '.join(result.get('labels', []))}",
-                    "labels": result.get("labels", []),
-                    "confidence": result.get("confidence", 0),
-                }
-            )
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.warning(f"Moderation check failed, allowing post: {e}")
+        if not file_data:
+            raise HTTPException(status_code=400, detail="Empty file")
+        
+        # Run moderation on uploaded image
+        try:
+            vision_service = VisionService()
+            result = await vision_service.analyze_image(file_data)
+            
+            if not result.get("is_safe", True):
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "error": "moderation_failed",
+                        "message": "Uploaded content did not pass moderation",
+                        "reason": f"Content flagged: {', '.join(result.get('labels', []))}",
+                        "labels": result.get("labels", []),
+                        "confidence": result.get("confidence", 0),
+                    }
+                )
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.warning(f"Moderation check failed, allowing post: {e}")
+        
+        del file_data
+        await file.seek(0)
     
-    # Upload to storage
-    from services.storage_service import get_storage_service
+    # Stream to storage
     storage = get_storage_service()
     
-    upload_result = await storage.upload(
-        file_data=file_data,
-        filename=file.filename or "upload",
-        content_type=file.content_type,
-        folder="scheduled",
-    )
+    try:
+        upload_result = await storage.upload_stream(
+            iter_upload_file(file),
+            filename=file.filename or "upload",
+            content_type=file.content_type,
+            folder="scheduled",
+            max_bytes=settings.upload_max_bytes,
+        )
+    except FileTooLargeError:
+        raise HTTPException(status_code=413, detail="File too large")
+    except EmptyUploadError:
+        raise HTTPException(status_code=400, detail="Empty file")
     
     # Create the scheduled post
     post = ScheduledPost(
@@ -229,6 +267,7 @@ async def schedule_post_with_media(
     db.add(post)
     await db.commit()
     await db.refresh(post)
+    get_scheduler_service().track(post.id, post.scheduled_at)
     
     return {
         "post": ScheduleResponse.model_validate(post),
@@ -292,6 +331,62 @@ async def check_content_moderation(
     )
 
 
+@router.post("/requeue")
+async def requeue_failed_posts(
+    request: RequeueRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Put failed / dead-lettered posts back in the queue with a fresh
+    attempt budget. Posts whose time has passed are published right away.
+    NO AUTHENTICATION REQUIRED.
+    """
+    allowed = {ScheduleStatus.FAILED.value, ScheduleStatus.DEAD_LETTER.value}
+    invalid = set(request.statuses) - allowed
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Only failed or dead_letter posts can be requeued (got: {', '.join(sorted(invalid))})",
+        )
+    
+    query = select(ScheduledPost.id, ScheduledPost.scheduled_at).where(
+        ScheduledPost.user_id == request.user_id,
+        ScheduledPost.status.in_(request.statuses),
+    )
+    if request.post_ids is not None:
+        query = query.where(ScheduledPost.id.in_(request.post_ids))
+    if request.platform:
+        query = query.where(ScheduledPost.platform == request.platform)
+    
+    rows = (await db.execute(query)).all()
+    if not rows:
+        return {"requeued": 0, "post_ids": []}
+    
+    post_ids = [row.id for row in rows]
+    # Status re-checked in the UPDATE so a concurrent change isn't overwritten
+    await db.execute(
+        update(ScheduledPost)
+        .where(
+            ScheduledPost.id.in_(post_ids),
+            ScheduledPost.status.in_(request.statuses),
+        )
+        .values(
+            status=ScheduleStatus.QUEUED.value,
+            attempts=0,
+            next_attempt_at=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    
+    scheduler = get_scheduler_service()
+    for row in rows:
+        scheduler.track(row.id, row.scheduled_at)
+    
+    logger.info(f"Requeued {len(post_ids)} posts")
+    return {"requeued": len(post_ids), "post_ids": post_ids}
+
+
 @router.get("/", response_model=List[ScheduleResponse])
 async def list_scheduled_posts(
     status: Optional[str] = None,
@@ -348,18 +443,32 @@ async def cancel_scheduled_post(
     Cancel a scheduled post.
     NO AUTHENTICATION REQUIRED.
     """
+    # Conditional update, so a worker claiming the post between a status
+    # check and the write can't have its publish marked cancelled
     result = await db.execute(
-        select(ScheduledPost).where(ScheduledPost.id == post_id)
+        update(ScheduledPost)
+        .where(
+            ScheduledPost.id == post_id,
+            ScheduledPost.status.in_([
+                ScheduleStatus.QUEUED.value,
+                ScheduleStatus.FAILED.value,
+                ScheduleStatus.DEAD_LETTER.value,
+            ]),
+        )
+        .values(status=ScheduleStatus.CANCELLED.value)
     )
-    post = result.scalar_one_or_none()
-    
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
-    if post.status == ScheduleStatus.PUBLISHED.value:
-        raise HTTPException(status_code=400, detail="Cannot cancel published post")
-    
-    post.status = ScheduleStatus.CANCELLED.value
     await db.commit()
     
+    if not result.rowcount:
+        post = await db.get(ScheduledPost, post_id)
+        if not post:
+            raise HTTPException(status_code=404, detail="Post not found")
+        if post.status == ScheduleStatus.PUBLISHED.value:
+            raise HTTPException(status_code=400, detail="Cannot cancel published post")
+        if post.status == ScheduleStatus.CANCELLED.value:
+            return {"message": "Post cancelled successfully"}
+        raise HTTPException(status_code=409, detail=f"Post is {post.status}")
+    
+    get_scheduler_service().untrack(post_id)
+    
     return {"message": "Post cancelled successfully"}
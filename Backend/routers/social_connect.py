@@ -6,16 +6,20 @@ Handles OAuth connections and publishing for social media platforms:
 - Instagram (using Graph API)
 - LinkedIn (using official API)
 """
+import asyncio
 import logging
+import time
 from typing import Optional, List, Dict, Any
 
 from fastapi import APIRouter, HTTPException, Query, Form
 from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from services.social.twitter_service import get_twitter_service
 from services.social.instagram_service import get_instagram_service
 from services.social.linkedin_service import get_linkedin_service
+from services.social.base import SocialPublishResult
+from services.social.rate_governor import get_rate_governor
 from services.task_scheduler import get_scheduler_service
 
 logger = logging.getLogger(__name__)
@@ -147,6 +151,65 @@ class PublishResponse(BaseModel):
     mode: Optional[str] = None
 
 
+class MultiPublishRequest(BaseModel):
+    """Request to publish the same content to several platforms."""
+    content: str
+    platforms: List[str] = Field(..., min_length=1)
+    media_urls: Optional[list] = None
+    media_paths: Optional[list] = None
+    user_id: int = 1  # Default user for demo
+
+
+class PlatformPublishResult(PublishResponse):
+    """Result of one platform in a multi-platform publish."""
+    duration_ms: float
+
+
+class MultiPublishResponse(BaseModel):
+    """Aggregated results of a multi-platform publish."""
+    success: bool  # every platform succeeded
+    results: List[PlatformPublishResult]
+    duration_ms: float
+
+
+# Platform name -> service getter
+PLATFORM_SERVICES = {
+    "twitter": get_twitter_service,
+    "instagram": get_instagram_service,
+    "linkedin": get_linkedin_service,
+}
+
+
+async def _governed_publish(platform: str, service, user_id: int, **kwargs) -> SocialPublishResult:
+    """
+    Publish right away if the account's rate quota allows it; otherwise
+    fail fast with the time the next post may go out.
+    """
+    governor = get_rate_governor()
+    calls = service.api_calls_needed(kwargs.get("media_urls"))
+    reservation, wait = await governor.acquire(platform, user_id, calls=calls)
+    if reservation is None:
+        next_at = await governor.next_available(platform, user_id, calls=calls)
+        return SocialPublishResult(
+            success=False,
+            platform=platform,
+            error=f"{platform} rate limit reached for this account; next post possible at {next_at.isoformat()}",
+            metadata={"next_available_at": next_at.isoformat()},
+            retry_after=wait,
+        )
+    
+    try:
+        result = await service.publish(user_id=user_id, **kwargs)
+    except Exception:
+        # The publish failed, so don't count it against the quota. A
+        # cancelled publish keeps its reservation (as in the scheduler):
+        # the platform may already have accepted the post.
+        governor.release(reservation)
+        raise
+    governor.settle(reservation, result)
+    return result
+
+
 # ============================================
 # Twitter Endpoints (using twikit - no API key!)
 # ============================================
@@ -227,7 +290,9 @@ async def twitter_publish(request: PublishRequest):
     """Publish a tweet."""
     service = get_twitter_service()
     
-    result = await service.publish(
+    result = await _governed_publish(
+        "twitter",
+        service,
         user_id=request.user_id,
         content=request.content,
         media_urls=request.media_urls,
@@ -294,7 +359,9 @@ async def instagram_publish(request: PublishRequest):
     """Publish to Instagram."""
     service = get_instagram_service()
     
-    result = await service.publish(
+    result = await _governed_publish(
+        "instagram",
+        service,
         user_id=request.user_id,
         content=request.content,
         media_urls=request.media_urls,
@@ -360,7 +427,9 @@ async def linkedin_publish(request: PublishRequest):
     """Publish to LinkedIn."""
     service = get_linkedin_service()
     
-    result = await service.publish(
+    result = await _governed_publish(
+        "linkedin",
+        service,
         user_id=request.user_id,
         content=request.content,
         media_urls=request.media_urls,
@@ -388,31 +457,56 @@ async def linkedin_disconnect(user_id: int = 1):
 # General Endpoints
 # ============================================
 
+async def _timed_connected(service, user_id: int) -> Dict[str, Any]:
+    """Connection check of one platform, with its duration."""
+    start = time.perf_counter()
+    try:
+        connected = await service.is_authenticated(user_id)
+    except Exception as e:
+        logger.warning(f"{service.platform_name} status check failed: {e}")
+        connected = False
+    return {
+        "connected": connected,
+        "checked_in_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
 @router.get("/status")
 async def all_platforms_status(user_id: int = 1):
-    """Get status of all social platforms."""
+    """
+    Get status of all social platforms.
+    
+    Platforms are checked concurrently, so the response takes as long as
+    the slowest check.
+    """
     twitter = get_twitter_service()
     instagram = get_instagram_service()
     linkedin = get_linkedin_service()
     scheduler = get_scheduler_service()
     
+    twitter_check, instagram_check, linkedin_check = await asyncio.gather(
+        _timed_connected(twitter, user_id),
+        _timed_connected(instagram, user_id),
+        _timed_connected(linkedin, user_id),
+    )
+    
     return {
         "platforms": {
             "twitter": {
                 "configured": twitter.is_configured(),
-                "connected": await twitter.is_authenticated(user_id),
+                **twitter_check,
                 "auth_type": "credentials",
                 "note": "Uses twikit - no API key required!",
             },
             "instagram": {
                 "configured": instagram.is_configured(),
-                "connected": await instagram.is_authenticated(user_id),
+                **instagram_check,
                 "auth_type": "oauth",
                 "note": "Requires Facebook/Instagram Business account",
             },
             "linkedin": {
                 "configured": linkedin.is_configured(),
-                "connected": await linkedin.is_authenticated(user_id),
+                **linkedin_check,
                 "auth_type": "oauth",
                 "note": "Requires LinkedIn Developer App",
             },
@@ -421,6 +515,67 @@ async def all_platforms_status(user_id: int = 1):
     }
 
 
+async def _publish_to(platform: str, request: MultiPublishRequest) -> PlatformPublishResult:
+    """Publish to one platform within its concurrency limits, timed."""
+    service = PLATFORM_SERVICES[platform]()
+    scheduler = get_scheduler_service()
+    
+    start = time.perf_counter()
+    try:
+        async with scheduler.publish_slot(platform):
+            result = await _governed_publish(
+                platform,
+                service,
+                user_id=request.user_id,
+                content=request.content,
+                media_urls=request.media_urls,
+                media_paths=request.media_paths,
+            )
+        response = PlatformPublishResult(
+            success=result.success,
+            platform=platform,
+            post_id=result.post_id,
+            post_url=result.post_url,
+            error=result.error,
+            mode=result.metadata.get("mode"),
+            duration_ms=0,
+        )
+    except Exception as e:
+        logger.error(f"Multi-publish to {platform} failed: {e}")
+        response = PlatformPublishResult(success=False, platform=platform, error=str(e), duration_ms=0)
+    
+    response.duration_ms = round((time.perf_counter() - start) * 1000, 2)
+    return response
+
+
+@router.post("/publish-multi", response_model=MultiPublishResponse)
+async def publish_multi(request: MultiPublishRequest):
+    """
+    Publish the same content to several platforms at once.
+    
+    Platforms are published concurrently (each within the scheduler's
+    per-platform limits), so the request takes as long as the slowest
+    platform. A failure on one platform doesn't affect the others.
+    """
+    platforms = list(dict.fromkeys(p.lower() for p in request.platforms))
+    unknown = [p for p in platforms if p not in PLATFORM_SERVICES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported platforms: {', '.join(unknown)}. "
+                   f"Supported: {', '.join(PLATFORM_SERVICES)}",
+        )
+    
+    start = time.perf_counter()
+    results = await asyncio.gather(*(_publish_to(p, request) for p in platforms))
+    
+    return MultiPublishResponse(
+        success=all(r.success for r in results),
+        results=list(results),
+        duration_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
+
+
 @router.post("/publish/{post_id}")
 async def publish_scheduled_post(post_id: int):
     """Manually trigger a scheduled post to publish now."""
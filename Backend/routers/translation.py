@@ -2,17 +2,24 @@
 Translation Router for ContentOS
 
 Handles multilingual translation - NO AUTH REQUIRED.
-- Text translation
+- Text translation (single, batch, fan-out to many languages)
 - Language detection
 - Supported languages list
+- Translation cache stats / invalidation (invalidation is admin-only)
 """
+import json
 import logging
+import time
 from typing import Optional, List
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from services.translation_service import get_translation_service
+from services.translation_cache import get_translation_cache
+from models.user import User
+from routers.auth import get_current_admin
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -34,6 +41,15 @@ class TranslateResponse(BaseModel):
     target_lang: str
     provider: str
     fallback_used: bool
+    cached: bool = False
+
+
+class FanoutRequest(BaseModel):
+    """Request to translate one text into many languages."""
+    text: str
+    target_langs: Optional[List[str]] = None  # All supported languages if not provided
+    source_lang: Optional[str] = None  # Auto-detect once if not provided
+    stream: bool = False  # NDJSON, one line per completed language
 
 
 class DetectRequest(BaseModel):
@@ -68,26 +84,80 @@ async def translate_text(request: TranslateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/fanout")
+async def translate_fanout(request: FanoutRequest):
+    """
+    Translate one text into many target languages concurrently.
+    Detects the source language once and reuses cached translations.
+    With stream=true, results are sent as NDJSON lines as each language
+    completes, followed by a summary line.
+    NO AUTHENTICATION REQUIRED.
+    """
+    start = time.perf_counter()
+    source_lang = request.source_lang or translation.detect_language(request.text)
+    results = translation.translate_fanout(request.text, request.target_langs, source_lang)
+    
+    def _summary(items: List[dict]) -> dict:
+        return {
+            "source_lang": source_lang,
+            "count": len(items),
+            "errors": sum(1 for r in items if "error" in r),
+            "cached": sum(1 for r in items if r.get("cached")),
+            "processing_time_ms": int((time.perf_counter() - start) * 1000),
+        }
+    
+    if request.stream:
+        async def _ndjson():
+            completed = []
+            async for result in results:
+                completed.append(result)
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+            yield json.dumps({"done": True, **_summary(completed)}) + "\n"
+        
+        return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
+    
+    try:
+        completed = [result async for result in results]
+    except Exception as e:
+        logger.error(f"Fan-out translation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        # Completion order, so the fastest languages come first
+        "translations": completed,
+        **_summary(completed),
+    }
+
+
 @router.post("/detect")
 async def detect_language(request: DetectRequest):
     """
     Detect language of input text.
     NO AUTHENTICATION REQUIRED.
     """
-    detected = translation.detect_language(request.text)
+    result = translation.detect(request.text)
     return {
-        "detected_language": detected,
-        "confidence": 0.9,
+        "detected_language": result.language,
+        "confidence": result.confidence,
+        "transliterated": result.is_transliterated,
+        "method": result.method,
     }
 
 
 @router.get("/languages", response_model=List[LanguageInfo])
-async def get_supported_languages():
+async def get_supported_languages(response: Response):
     """
     Get list of supported languages.
     Supports 9 Indian languages + English.
+    Translation cache hit rates are reported in X-Translation-Cache-* headers.
     NO AUTHENTICATION REQUIRED.
     """
+    stats = get_translation_cache().stats()
+    response.headers["X-Translation-Cache-Hit-Rate"] = str(stats["hit_rate"])
+    response.headers["X-Translation-Cache-Memory-Hit-Rate"] = str(stats["memory_hit_rate"])
+    response.headers["X-Translation-Cache-Lookups"] = str(
+        stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    )
     return translation.get_supported_languages()
 
 
@@ -103,10 +173,52 @@ async def translate_batch(
     """
     try:
         results = await translation.translate_batch(texts, target_lang, source_lang)
+        hits = sum(1 for r in results if r.get("cached"))
         return {
             "translations": results,
             "count": len(results),
+            "cache": {
+                "hits": hits,
+                "misses": len(results) - hits,
+                "hit_rate": round(hits / len(results), 4) if results else 0.0,
+                "overall_hit_rate": get_translation_cache().stats()["hit_rate"],
+            },
         }
     except Exception as e:
         logger.error(f"Batch translation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    Translation cache statistics (hits per tier, misses, hit rates).
+    NO AUTHENTICATION REQUIRED.
+    """
+    return get_translation_cache().stats()
+
+
+@router.delete("/cache")
+async def invalidate_cache(
+    provider: Optional[str] = None,
+    source_lang: Optional[str] = None,
+    target_lang: Optional[str] = None,
+    admin: User = Depends(get_current_admin),
+):
+    """
+    Invalidate cached translations, optionally only for one provider
+    and/or language pair. Expired rows are purged as well.
+    ADMIN ONLY (ADMIN_EMAILS).
+    """
+    cache = get_translation_cache()
+    deleted = await cache.invalidate(provider, source_lang, target_lang)
+    expired = await cache.purge_expired()
+    return {
+        "deleted": deleted,
+        "expired_purged": expired,
+        "filters": {
+            "provider": provider,
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+        },
+    }
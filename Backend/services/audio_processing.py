@@ -0,0 +1,233 @@
+"""
+Audio Processing for ContentOS
+
+Helpers shared by the speech pipeline:
+1. Decoding any container/codec to 16 kHz mono float32, in memory
+   (WAV fast path, ffmpeg stdin/stdout pipe) or from a file
+2. Energy-based voice activity detection (VAD)
+3. Splitting long audio on silence into Whisper-sized chunks
+
+Chunks carry their start offset so per-chunk transcripts can be stitched
+back onto the original timeline.
+"""
+import io
+import logging
+import subprocess
+import wave
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+class AudioDecodeError(Exception):
+    """Raised when audio cannot be decoded."""
+    pass
+
+
+@dataclass
+class AudioChunk:
+    """A slice of speech between silences."""
+    index: int
+    start: float
+    end: float
+    samples: np.ndarray
+    
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def load_audio(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode an audio/video file to mono float32 PCM in [-1, 1].
+    
+    Uses the ffmpeg CLI (already required by Whisper).
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", path,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate),
+        "-",
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg not found on PATH")
+    except subprocess.CalledProcessError as e:
+        raise AudioDecodeError(f"ffmpeg failed: {e.stderr.decode(errors='ignore')[-300:]}")
+    
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def _decode_wav(audio_bytes: bytes, sample_rate: int) -> Optional[np.ndarray]:
+    """
+    Decode 16-bit PCM WAV at the target rate without spawning ffmpeg.
+    
+    Returns None when the WAV needs resampling or isn't 16-bit PCM.
+    """
+    try:
+        with wave.open(io.BytesIO(audio_bytes)) as wav:
+            if wav.getsampwidth() != 2 or wav.getframerate() != sample_rate:
+                return None
+            channels = wav.getnchannels()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    
+    pcm = np.frombuffer(frames, np.int16)
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1)
+    return pcm.astype(np.float32) / 32768.0
+
+
+def decode_audio_bytes(audio_bytes: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode an in-memory upload to mono float32 PCM without touching disk.
+    
+    16 kHz 16-bit WAV is parsed directly; everything else is piped through
+    ffmpeg (stdin -> stdout). Containers that need seeking (e.g. MP4 with
+    the index at the end) can fail on a pipe, in which case this raises
+    AudioDecodeError and callers fall back to a temp file.
+    """
+    if audio_bytes[:4] == b"RIFF":
+        audio = _decode_wav(audio_bytes, sample_rate)
+        if audio is not None:
+            return audio
+    
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+    try:
+        proc = subprocess.run(cmd, input=audio_bytes, capture_output=True)
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg not found on PATH")
+    
+    if proc.returncode != 0 or not proc.stdout:
+        raise AudioDecodeError(
+            f"ffmpeg pipe decode failed: {proc.stderr.decode(errors='ignore')[-300:]}"
+        )
+    
+    return np.frombuffer(proc.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def frame_energy_db(audio: np.ndarray, frame_size: int) -> np.ndarray:
+    """RMS energy per non-overlapping frame, in dBFS."""
+    n_frames = len(audio) // frame_size
+    if n_frames == 0:
+        return np.empty(0, dtype=np.float32)
+    
+    frames = audio[: n_frames * frame_size].reshape(n_frames, frame_size)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def detect_speech_frames(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: int = 30,
+    threshold_db: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Boolean speech/non-speech mask per frame.
+    
+    A frame is speech when it is louder than both the absolute threshold
+    and the estimated noise floor (10th percentile energy) plus a margin,
+    so quiet recordings and noisy rooms both segment sensibly. The floor
+    margin is capped below the peak so audio without pauses still counts.
+    """
+    threshold_db = settings.audio_vad_threshold_db if threshold_db is None else threshold_db
+    frame_size = int(sample_rate * frame_ms / 1000)
+    energy = frame_energy_db(audio, frame_size)
+    if energy.size == 0:
+        return np.zeros(0, dtype=bool)
+    
+    noise_floor = np.percentile(energy, 10)
+    adaptive = min(noise_floor + 6.0, energy.max() - 20.0)
+    return energy > max(threshold_db, adaptive)
+
+
+def split_on_silence(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: int = 30,
+    min_silence_ms: Optional[int] = None,
+    max_chunk_seconds: Optional[float] = None,
+) -> List[AudioChunk]:
+    """
+    Split audio into speech chunks at silences.
+    
+    Cuts are placed in the middle of silent runs of at least
+    min_silence_ms, then adjacent pieces are merged up to
+    max_chunk_seconds (Whisper's 30 s window by default). Pieces longer
+    than the cap are hard-split. Chunks with no speech are dropped.
+    
+    Returns:
+        Chunks in timeline order
+    """
+    min_silence_ms = min_silence_ms or settings.audio_vad_min_silence_ms
+    max_chunk_seconds = max_chunk_seconds or settings.audio_vad_max_chunk_seconds
+    
+    frame_size = int(sample_rate * frame_ms / 1000)
+    speech = detect_speech_frames(audio, sample_rate, frame_ms)
+    if not speech.any():
+        return []
+    
+    # Cut points: centre of each sufficiently long silent run
+    min_silence_frames = max(1, min_silence_ms // frame_ms)
+    cuts = [0]
+    run_start = None
+    for i, is_speech in enumerate(speech):
+        if not is_speech and run_start is None:
+            run_start = i
+        elif is_speech and run_start is not None:
+            if i - run_start >= min_silence_frames:
+                cuts.append((run_start + i) // 2 * frame_size)
+            run_start = None
+    cuts.append(len(audio))
+    
+    # Merge consecutive pieces up to the max chunk length
+    max_samples = int(max_chunk_seconds * sample_rate)
+    bounds = []
+    start = cuts[0]
+    for prev, cut in zip(cuts, cuts[1:]):
+        if cut - start > max_samples and prev > start:
+            bounds.append((start, prev))
+            start = prev
+    bounds.append((start, cuts[-1]))
+    
+    # Hard-split anything still too long (continuous speech)
+    split_bounds = []
+    for s, e in bounds:
+        while e - s > max_samples:
+            split_bounds.append((s, s + max_samples))
+            s += max_samples
+        split_bounds.append((s, e))
+    
+    chunks = []
+    for s, e in split_bounds:
+        first, last = s // frame_size, -(-e // frame_size)
+        if not speech[first:last].any():
+            continue
+        chunks.append(AudioChunk(
+            index=len(chunks),
+            start=s / sample_rate,
+            end=e / sample_rate,
+            samples=audio[s:e],
+        ))
+    
+    logger.debug(
+        f"VAD split {len(audio) / sample_rate:.1f}s audio into {len(chunks)} chunks"
+    )
+    return chunks
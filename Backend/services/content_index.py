@@ -0,0 +1,212 @@
+"""
+Content Index for ContentOS
+
+Reference-counted index behind content-addressed storage. Files are keyed
+by the SHA-256 of their bytes (stored_objects table); uploading bytes that
+are already stored only bumps the reference count, and deleting an upload
+only removes the file once its last reference is gone.
+
+The same hex digest is the moderation cache key, so a duplicate upload can
+reuse an earlier moderation verdict as well as the stored file.
+
+All counter changes are single conditional UPDATEs, so concurrent uploads
+and deletes of the same file don't lose references. Index errors on upload
+are logged and the upload falls back to plain (non-deduplicated) storage;
+on delete they raise ContentIndexError, since a file whose references
+can't be checked must not be removed.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+
+from database import async_session_maker
+from models.stored_object import StoredObject
+
+logger = logging.getLogger(__name__)
+
+
+class ContentIndexError(Exception):
+    """The content index could not be read or updated."""
+    pass
+
+
+def _as_result(obj: StoredObject, deduplicated: bool) -> Dict[str, Any]:
+    """Upload-result dict (same shape as StorageService.upload) for an indexed file."""
+    return {
+        "url": obj.url,
+        "key": obj.key,
+        "provider": obj.provider,
+        "size": obj.size,
+        "sha256": obj.sha256,
+        "content_type": obj.content_type,
+        "deduplicated": deduplicated,
+        "ref_count": obj.ref_count,
+    }
+
+
+class ContentIndex:
+    """
+    SHA-256 -> stored file index with reference counts.
+    """
+
+    def __init__(self):
+        self.dedup_hits = 0
+        self.bytes_saved = 0
+
+    async def acquire(self, sha256: str, uploaded: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Add a reference to an already-stored file.
+
+        uploaded means the caller already transferred its own copy (lost a
+        race with a concurrent upload), so no bytes count as saved.
+
+        Returns:
+            Upload-result dict for the existing file, or None if not stored
+        """
+        try:
+            async with async_session_maker() as session:
+                # ref_count > 0: never revive a file that is being deleted
+                result = await session.execute(
+                    update(StoredObject)
+                    .where(StoredObject.sha256 == sha256, StoredObject.ref_count > 0)
+                    .values(
+                        ref_count=StoredObject.ref_count + 1,
+                        last_referenced_at=datetime.now(timezone.utc),
+                    )
+                )
+                if not result.rowcount:
+                    await session.rollback()
+                    return None
+
+                obj = await session.get(StoredObject, sha256)
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Content index lookup failed: {e}")
+            return None
+
+        self.dedup_hits += 1
+        if not uploaded:
+            self.bytes_saved += obj.size
+        logger.info(f"Deduplicated upload {sha256[:12]} ({obj.size} bytes, refs={obj.ref_count})")
+        return _as_result(obj, deduplicated=True)
+
+    async def register(self, upload_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Record a freshly stored file with one reference.
+
+        If the same content was registered concurrently, the upload (same
+        content-addressed key, same bytes) becomes a reference to it.
+        """
+        obj = StoredObject(
+            sha256=upload_result["sha256"],
+            provider=upload_result["provider"],
+            key=upload_result["key"],
+            url=upload_result["url"],
+            size=upload_result["size"],
+            content_type=upload_result.get("content_type"),
+            ref_count=1,
+        )
+        try:
+            async with async_session_maker() as session:
+                session.add(obj)
+                await session.commit()
+        except IntegrityError:
+            existing = await self.acquire(upload_result["sha256"], uploaded=True)
+            if existing:
+                return existing
+            logger.warning(f"Content index race for {upload_result['sha256'][:12]}; not indexed")
+        except Exception as e:
+            logger.warning(f"Content index write failed: {e}")
+
+        return {**upload_result, "deduplicated": False, "ref_count": 1}
+
+    async def release(self, provider: str, key: str) -> Optional[int]:
+        """
+        Drop one reference to the file stored under provider/key.
+
+        Returns:
+            Remaining references (0 means the caller should delete the
+            file; its index row is already gone), or None if the key isn't
+            content-addressed
+
+        Raises:
+            ContentIndexError: If the index couldn't be consulted
+        """
+        try:
+            async with async_session_maker() as session:
+                sha256 = await session.scalar(
+                    select(StoredObject.sha256).where(
+                        StoredObject.provider == provider,
+                        StoredObject.key == key,
+                    )
+                )
+                if sha256 is None:
+                    return None
+
+                await session.execute(
+                    update(StoredObject)
+                    .where(StoredObject.sha256 == sha256, StoredObject.ref_count > 0)
+                    .values(ref_count=StoredObject.ref_count - 1)
+                )
+                # Only the release that reaches zero removes the row
+                removed = await session.execute(
+                    delete(StoredObject).where(
+                        StoredObject.sha256 == sha256,
+                        StoredObject.ref_count <= 0,
+                    )
+                )
+                remaining = 0 if removed.rowcount else await session.scalar(
+                    select(StoredObject.ref_count).where(StoredObject.sha256 == sha256)
+                )
+                await session.commit()
+                return remaining or 0
+        except Exception as e:
+            logger.error(f"Content index release failed: {e}")
+            raise ContentIndexError(f"Content index release failed: {e}")
+
+    async def report(self) -> Dict[str, Any]:
+        """
+        Storage savings from deduplication.
+
+        logical_bytes is what would be stored without deduplication
+        (size x references); stored_bytes is what is actually stored.
+        bytes_saved_since_start only counts duplicates whose upload was
+        skipped altogether.
+        """
+        async with async_session_maker() as session:
+            row = (await session.execute(
+                select(
+                    func.count(StoredObject.sha256),
+                    func.coalesce(func.sum(StoredObject.ref_count), 0),
+                    func.coalesce(func.sum(StoredObject.size), 0),
+                    func.coalesce(func.sum(StoredObject.size * StoredObject.ref_count), 0),
+                )
+            )).one()
+
+        objects, references, stored_bytes, logical_bytes = (int(v) for v in row)
+        saved_bytes = logical_bytes - stored_bytes
+        return {
+            "objects": objects,
+            "references": references,
+            "stored_bytes": stored_bytes,
+            "logical_bytes": logical_bytes,
+            "saved_bytes": saved_bytes,
+            "savings_ratio": round(saved_bytes / logical_bytes, 4) if logical_bytes else 0.0,
+            "dedup_hits_since_start": self.dedup_hits,
+            "bytes_saved_since_start": self.bytes_saved,
+        }
+
+
+# Singleton instance
+_content_index: Optional[ContentIndex] = None
+
+
+def get_content_index() -> ContentIndex:
+    """Get or create the content index singleton."""
+    global _content_index
+    if _content_index is None:
+        _content_index = ContentIndex()
+    return _content_index
@@ -140,6 +140,10 @@ class DeepModerationService:
         
         import tempfile
         import os
+        from services.image_normalizer import encode_for_cloud
+        
+        # NudeNet resizes to its own input size; a compact JPEG is plenty
+        image_bytes = await asyncio.to_thread(encode_for_cloud, image_bytes)
         
         # Save to temp file (NudeNet requires file path)
         with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as f:
@@ -197,12 +201,14 @@ class DeepModerationService:
         if not self.clip_model or not self.clip_processor:
             raise Exception("CLIP not available")
         
-        import io
-        from PIL import Image
         import torch
+        from config import settings
+        from services.image_normalizer import load_pil_for_analysis
         
-        # Load image
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        # Load downscaled image (CLIP input is 224x224)
+        image = await asyncio.to_thread(
+            load_pil_for_analysis, image_bytes, settings.image_max_side_nsfw
+        )
         
         # Define categories for classification
         safe_prompts = ["a safe image", "a family friendly image", "a normal photo"]
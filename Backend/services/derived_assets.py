@@ -0,0 +1,347 @@
+"""
+Derived Assets for ContentOS
+
+Background rendition pipeline for uploaded images. Each image is decoded
+once, right after upload, and every rendition is encoded from that decode:
+- thumbnail:  small JPEG for previews and lists (IMAGE_THUMBNAIL_SIDE)
+- moderation: EXIF-free JPEG sized for cloud analyzers (IMAGE_MAX_SIDE_CLOUD)
+- display:    WebP copy for the UI (IMAGE_DISPLAY_MAX_SIDE)
+
+Renditions are stored next to the original (same provider, key
+"<original stem>.<rendition>.<ext>") and recorded in the derived_assets
+table under the original's key and URL. Moderation of a stored image
+(scheduling by media URL) and Instagram publishing read the moderation
+copy, and clients get all of them from GET /api/v1/media/derived, so
+later readers fetch a few hundred KB instead of the original.
+
+Work runs on a small pool of asyncio worker tasks fed by a bounded queue;
+decoding/encoding happens off the event loop. Uploads never wait for it,
+and a full queue drops the job (renditions are an optimization, not a
+requirement).
+"""
+import asyncio
+import io
+import logging
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlsplit
+
+from sqlalchemy import select, delete
+
+from config import settings
+from database import async_session_maker
+from models.derived_asset import DerivedAsset
+from services.image_normalizer import ImageNormalizationError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Rendition:
+    """An encoded rendition ready to store."""
+    name: str
+    data: bytes
+    content_type: str
+    suffix: str
+    width: int
+    height: int
+
+
+@dataclass
+class DerivedAssetJob:
+    """Render request for one stored original."""
+    provider: str
+    key: str
+    url: Optional[str] = None  # original's URL, for lookups by URL
+    data: Optional[bytes] = None  # original bytes if still in memory
+
+
+def derived_key(original_key: str, suffix: str) -> str:
+    """Key of a rendition stored next to its original."""
+    path = PurePosixPath(original_key)
+    return str(path.with_name(path.stem + suffix))
+
+
+def _open_upright(image_bytes: bytes, max_side: int):
+    """Open, draft-decode, EXIF-rotate and cap an image with PIL."""
+    from PIL import Image, ImageOps
+    
+    im = Image.open(io.BytesIO(image_bytes))
+    if im.format == "JPEG":
+        im.draft("RGB", (max_side, max_side))
+    im = ImageOps.exif_transpose(im)
+    if max(im.size) > max_side:
+        im.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    return im
+
+
+def _capped(im, max_side: int):
+    """im, or a copy scaled down to max_side."""
+    from PIL import Image
+    
+    if max(im.size) <= max_side:
+        return im
+    im = im.copy()
+    im.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    return im
+
+
+def _encode(im, fmt: str, **options) -> bytes:
+    buffer = io.BytesIO()
+    im.save(buffer, format=fmt, **options)
+    return buffer.getvalue()
+
+
+def render_renditions(image_bytes: bytes) -> List[Rendition]:
+    """
+    Encode every rendition of an image (CPU-bound; run off the loop).
+    
+    Raises:
+        ImageNormalizationError: If the image can't be decoded
+    """
+    from PIL import Image
+    
+    # One decode, at the largest size any rendition needs
+    max_side = max(settings.image_display_max_side, settings.image_max_side_cloud)
+    try:
+        image = _open_upright(image_bytes, max_side)
+    except Exception as e:
+        raise ImageNormalizationError(f"Failed to decode image: {e}")
+    
+    # Keep transparency in the WebP copy; JPEG renditions are flattened
+    has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    
+    display = _capped(image, settings.image_display_max_side)
+    # PIL only writes EXIF when asked to, so the JPEG carries no metadata
+    moderation = _capped(image, settings.image_max_side_cloud).convert("RGB")
+    
+    thumbnail = moderation.copy()
+    thumbnail.thumbnail(
+        (settings.image_thumbnail_side, settings.image_thumbnail_side),
+        Image.Resampling.BICUBIC,
+    )
+    thumbnail = thumbnail.convert("RGB")
+    
+    return [
+        Rendition(
+            name="thumbnail",
+            data=_encode(thumbnail, "JPEG", quality=80, optimize=True),
+            content_type="image/jpeg",
+            suffix=".thumb.jpg",
+            width=thumbnail.width,
+            height=thumbnail.height,
+        ),
+        Rendition(
+            name="moderation",
+            data=_encode(moderation, "JPEG", quality=settings.image_cloud_jpeg_quality, optimize=True),
+            content_type="image/jpeg",
+            suffix=".moderation.jpg",
+            width=moderation.width,
+            height=moderation.height,
+        ),
+        Rendition(
+            name="display",
+            data=_encode(display, "WEBP", quality=settings.image_display_webp_quality, method=4),
+            content_type="image/webp",
+            suffix=".display.webp",
+            width=display.width,
+            height=display.height,
+        ),
+    ]
+
+
+class DerivedAssetWorker:
+    """
+    Queue + asyncio worker tasks that render and store derived assets.
+    """
+    
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+    
+    def start(self) -> None:
+        """Start the worker tasks (idempotent; needs a running loop)."""
+        if self._tasks:
+            return
+        self.queue = asyncio.Queue(maxsize=settings.derived_assets_queue_size)
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"derived-assets-{i}")
+            for i in range(max(1, settings.derived_assets_workers))
+        ]
+        logger.info(f"Derived asset worker started ({len(self._tasks)} tasks)")
+    
+    async def stop(self) -> None:
+        """Cancel the worker tasks; queued jobs are dropped."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.queue = None
+    
+    def enqueue(self, job: DerivedAssetJob) -> bool:
+        """Queue a job without waiting; returns False if it was dropped."""
+        self.start()
+        try:
+            self.queue.put_nowait(job)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Derived asset queue full, skipping {job.provider}/{job.key}")
+            return False
+    
+    async def _run(self) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                await self.process(job)
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Derived assets failed for {job.provider}/{job.key}: {e}")
+            finally:
+                self.queue.task_done()
+    
+    async def process(self, job: DerivedAssetJob) -> List[Dict[str, Any]]:
+        """Render, store and record all renditions of one original."""
+        from services.storage_service import get_storage_service
+        
+        storage = get_storage_service()
+        data = job.data if job.data is not None else await storage.download(job.key, job.provider)
+        renditions = await asyncio.to_thread(render_renditions, data)
+        
+        records = []
+        for rendition in renditions:
+            stored = await storage.store_derived(
+                job.provider,
+                derived_key(job.key, rendition.suffix),
+                rendition.data,
+                rendition.content_type,
+            )
+            records.append(DerivedAsset(
+                provider=job.provider,
+                original_key=job.key,
+                original_url=job.url,
+                rendition=rendition.name,
+                key=stored["key"],
+                url=stored["url"],
+                content_type=rendition.content_type,
+                width=rendition.width,
+                height=rendition.height,
+                size=len(rendition.data),
+            ))
+        
+        async with async_session_maker() as session:
+            await session.execute(
+                delete(DerivedAsset).where(
+                    DerivedAsset.provider == job.provider,
+                    DerivedAsset.original_key == job.key,
+                )
+            )
+            session.add_all(records)
+            await session.commit()
+        
+        logger.info(
+            f"Derived assets for {job.key}: "
+            + ", ".join(f"{r.rendition} {r.width}x{r.height} ({r.size} B)" for r in records)
+        )
+        return [r.to_dict() for r in records]
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._tasks),
+            "queued": self.queue.qsize() if self.queue else 0,
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+async def get_derived_assets(provider: str, original_key: str) -> Dict[str, Dict[str, Any]]:
+    """Recorded renditions of an original, by rendition name."""
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(DerivedAsset).where(
+                DerivedAsset.provider == provider,
+                DerivedAsset.original_key == original_key,
+            )
+        )
+        return {row.rendition: row.to_dict() for row in result.scalars().all()}
+
+
+def _url_forms(url: str) -> List[str]:
+    """A URL as given and as a path (local uploads are recorded as /uploads/...)."""
+    path = urlsplit(url).path
+    return [url, path] if path and path != url else [url]
+
+
+async def find_renditions(urls: List[str], rendition: str) -> Dict[str, Dict[str, Any]]:
+    """
+    A rendition of each stored original among urls, by the URL as given.
+    
+    URLs that aren't our uploads, or whose renditions aren't ready yet,
+    are left out.
+    """
+    forms = {form: url for url in urls for form in _url_forms(url)}
+    if not forms:
+        return {}
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(DerivedAsset).where(
+                DerivedAsset.original_url.in_(list(forms)),
+                DerivedAsset.rendition == rendition,
+            )
+        )
+        return {forms[row.original_url]: row.to_dict() for row in result.scalars().all()}
+
+
+async def rendition_urls(urls: List[str], rendition: str) -> List[str]:
+    """
+    urls with every stored original replaced by its rendition's URL where
+    one exists (all unchanged if the lookup fails).
+    """
+    try:
+        found = await find_renditions(urls, rendition)
+    except Exception as e:
+        logger.warning(f"Rendition lookup failed, using originals: {e}")
+        return list(urls)
+    return [found[url]["url"] if url in found else url for url in urls]
+
+
+async def pop_derived_assets(provider: str, original_key: str) -> List[str]:
+    """Remove the records of an original's renditions; returns their keys."""
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(DerivedAsset.key).where(
+                DerivedAsset.provider == provider,
+                DerivedAsset.original_key == original_key,
+            )
+        )
+        keys = list(result.scalars().all())
+        if keys:
+            await session.execute(
+                delete(DerivedAsset).where(
+                    DerivedAsset.provider == provider,
+                    DerivedAsset.original_key == original_key,
+                )
+            )
+            await session.commit()
+        return keys
+
+
+# Singleton instance
+_derived_asset_worker: Optional[DerivedAssetWorker] = None
+
+
+def get_derived_asset_worker() -> DerivedAssetWorker:
+    """Get or create the derived asset worker singleton."""
+    global _derived_asset_worker
+    if _derived_asset_worker is None:
+        _derived_asset_worker = DerivedAssetWorker()
+    return _derived_asset_worker
@@ -0,0 +1,200 @@
+"""
+Image Normalization for ContentOS
+
+Downscale-before-analyze stage shared by every image analyzer:
+1. Header-only probe of dimensions/format (no pixel decode)
+2. Reduced-resolution JPEG decoding (libjpeg DCT scaling 1/2, 1/4, 1/8)
+3. Longest-side cap per analyzer (OpenCV heuristics, prefilter, NSFW net)
+4. Compact, EXIF-free JPEG re-encode for cloud providers (Rekognition, Gemini)
+
+A 48 MP phone photo decoded at 1/8 scale is ~0.75 MP, so the BGR array
+shrinks from ~150 MB to ~2 MB before any color conversion runs.
+"""
+import io
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ImageNormalizationError(Exception):
+    """Raised when an image cannot be decoded."""
+    pass
+
+
+@dataclass
+class ImageInfo:
+    """Image header information (read without decoding pixels)."""
+    width: int
+    height: int
+    format: Optional[str]
+    has_exif: bool
+
+    @property
+    def longest_side(self) -> int:
+        return max(self.width, self.height)
+
+
+def probe_image(image_bytes: bytes) -> Optional[ImageInfo]:
+    """
+    Read image dimensions and format from the header only.
+
+    PIL opens lazily, so this never allocates the pixel buffer.
+    Returns None if the header can't be parsed.
+    """
+    try:
+        from PIL import Image
+
+        with Image.open(io.BytesIO(image_bytes)) as im:
+            width, height = im.size
+            return ImageInfo(
+                width=width,
+                height=height,
+                format=im.format,
+                has_exif=bool(im.info.get("exif")),
+            )
+    except Exception as e:
+        logger.debug(f"Image probe failed: {e}")
+        return None
+
+
+def _reduction_factor(longest_side: int, max_side: int) -> int:
+    """Largest DCT scale (8, 4, 2) that still keeps the image >= max_side."""
+    for factor in (8, 4, 2):
+        if longest_side // factor >= max_side:
+            return factor
+    return 1
+
+
+def cap_longest_side(img: np.ndarray, max_side: Optional[int]) -> np.ndarray:
+    """Resize a decoded image so its longest side is at most max_side."""
+    if not max_side:
+        return img
+
+    import cv2
+
+    h, w = img.shape[:2]
+    longest = max(h, w)
+    if longest <= max_side:
+        return img
+
+    scale = max_side / longest
+    new_size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    # INTER_AREA averages source pixels, so color ratios are preserved
+    return cv2.resize(img, new_size, interpolation=cv2.INTER_AREA)
+
+
+def decode_for_analysis(image_bytes: bytes, max_side: Optional[int] = None) -> np.ndarray:
+    """
+    Decode image bytes to a BGR array no larger than max_side.
+
+    JPEGs are decoded directly at 1/2, 1/4 or 1/8 resolution when the
+    cap allows it, so the full-resolution array is never materialized.
+
+    Args:
+        image_bytes: Encoded image
+        max_side: Longest side cap in pixels (None = full resolution)
+
+    Returns:
+        BGR uint8 array
+    """
+    import cv2
+
+    flag = cv2.IMREAD_COLOR
+    if max_side:
+        info = probe_image(image_bytes)
+        if info and info.format == "JPEG":
+            factor = _reduction_factor(info.longest_side, max_side)
+            flag = {
+                8: cv2.IMREAD_REDUCED_COLOR_8,
+                4: cv2.IMREAD_REDUCED_COLOR_4,
+                2: cv2.IMREAD_REDUCED_COLOR_2,
+            }.get(factor, cv2.IMREAD_COLOR)
+
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    img = cv2.imdecode(nparr, flag)
+
+    if img is None:
+        raise ImageNormalizationError("Failed to decode image")
+
+    return cap_longest_side(img, max_side)
+
+
+def load_pil_for_analysis(image_bytes: bytes, max_side: Optional[int] = None):
+    """
+    Open image bytes as an upright RGB PIL image no larger than max_side.
+
+    Uses PIL's JPEG draft mode (DCT-domain downscale) before loading.
+    """
+    from PIL import Image, ImageOps
+
+    im = Image.open(io.BytesIO(image_bytes))
+    if max_side and im.format == "JPEG":
+        im.draft("RGB", (max_side, max_side))
+
+    im = ImageOps.exif_transpose(im)
+    if im.mode != "RGB":
+        im = im.convert("RGB")
+
+    if max_side and max(im.size) > max_side:
+        im.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+    return im
+
+
+def encode_for_cloud(
+    image_bytes: bytes,
+    max_side: Optional[int] = None,
+    quality: Optional[int] = None,
+) -> bytes:
+    """
+    Re-encode an image as a compact, EXIF-free JPEG for cloud providers.
+
+    Images that are already small EXIF-free JPEGs are returned untouched,
+    so calling this on already-normalized bytes is just a header probe.
+    On any decode error the original bytes are returned (fail-open).
+
+    Args:
+        image_bytes: Encoded image
+        max_side: Longest side cap (default: IMAGE_MAX_SIDE_CLOUD)
+        quality: JPEG quality (default: IMAGE_CLOUD_JPEG_QUALITY)
+    """
+    max_side = max_side or settings.image_max_side_cloud
+    quality = quality or settings.image_cloud_jpeg_quality
+
+    info = probe_image(image_bytes)
+    if info is None:
+        return image_bytes
+
+    if info.format == "JPEG" and info.longest_side <= max_side and not info.has_exif:
+        return image_bytes
+
+    try:
+        import cv2
+
+        # Reduced decode + INTER_AREA cap; imencode never writes EXIF, so
+        # metadata (GPS, camera serials) is dropped along the way
+        img = decode_for_analysis(image_bytes, max_side)
+        ok, buffer = cv2.imencode(
+            ".jpg",
+            img,
+            [cv2.IMWRITE_JPEG_QUALITY, quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1],
+        )
+        if not ok:
+            raise ImageNormalizationError("JPEG encode failed")
+        encoded = buffer.tobytes()
+
+        logger.debug(
+            f"Normalized image {info.width}x{info.height} {info.format} "
+            f"({len(image_bytes)} B) -> {img.shape[1]}x{img.shape[0]} JPEG ({len(encoded)} B)"
+        )
+        return encoded
+
+    except Exception as e:
+        logger.warning(f"Image re-encode failed, sending original bytes: {e}")
+        return image_bytes
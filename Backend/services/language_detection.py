@@ -0,0 +1,207 @@
+"""
+Language Detection for ContentOS
+
+Single-pass detector for the supported languages:
+1. Unicode script check - each Indic script owns one 128-codepoint block,
+   so native-script text is decided without any model
+2. Transliteration check - inverted word -> language index built once
+   from the romanized hint lists
+3. langdetect fallback - seeded (deterministic) and memoized
+
+Text whose only letters are ASCII and that has no transliteration hits
+is English for our purposes (no other supported language is written in
+Latin script), so langdetect only runs for mixed or non-Indic input.
+"""
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple, Iterable
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Unicode block (codepoint >> 7) -> language for scripts we support
+SCRIPT_BLOCKS = {
+    0x0900 >> 7: "hi",  # Devanagari
+    0x0980 >> 7: "bn",  # Bengali
+    0x0A80 >> 7: "gu",  # Gujarati
+    0x0B00 >> 7: "or",  # Odia
+    0x0B80 >> 7: "ta",  # Tamil
+    0x0C00 >> 7: "te",  # Telugu
+    0x0C80 >> 7: "kn",  # Kannada
+    0x0D00 >> 7: "ml",  # Malayalam
+}
+
+_LATIN_WORD = re.compile(r"[a-z]+")
+
+
+@dataclass(frozen=True)
+class DetectionResult:
+    """
+    Outcome of language detection.
+    
+    Attributes:
+        language: ISO 639-1 code of a supported language
+        is_transliterated: Indian language written in Latin script
+        transliterated_lang: Language of the romanized text (if any)
+        method: "script", "transliteration", "ascii", "langdetect" or "default"
+        confidence: Heuristic confidence in [0, 1]
+    """
+    language: str
+    is_transliterated: bool = False
+    transliterated_lang: Optional[str] = None
+    method: str = "default"
+    confidence: float = 0.5
+
+
+class LanguageDetector:
+    """
+    Precompiled detector; build once and reuse.
+    """
+    
+    def __init__(
+        self,
+        transliteration_hints: Dict[str, Iterable[str]],
+        supported_languages: Iterable[str],
+        min_hint_matches: int = 2,
+        cache_size: Optional[int] = None,
+    ):
+        self.supported = frozenset(supported_languages)
+        self.min_hint_matches = min_hint_matches
+        
+        # Inverted index; a word can hint at several languages (e.g. "nalla")
+        index: Dict[str, List[str]] = {}
+        for lang, words in transliteration_hints.items():
+            for word in words:
+                index.setdefault(word.lower(), []).append(lang)
+        self.word_index: Dict[str, Tuple[str, ...]] = {w: tuple(l) for w, l in index.items()}
+        
+        # Tie-break transliteration matches by hint-list order
+        self._lang_order = {lang: i for i, lang in enumerate(transliteration_hints)}
+        
+        self._langdetect = lru_cache(
+            maxsize=cache_size or settings.language_detect_cache_size
+        )(self._langdetect_uncached)
+        self._seeded = False
+    
+    # ===========================================
+    # Detection steps
+    # ===========================================
+    
+    @staticmethod
+    def script_counts(text: str) -> Tuple[Counter, int, int]:
+        """
+        Count letters per supported Indic script, ASCII letters, and other
+        non-ASCII letters (emoji, symbols and punctuation are ignored).
+        """
+        scripts: Counter = Counter()
+        latin = 0
+        other = 0
+        for ch in text:
+            cp = ord(ch)
+            if cp < 0x80:
+                if ch.isalpha():
+                    latin += 1
+                continue
+            lang = SCRIPT_BLOCKS.get(cp >> 7)
+            if lang:
+                scripts[lang] += 1
+            elif ch.isalpha():
+                other += 1
+        return scripts, latin, other
+    
+    def transliteration_match(self, text: str) -> Tuple[Optional[str], int]:
+        """Best transliterated language and its number of hint-word matches."""
+        counts: Counter = Counter()
+        for word in _LATIN_WORD.findall(text.lower()):
+            for lang in self.word_index.get(word, ()):
+                counts[lang] += 1
+        
+        if not counts:
+            return None, 0
+        
+        lang, matches = min(
+            counts.items(),
+            key=lambda item: (-item[1], self._lang_order.get(item[0], 0)),
+        )
+        if matches < self.min_hint_matches:
+            return None, matches
+        return lang, matches
+    
+    def _langdetect_uncached(self, text: str) -> Tuple[str, float]:
+        from langdetect import DetectorFactory, detect_langs, LangDetectException
+        
+        if not self._seeded:
+            # langdetect samples randomly; a fixed seed makes it deterministic
+            DetectorFactory.seed = 0
+            self._seeded = True
+        
+        try:
+            best = detect_langs(text)[0]
+            if best.lang in self.supported:
+                return best.lang, float(best.prob)
+            return "en", 0.5
+        except LangDetectException:
+            return "en", 0.0
+    
+    # ===========================================
+    # Public API
+    # ===========================================
+    
+    def detect(self, text: str) -> DetectionResult:
+        """
+        Detect language and transliteration in a single pass.
+        
+        Examples:
+        - "నమస్కారం" -> te (script)
+        - "nenu chala bagundi" -> te, transliterated
+        - "Hello world" -> en (ascii)
+        """
+        if not text or not text.strip():
+            return DetectionResult(language="en", confidence=0.0)
+        
+        translit_lang, matches = self.transliteration_match(text)
+        
+        # ASCII-only letters (emoji/symbols allowed) can't be a native script
+        latin_only = text.isascii()
+        if not latin_only:
+            scripts, latin, other = self.script_counts(text)
+            latin_only = not scripts and not other
+            if scripts:
+                lang, count = scripts.most_common(1)[0]
+                total = sum(scripts.values()) + latin
+                # Native script decides unless romanized hints dominate
+                if count >= latin or not translit_lang:
+                    if count / total >= 0.5:
+                        return DetectionResult(
+                            language=lang,
+                            is_transliterated=translit_lang is not None,
+                            transliterated_lang=translit_lang,
+                            method="script",
+                            confidence=round(count / total, 3),
+                        )
+        
+        if translit_lang:
+            return DetectionResult(
+                language=translit_lang,
+                is_transliterated=True,
+                transliterated_lang=translit_lang,
+                method="transliteration",
+                confidence=min(0.95, 0.6 + 0.1 * matches),
+            )
+        
+        if latin_only:
+            return DetectionResult(language="en", method="ascii", confidence=0.7)
+        
+        lang, prob = self._langdetect(" ".join(text.split()))
+        return DetectionResult(
+            language=lang,
+            method="langdetect",
+            confidence=round(prob, 3),
+        )
+    
+    def cache_info(self):
+        return self._langdetect.cache_info()
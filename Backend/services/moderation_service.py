@@ -20,8 +20,9 @@ from datetime import datetime
 
 from config import settings
 from services.llm_service import get_llm_service, AllProvidersFailedError
-from services.vision_service import get_vision_service, VisionError
+from services.vision_service import get_vision_service, VisionError, compute_color_ratios
 from services.speech_service import get_speech_service, SpeechError
+from services.image_normalizer import decode_for_analysis, ImageNormalizationError
 
 logger = logging.getLogger(__name__)
 
@@ -73,28 +74,32 @@ class ModerationResult:
 
 
 class ModerationCache:
-    """Simple in-memory cache for moderation results."""
+    """
+    Simple in-memory cache for moderation results.
+    
+    Keyed by the hex SHA-256 of the content - the same digest
+    content-addressed storage uses.
+    """
     
     def __init__(self, max_size: int = 1000):
-        self.cache: Dict[str, ModerationResult] = {}
+        self.cache: Dict[str, Dict[str, Any]] = {}
         self.max_size = max_size
     
-    def _hash_content(self, content: bytes) -> str:
+    @staticmethod
+    def content_hash(content: bytes) -> str:
         return hashlib.sha256(content).hexdigest()
     
-    def get(self, content: bytes) -> Optional[ModerationResult]:
-        key = self._hash_content(content)
-        return self.cache.get(key)
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        return self.cache.get(content_hash)
     
-    def set(self, content: bytes, result: ModerationResult) -> None:
+    def set(self, content_hash: str, result: Dict[str, Any]) -> None:
         if len(self.cache) >= self.max_size:
             # Simple eviction: clear half
             keys = list(self.cache.keys())[:len(self.cache)//2]
             for k in keys:
                 del self.cache[k]
         
-        key = self._hash_content(content)
-        self.cache[key] = result
+        self.cache[content_hash] = result
 
 
 class ModerationService:
@@ -223,24 +228,14 @@ class ModerationService:
         Fast image prefiltering using color analysis.
         """
         try:
-            import cv2
-            import numpy as np
-            
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if img is None:
+            # Tiny reduced-resolution decode is enough for a color ratio
+            try:
+                img = decode_for_analysis(image_bytes, settings.image_max_side_prefilter)
+            except ImageNormalizationError:
                 return {"risk": "UNKNOWN", "proceed": True}
             
-            hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-            h, w = img.shape[:2]
-            total = h * w
-            
-            # Check skin tone ratio
-            lower_skin = np.array([0, 20, 70], dtype=np.uint8)
-            upper_skin = np.array([20, 255, 255], dtype=np.uint8)
-            skin_mask = cv2.inRange(hsv, lower_skin, upper_skin)
-            skin_ratio = np.sum(skin_mask > 0) / total
+            # Check skin tone ratio (same fused pass as VisionService)
+            skin_ratio = compute_color_ratios(img)["skin_ratio"]
             
             if skin_ratio > 0.5:
                 return {"risk": "HIGH", "reason": "high_skin_ratio", "proceed": True}
@@ -461,13 +456,11 @@ Focus on providing clear, specific reasons rather than numeric scores."""
             
         try:
             import cv2
-            import numpy as np
-            
-            # Decode image
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
             
-            if img is None:
+            # Decode at reduced resolution (network input is 224x224 anyway)
+            try:
+                img = decode_for_analysis(image_bytes, settings.image_max_side_nsfw)
+            except ImageNormalizationError:
                 raise ValueError("Could not decode image")
 
             # Preprocess for Caffe model (Yahoo Open NSFW)
@@ -515,10 +508,12 @@ Focus on providing clear, specific reasons rather than numeric scores."""
             logger.error(f"OpenCV analysis error: {e}")
             raise
 
-    async def analyze_image(self, image_bytes: bytes) -> Dict[str, Any]:
+    async def analyze_image(self, image_bytes: bytes, include_labels: bool = True) -> Dict[str, Any]:
         """
         Analyze image with multiple providers in parallel.
         Returns the most conservative result (lowest safety score).
+        
+        include_labels=False skips content-label detection (moderation only).
         """
         import asyncio
         tasks = []
@@ -535,7 +530,7 @@ Focus on providing clear, specific reasons rather than numeric scores."""
             getattr(self.vision, 'gemini_model', None) is not None
         )
         if vision_has_provider:
-            tasks.append(self.vision.analyze(image_bytes))
+            tasks.append(self.vision.analyze(image_bytes, include_labels=include_labels))
             
         # 3. LocalMod (Include in parallel if available)
         if self.localmod_pipeline:
@@ -602,11 +597,20 @@ Focus on providing clear, specific reasons rather than numeric scores."""
     async def analyze_audio(self, audio_bytes: bytes, filename: str) -> Dict[str, Any]:
         """
         Analyze audio by:
-        1. Transcribing to text
-        2. Analyzing transcript for toxicity
+        1. Splitting on silence and transcribing chunks in parallel
+        2. Analyzing each chunk's transcript as soon as it is ready
+        
+        Stops at the first ESCALATE chunk. If the chunked Whisper path
+        fails, the whole file goes to the non-Whisper providers (Google
+        Speech, then a placeholder) - Whisper is not run a second time.
         """
+        try:
+            return await self._analyze_audio_streaming(audio_bytes, filename)
+        except SpeechError as e:
+            logger.warning(f"Chunked audio analysis failed, trying fallback speech providers: {e}")
+        
         # Transcribe
-        transcript_result = await self.speech.transcribe_bytes(audio_bytes, filename)
+        transcript_result = await self.speech.transcribe_bytes(audio_bytes, filename, whisper=False)
         transcript = transcript_result["text"]
         
         # Analyze transcript
@@ -620,6 +624,69 @@ Focus on providing clear, specific reasons rather than numeric scores."""
             "provider": f"speech:{transcript_result['provider']}+text:{text_result['provider']}",
         }
     
+    async def _analyze_audio_streaming(self, audio_bytes: bytes, filename: str) -> Dict[str, Any]:
+        """Stream VAD chunks from the Whisper pool into analyze_text."""
+        audio = await self.speech.load_audio_bytes(audio_bytes, filename)
+        
+        chunk_results = []
+        short_circuited = False
+        speech_provider = "whisper"
+        text_providers = []
+        
+        stream = self.speech.iter_whisper_chunks(audio)
+        try:
+            async for chunk in stream:
+                speech_provider = chunk["provider"]
+                if not chunk["text"]:
+                    continue
+                
+                text_result = await self.analyze_text(chunk["text"])
+                safety_score = float(text_result.get("safety_score", 100))
+                flags = text_result.get("flags", [])
+                decision = self.make_decision(safety_score, flags)
+                
+                if text_result.get("provider") not in text_providers:
+                    text_providers.append(text_result.get("provider"))
+                chunk_results.append({**chunk, "safety_score": safety_score, "flags": flags, "decision": decision})
+                
+                if decision == ModerationDecision.ESCALATE:
+                    logger.info(
+                        f"Audio chunk {chunk['index']} ({chunk['start']:.1f}s) escalated, "
+                        f"skipping remaining chunks"
+                    )
+                    short_circuited = True
+                    break
+        finally:
+            await stream.aclose()
+        
+        chunk_results.sort(key=lambda c: c["start"])
+        
+        flags = []
+        for c in chunk_results:
+            flags.extend(f for f in c["flags"] if f not in flags)
+        
+        flagged_segments = [
+            {
+                "start": c["start"],
+                "end": c["end"],
+                "text": c["text"],
+                "flags": c["flags"],
+                "safety_score": c["safety_score"],
+            }
+            for c in chunk_results
+            if c["decision"] != ModerationDecision.ALLOW
+        ]
+        
+        return {
+            "transcript": " ".join(c["text"] for c in chunk_results).strip(),
+            "segments": [seg for c in chunk_results for seg in c["segments"]],
+            "safety_score": min((c["safety_score"] for c in chunk_results), default=100),
+            "flags": flags,
+            "flagged_segments": flagged_segments,
+            "short_circuited": short_circuited,
+            "provider": f"speech:{speech_provider}+text:{'/'.join(text_providers) or 'none'}",
+        }
+    
     # ===========================================
     # Tier 3: Decision Engine
     # ===========================================
@@ -682,24 +749,26 @@ Focus on providing clear, specific reasons rather than numeric scores."""
             "prefilter_risk": prefilter.get("risk", "UNKNOWN"),
         }
     
-    async def moderate_image(self, image_bytes: bytes) -> Dict[str, Any]:
-        """Full moderation pipeline for image content."""
+    async def moderate_image(self, image_bytes: bytes, include_labels: bool = True) -> Dict[str, Any]:
+        """
+        Full moderation pipeline for image content.
+        
+        Pass include_labels=False when content labels aren't needed
+        (e.g. per-frame video checks) to skip the label request.
+        """
         start_time = datetime.now()
+        content_hash = self.cache.content_hash(image_bytes)
         
         # Check cache
-        cached = self.cache.get(image_bytes)
+        cached = self.cache.get(content_hash)
         if cached:
-            return {
-                "decision": cached.decision.value,
-                "safety_score": cached.safety_score,
-                "cached": True,
-            }
+            return {**cached, "cached": True, "sha256": content_hash}
         
         # Tier 1: Prefilter
         prefilter = await self.prefilter_image(image_bytes)
         
         # Tier 2: Deep analysis (OpenCV NSFW + AWS Rekognition + LocalMod when available)
-        analysis = await self.analyze_image(image_bytes)
+        analysis = await self.analyze_image(image_bytes, include_labels=include_labels)
         safety_score = float(analysis.get("safety_score", 0))
         # Support both formats: "flags" (list of strings) or "moderation_labels" (list of dicts with "name")
         raw_flags = analysis.get("flags", [])
@@ -726,7 +795,10 @@ Focus on providing clear, specific reasons rather than numeric scores."""
             "prefilter_risk": prefilter.get("risk", "UNKNOWN"),
             "fallback_used": analysis.get("fallback_used", False),
         }
-        return result
+        # Only complete results are cached, so a hit always carries labels
+        if include_labels:
+            self.cache.set(content_hash, result)
+        return {**result, "sha256": content_hash}
     
     async def moderate_audio(
         self,
@@ -747,9 +819,9 @@ Focus on providing clear, specific reasons rather than numeric scores."""
         
         processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
         
-        # Find flagged timestamps
-        flagged_segments = []
-        if analysis.get("flags") and analysis.get("segments"):
+        # Find flagged timestamps (per chunk when the streaming path ran)
+        flagged_segments = analysis.get("flagged_segments", [])
+        if "flagged_segments" not in analysis and analysis.get("flags") and analysis.get("segments"):
             # Simple: flag all segments if content is flagged
             for seg in analysis["segments"]:
                 flagged_segments.append({
@@ -767,6 +839,7 @@ Focus on providing clear, specific reasons rather than numeric scores."""
             "flags": analysis.get("flags", []),
             "transcript": analysis.get("transcript", ""),
             "flagged_segments": flagged_segments,
+            "short_circuited": analysis.get("short_circuited", False),
             "provider": analysis["provider"],
             "processing_time_ms": processing_time,
         }
@@ -7,7 +7,10 @@ import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import Optional, Dict, Any, List
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from services.social.token_store import OAuthToken
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +25,26 @@ class SocialPublishResult:
     error: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
     published_at: Optional[datetime] = None
+    # Failure hints for the scheduler's retry queue
+    retryable: bool = True
+    retry_after: Optional[float] = None  # seconds, from the platform's Retry-After
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
 
 
 class BaseSocialProvider(ABC):
@@ -79,13 +102,72 @@ class BaseSocialProvider(ABC):
         """
         pass
     
+    async def publish_once(
+        self,
+        user_id: int,
+        content: str,
+        idempotency_key: Optional[str] = None,
+        **kwargs
+    ) -> SocialPublishResult:
+        """
+        publish() at most once per idempotency key.
+        
+        A key that was already published is answered from its receipt
+        without calling the platform; a successful publish records one.
+        Without a key this is a plain publish().
+        """
+        if not idempotency_key:
+            return await self.publish(user_id, content, **kwargs)
+        
+        from services.social.publish_receipts import find_receipt, save_receipt
+        
+        previous = await find_receipt(self.platform_name, idempotency_key)
+        if previous is not None:
+            logger.info(f"{self.platform_name}: {idempotency_key} already published as {previous.post_id}")
+            return previous
+        
+        result = await self.publish(user_id, content, **kwargs)
+        if result.success:
+            await save_receipt(idempotency_key, user_id, result)
+        return result
+    
+    def api_calls_needed(self, media_urls: Optional[List[str]] = None) -> int:
+        """
+        Most API requests one publish can make; the rate governor keeps
+        this much of a call budget free before letting a publish start.
+        Override when a publish takes more than one request.
+        """
+        return 1
+    
     @abstractmethod
     async def disconnect(self, user_id: int) -> bool:
         """Disconnect/revoke user's account connection."""
         pass
     
-    async def refresh_token(self, user_id: int) -> bool:
-        """Refresh OAuth token if expired. Override in subclass."""
+    def _http_failure(self, response) -> SocialPublishResult:
+        """
+        Failed-publish result for an HTTP error response.
+        
+        Rate limits (429), timeouts (408) and server errors (5xx) are
+        retryable; the platform's Retry-After is passed on.
+        """
+        status = response.status_code
+        return SocialPublishResult(
+            success=False,
+            platform=self.platform_name,
+            error=response.text,
+            metadata={"status_code": status},
+            retryable=status in (408, 429) or status >= 500,
+            retry_after=parse_retry_after(response.headers.get("retry-after")),
+        )
+    
+    async def refresh_token(self, user_id: int, token: Optional[OAuthToken] = None) -> bool:
+        """
+        Refresh OAuth token if expired. Override in subclass.
+        
+        token is the stored token when the caller already loaded it
+        (possibly expired); otherwise it is looked up.
+        """
         return False
     
     def get_status(self) -> Dict[str, Any]:
@@ -6,17 +6,26 @@ Requires Instagram Business/Creator account linked to Facebook Page.
 
 Note: Instagram API is complex - requires Facebook Business account.
 This implementation includes demo mode for easy testing.
+
+Publishing: the business account id is resolved once at connect time and
+kept on the stored token (re-resolved only if the Graph API reports it
+unknown). Media containers are polled until processed before
+media_publish, and carousel item containers are created concurrently.
 """
+import asyncio
 import logging
 import secrets
+import time
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from urllib.parse import urlencode
 
 import httpx
 
 from config import settings
 from .base import BaseSocialProvider, SocialPublishResult
+from .token_store import OAuthToken, get_token_store, expires_in
+from .rate_governor import get_rate_governor
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +47,14 @@ class InstagramService(BaseSocialProvider):
     TOKEN_URL = "https://graph.facebook.com/v18.0/oauth/access_token"
     API_BASE = "https://graph.facebook.com/v18.0"
     
+    # Carousel limits and container polling
+    CAROUSEL_MAX_ITEMS = 10
+    CONTAINER_POLL_MAX_INTERVAL = 10.0
+    VIDEO_EXTENSIONS = (".mp4", ".mov", ".m4v")
+    
+    # Graph API error code for an unknown / inaccessible object
+    GRAPH_UNKNOWN_OBJECT = 100
+    
     # OAuth scopes
     SCOPES = [
         "instagram_basic",
@@ -52,8 +69,8 @@ class InstagramService(BaseSocialProvider):
         self.redirect_uri = getattr(settings, 'instagram_redirect_uri',
                                     'http://localhost:8000/api/v1/social/instagram/callback')
         
-        # In-memory token storage (replace with database in production)
-        self._tokens: Dict[int, Dict[str, Any]] = {}
+        # Tokens persist in social_accounts (cached per worker)
+        self._token_store = get_token_store()
         self._states: Dict[str, int] = {}  # state -> user_id
         
         if self.app_id:
@@ -63,7 +80,8 @@ class InstagramService(BaseSocialProvider):
         return bool(self.app_id and self.app_secret)
     
     async def is_authenticated(self, user_id: int) -> bool:
-        return user_id in self._tokens and self._tokens[user_id].get('access_token')
+        token = await self._token_store.get(self.platform_name, user_id)
+        return bool(token and token.access_token)
     
     async def get_auth_url(self, user_id: int, redirect_uri: Optional[str] = None) -> str:
         """Get Facebook OAuth URL for Instagram access."""
@@ -124,8 +142,10 @@ class InstagramService(BaseSocialProvider):
                 if long_response.status_code == 200:
                     long_data = long_response.json()
                     access_token = long_data["access_token"]
+                    expires_at = expires_in(long_data.get("expires_in"))
                 else:
                     access_token = short_token
+                    expires_at = expires_in(data.get("expires_in"))
                 
                 # Get Instagram Business Account ID
                 ig_account_id = await self._get_instagram_account_id(client, access_token)
@@ -134,10 +154,13 @@ class InstagramService(BaseSocialProvider):
                     return {"success": False, "error": "No Instagram Business account found"}
                 
                 # Store tokens
-                self._tokens[user_id] = {
-                    "access_token": access_token,
-                    "instagram_account_id": ig_account_id,
-                }
+                await self._token_store.save(OAuthToken(
+                    user_id=user_id,
+                    platform=self.platform_name,
+                    access_token=access_token,
+                    expires_at=expires_at,
+                    platform_user_id=ig_account_id,
+                ))
                 
                 logger.info(f"Instagram connected for user {user_id}")
                 return {"success": True, "message": "Instagram connected successfully"}
@@ -153,34 +176,21 @@ class InstagramService(BaseSocialProvider):
     ) -> Optional[str]:
         """Get the Instagram Business Account ID linked to user's Facebook pages."""
         try:
-            # Get user's pages
+            # One call: the pages listing can include each page's linked account
             pages_response = await client.get(
                 f"{self.API_BASE}/me/accounts",
-                params={"access_token": access_token}
+                params={
+                    "fields": "id,instagram_business_account",
+                    "access_token": access_token,
+                }
             )
             
             if pages_response.status_code != 200:
                 return None
             
-            pages = pages_response.json().get("data", [])
-            
-            # Check each page for linked Instagram account
-            for page in pages:
-                page_id = page["id"]
-                page_token = page["access_token"]
-                
-                ig_response = await client.get(
-                    f"{self.API_BASE}/{page_id}",
-                    params={
-                        "fields": "instagram_business_account",
-                        "access_token": page_token,
-                    }
-                )
-                
-                if ig_response.status_code == 200:
-                    ig_data = ig_response.json()
-                    if "instagram_business_account" in ig_data:
-                        return ig_data["instagram_business_account"]["id"]
+            for page in pages_response.json().get("data", []):
+                if "instagram_business_account" in page:
+                    return page["instagram_business_account"]["id"]
             
             return None
             
@@ -188,6 +198,182 @@ class InstagramService(BaseSocialProvider):
             logger.error(f"Error getting Instagram account ID: {e}")
             return None
     
+    async def _account_id(
+        self,
+        client: httpx.AsyncClient,
+        token: OAuthToken,
+        refresh: bool = False,
+    ) -> Optional[str]:
+        """
+        Business account id for a user, cached on the stored token.
+        
+        Looked up through the Graph API only when missing or when refresh
+        is set (the cached id was rejected); a changed id is saved.
+        """
+        if token.platform_user_id and not refresh:
+            return token.platform_user_id
+        
+        account_id = await self._get_instagram_account_id(client, token.access_token)
+        if account_id and account_id != token.platform_user_id:
+            token.platform_user_id = account_id
+            await self._token_store.save(token)
+        return account_id
+    
+    def _polls_per_container(self) -> int:
+        """Most status checks _wait_for_container makes before giving up."""
+        polls, elapsed = 1, 0.0
+        delay = max(0.1, settings.instagram_container_poll_interval)
+        while elapsed + delay <= settings.instagram_container_timeout:
+            elapsed += delay
+            polls += 1
+            delay = min(delay * 2, self.CONTAINER_POLL_MAX_INTERVAL)
+        return polls
+    
+    def api_calls_needed(self, media_urls: Optional[List[str]] = None) -> int:
+        """
+        Graph calls one publish can make: the account lookup and the
+        publish, plus a create and every status poll up to
+        INSTAGRAM_CONTAINER_TIMEOUT for each container (every carousel
+        item and the carousel itself).
+        """
+        if not media_urls:
+            return 0  # demo post, no Graph calls
+        items = min(len(media_urls), self.CAROUSEL_MAX_ITEMS)
+        containers = items + 1 if items > 1 else 1
+        return 2 + containers * (1 + self._polls_per_container())
+    
+    def _graph_failure(self, response: httpx.Response) -> SocialPublishResult:
+        """HTTP failure result, tagged with the Graph API error code."""
+        result = self._http_failure(response)
+        try:
+            result.metadata["graph_error_code"] = response.json().get("error", {}).get("code")
+        except ValueError:
+            pass
+        return result
+    
+    def _media_params(self, media_url: str, carousel_item: bool) -> Dict[str, str]:
+        if media_url.lower().split("?", 1)[0].endswith(self.VIDEO_EXTENSIONS):
+            params = {"media_type": "VIDEO" if carousel_item else "REELS", "video_url": media_url}
+        else:
+            params = {"image_url": media_url}
+        if carousel_item:
+            params["is_carousel_item"] = "true"
+        return params
+    
+    async def _wait_for_container(
+        self,
+        client: httpx.AsyncClient,
+        container_id: str,
+        access_token: str,
+    ) -> Optional[SocialPublishResult]:
+        """
+        Poll a media container until it is processed.
+        
+        Polls back off exponentially from INSTAGRAM_CONTAINER_POLL_INTERVAL
+        (sleeping, not blocking other publishes).
+        
+        Returns:
+            None when the container is ready, otherwise a failed result
+        """
+        deadline = time.monotonic() + settings.instagram_container_timeout
+        delay = settings.instagram_container_poll_interval
+        
+        while True:
+            response = await client.get(
+                f"{self.API_BASE}/{container_id}",
+                params={"fields": "status_code,status", "access_token": access_token},
+            )
+            if response.status_code != 200:
+                return self._graph_failure(response)
+            
+            data = response.json()
+            status = data.get("status_code")
+            if status in ("FINISHED", "PUBLISHED"):
+                return None
+            if status == "ERROR":
+                # The media itself was rejected; retrying won't help
+                return SocialPublishResult(
+                    success=False,
+                    platform=self.platform_name,
+                    error=f"Instagram could not process the media: {data.get('status')}",
+                    retryable=False,
+                )
+            if status == "EXPIRED":
+                return SocialPublishResult(
+                    success=False,
+                    platform=self.platform_name,
+                    error="Instagram media container expired before publishing",
+                )
+            
+            if time.monotonic() + delay > deadline:
+                return SocialPublishResult(
+                    success=False,
+                    platform=self.platform_name,
+                    error=f"Instagram media container {container_id} still {status} "
+                          f"after {settings.instagram_container_timeout}s",
+                )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.CONTAINER_POLL_MAX_INTERVAL)
+    
+    async def _create_container(
+        self,
+        client: httpx.AsyncClient,
+        account_id: str,
+        access_token: str,
+        params: Dict[str, str],
+    ) -> Tuple[Optional[str], Optional[SocialPublishResult]]:
+        """Create a media container and wait until it is processed."""
+        response = await client.post(
+            f"{self.API_BASE}/{account_id}/media",
+            data={**params, "access_token": access_token},
+        )
+        if response.status_code != 200:
+            logger.error(f"Media container creation failed: {response.text}")
+            return None, self._graph_failure(response)
+        
+        container_id = response.json()["id"]
+        failure = await self._wait_for_container(client, container_id, access_token)
+        return (None, failure) if failure else (container_id, None)
+    
+    async def _build_container(
+        self,
+        client: httpx.AsyncClient,
+        account_id: str,
+        access_token: str,
+        media_urls: List[str],
+        caption: str,
+    ) -> Tuple[Optional[str], Optional[SocialPublishResult]]:
+        """
+        Create the container to publish: a single media container, or a
+        carousel whose item containers are created (and processed)
+        concurrently.
+        """
+        if len(media_urls) == 1:
+            return await self._create_container(
+                client, account_id, access_token,
+                {**self._media_params(media_urls[0], carousel_item=False), "caption": caption},
+            )
+        
+        items = await asyncio.gather(*(
+            self._create_container(
+                client, account_id, access_token,
+                self._media_params(url, carousel_item=True),
+            )
+            for url in media_urls[:self.CAROUSEL_MAX_ITEMS]
+        ))
+        for _, failure in items:
+            if failure:
+                return None, failure
+        
+        return await self._create_container(
+            client, account_id, access_token,
+            {
+                "media_type": "CAROUSEL",
+                "children": ",".join(container_id for container_id, _ in items),
+                "caption": caption,
+            },
+        )
+    
     async def publish(
         self,
         user_id: int,
@@ -198,6 +384,9 @@ class InstagramService(BaseSocialProvider):
         """
         Publish to Instagram.
         
+        One media URL makes a single image/Reel post; several (up to 10)
+        make a carousel.
+        
         Note: Instagram requires media for posts. Text-only posts are not supported.
         If no media is provided, uses demo mode.
         """
@@ -212,11 +401,13 @@ class InstagramService(BaseSocialProvider):
                 published_at=datetime.now(timezone.utc),
             )
         
-        if not await self.is_authenticated(user_id):
+        token = await self._token_store.get(self.platform_name, user_id)
+        if not token:
             return SocialPublishResult(
                 success=False,
                 platform=self.platform_name,
                 error="User not authenticated with Instagram",
+                retryable=False,
             )
         
         if not media_urls:
@@ -229,33 +420,41 @@ class InstagramService(BaseSocialProvider):
                 published_at=datetime.now(timezone.utc),
             )
         
+        # Images we stored have a moderation rendition: a capped, EXIF-free
+        # JPEG (the format Graph takes for images), much smaller to fetch
+        from services.derived_assets import rendition_urls
+        media_urls = await rendition_urls(media_urls, "moderation")
+        
         try:
-            token_data = self._tokens[user_id]
-            access_token = token_data["access_token"]
-            ig_account_id = token_data["instagram_account_id"]
+            access_token = token.access_token
+            caption = content[:2200]  # Instagram caption limit
             
-            async with httpx.AsyncClient() as client:
-                # Step 1: Create media container
-                media_url = media_urls[0]  # Use first media
-                
-                container_response = await client.post(
-                    f"{self.API_BASE}/{ig_account_id}/media",
-                    data={
-                        "image_url": media_url,
-                        "caption": content[:2200],  # Instagram caption limit
-                        "access_token": access_token,
-                    }
-                )
-                
-                if container_response.status_code != 200:
-                    logger.error(f"Media container creation failed: {container_response.text}")
+            # Every Graph request counts against the account's call budget
+            hooks = get_rate_governor().http_hooks(self.platform_name, user_id)
+            async with httpx.AsyncClient(event_hooks=hooks) as client:
+                ig_account_id = await self._account_id(client, token)
+                if not ig_account_id:
                     return SocialPublishResult(
                         success=False,
                         platform=self.platform_name,
-                        error=container_response.text,
+                        error="No Instagram Business account found",
+                        retryable=False,
                     )
                 
-                container_id = container_response.json()["id"]
+                # Step 1: Create (and wait for) the media container
+                container_id, failure = await self._build_container(
+                    client, ig_account_id, access_token, media_urls, caption,
+                )
+                if failure and failure.metadata.get("graph_error_code") == self.GRAPH_UNKNOWN_OBJECT:
+                    # Cached account id no longer valid (unlinked / replaced)
+                    fresh_id = await self._account_id(client, token, refresh=True)
+                    if fresh_id and fresh_id != ig_account_id:
+                        ig_account_id = fresh_id
+                        container_id, failure = await self._build_container(
+                            client, ig_account_id, access_token, media_urls, caption,
+                        )
+                if failure:
+                    return failure
                 
                 # Step 2: Publish the container
                 publish_response = await client.post(
@@ -268,11 +467,7 @@ class InstagramService(BaseSocialProvider):
                 
                 if publish_response.status_code != 200:
                     logger.error(f"Media publish failed: {publish_response.text}")
-                    return SocialPublishResult(
-                        success=False,
-                        platform=self.platform_name,
-                        error=publish_response.text,
-                    )
+                    return self._graph_failure(publish_response)
                 
                 post_id = publish_response.json()["id"]
                 
@@ -294,11 +489,43 @@ class InstagramService(BaseSocialProvider):
     
     async def disconnect(self, user_id: int) -> bool:
         """Disconnect user's Instagram account."""
-        if user_id in self._tokens:
-            del self._tokens[user_id]
+        if await self._token_store.delete(self.platform_name, user_id):
             logger.info(f"Instagram disconnected for user {user_id}")
             return True
         return False
+    
+    async def refresh_token(self, user_id: int, token: Optional[OAuthToken] = None) -> bool:
+        """
+        Renew a long-lived token before it expires.
+        
+        Facebook has no refresh tokens; a still-valid long-lived token is
+        exchanged for a new one (fb_exchange_token). An expired one can't
+        be, so the user has to reconnect.
+        """
+        token = token or await self._token_store.get(self.platform_name, user_id)
+        if not token or token.is_expired() or not self.is_configured():
+            return False
+        
+        async with httpx.AsyncClient() as client:
+            response = await client.get(
+                f"{self.API_BASE}/oauth/access_token",
+                params={
+                    "grant_type": "fb_exchange_token",
+                    "client_id": self.app_id,
+                    "client_secret": self.app_secret,
+                    "fb_exchange_token": token.access_token,
+                }
+            )
+        
+        if response.status_code != 200:
+            logger.warning(f"Instagram token refresh failed for user {user_id}: {response.text}")
+            return False
+        
+        data = response.json()
+        token.access_token = data["access_token"]
+        token.expires_at = expires_in(data.get("expires_in"))
+        await self._token_store.save(token)
+        return True
 
 
 # Singleton instance
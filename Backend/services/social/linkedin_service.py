@@ -18,6 +18,7 @@ import httpx
 
 from config import settings
 from .base import BaseSocialProvider, SocialPublishResult
+from .token_store import OAuthToken, get_token_store, expires_in
 
 logger = logging.getLogger(__name__)
 
@@ -48,8 +49,8 @@ class LinkedInService(BaseSocialProvider):
         self.redirect_uri = getattr(settings, 'linkedin_redirect_uri',
                                     'http://localhost:8000/api/v1/social/linkedin/callback')
         
-        # Token storage (replace with database in production)
-        self._tokens: Dict[int, Dict[str, Any]] = {}
+        # Tokens persist in social_accounts (cached per worker)
+        self._token_store = get_token_store()
         self._states: Dict[str, int] = {}
         
         if self.client_id:
@@ -59,7 +60,8 @@ class LinkedInService(BaseSocialProvider):
         return bool(self.client_id and self.client_secret)
     
     async def is_authenticated(self, user_id: int) -> bool:
-        return user_id in self._tokens and self._tokens[user_id].get('access_token')
+        token = await self._token_store.get(self.platform_name, user_id)
+        return bool(token and token.access_token)
     
     async def get_auth_url(self, user_id: int, redirect_uri: Optional[str] = None) -> str:
         """Get LinkedIn OAuth URL."""
@@ -118,11 +120,14 @@ class LinkedInService(BaseSocialProvider):
                     person_urn = f"urn:li:person:{profile.get('sub')}"
                 
                 # Store tokens
-                self._tokens[user_id] = {
-                    "access_token": tokens["access_token"],
-                    "expires_in": tokens.get("expires_in"),
-                    "person_urn": person_urn,
-                }
+                await self._token_store.save(OAuthToken(
+                    user_id=user_id,
+                    platform=self.platform_name,
+                    access_token=tokens["access_token"],
+                    refresh_token=tokens.get("refresh_token"),
+                    expires_at=expires_in(tokens.get("expires_in")),
+                    platform_user_id=person_urn,
+                ))
                 
                 logger.info(f"LinkedIn connected for user {user_id}")
                 return {"success": True, "message": "LinkedIn connected successfully"}
@@ -154,23 +159,25 @@ class LinkedInService(BaseSocialProvider):
                 published_at=datetime.now(timezone.utc),
             )
         
-        if not await self.is_authenticated(user_id):
+        token = await self._token_store.get(self.platform_name, user_id)
+        if not token:
             return SocialPublishResult(
                 success=False,
                 platform=self.platform_name,
                 error="User not authenticated with LinkedIn",
+                retryable=False,
             )
         
         try:
-            token_data = self._tokens[user_id]
-            access_token = token_data["access_token"]
-            person_urn = token_data.get("person_urn")
+            access_token = token.access_token
+            person_urn = token.platform_user_id
             
             if not person_urn:
                 return SocialPublishResult(
                     success=False,
                     platform=self.platform_name,
                     error="LinkedIn user URN not found",
+                    retryable=False,
                 )
             
             async with httpx.AsyncClient() as client:
@@ -203,11 +210,7 @@ class LinkedInService(BaseSocialProvider):
                 
                 if response.status_code not in [200, 201]:
                     logger.error(f"LinkedIn post failed: {response.text}")
-                    return SocialPublishResult(
-                        success=False,
-                        platform=self.platform_name,
-                        error=response.text,
-                    )
+                    return self._http_failure(response)
                 
                 data = response.json()
                 post_id = data.get("id", "unknown")
@@ -230,11 +233,45 @@ class LinkedInService(BaseSocialProvider):
     
     async def disconnect(self, user_id: int) -> bool:
         """Disconnect user's LinkedIn account."""
-        if user_id in self._tokens:
-            del self._tokens[user_id]
+        if await self._token_store.delete(self.platform_name, user_id):
             logger.info(f"LinkedIn disconnected for user {user_id}")
             return True
         return False
+    
+    async def refresh_token(self, user_id: int, token: Optional[OAuthToken] = None) -> bool:
+        """
+        Renew the access token with the stored refresh token.
+        
+        Works after the access token expired too, as long as the refresh
+        token is still valid. Only apps with programmatic refresh enabled
+        get refresh tokens; without one the user has to reconnect.
+        """
+        token = token or await self._token_store.get(self.platform_name, user_id, include_expired=True)
+        if not token or not token.refresh_token or not self.is_configured():
+            return False
+        
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                self.TOKEN_URL,
+                data={
+                    "grant_type": "refresh_token",
+                    "refresh_token": token.refresh_token,
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                },
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+            )
+        
+        if response.status_code != 200:
+            logger.warning(f"LinkedIn token refresh failed for user {user_id}: {response.text}")
+            return False
+        
+        data = response.json()
+        token.access_token = data["access_token"]
+        token.refresh_token = data.get("refresh_token", token.refresh_token)
+        token.expires_at = expires_in(data.get("expires_in"))
+        await self._token_store.save(token)
+        return True
 
 
 # Singleton instance
@@ -0,0 +1,79 @@
+"""
+Publish Receipts for ContentOS
+
+At-most-once publishing per idempotency key. Scheduled posts carry a
+stable idempotency_key across every attempt, but the platforms don't
+accept one, so providers check here before calling the platform: a key
+that already has a receipt is answered with the recorded post instead of
+a second post. Receipts are written as soon as the platform accepts a post
+(not with the batched status write), so a claim lost after a successful
+publish doesn't lead to a duplicate when the post is reclaimed.
+
+Receipts are kept RECEIPT_TTL_DAYS, far longer than any retry schedule.
+"""
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+
+from database import async_session_maker
+from models.publish_receipt import PublishReceipt
+from services.social.base import SocialPublishResult
+
+logger = logging.getLogger(__name__)
+
+# How long receipts are kept
+RECEIPT_TTL_DAYS = 30
+
+
+async def find_receipt(platform: str, idempotency_key: str) -> Optional[SocialPublishResult]:
+    """The recorded publish for a key, or None if it was never published."""
+    async with async_session_maker() as session:
+        receipt = await session.get(PublishReceipt, idempotency_key)
+    if receipt is None or receipt.platform != platform:
+        return None
+    return SocialPublishResult(
+        success=True,
+        platform=platform,
+        post_id=receipt.post_id,
+        post_url=receipt.post_url,
+        metadata={"idempotent_replay": True},
+        published_at=receipt.published_at,
+    )
+
+
+async def save_receipt(idempotency_key: str, user_id: int, result: SocialPublishResult) -> None:
+    """
+    Record a successful publish under its key.
+    
+    Never raises: the post is already live, so a failed write is only
+    logged (a later duplicate is then possible, as without receipts).
+    """
+    try:
+        async with async_session_maker() as session:
+            session.add(PublishReceipt(
+                idempotency_key=idempotency_key,
+                platform=result.platform,
+                user_id=user_id,
+                post_id=result.post_id,
+                post_url=result.post_url,
+                published_at=result.published_at or datetime.now(timezone.utc),
+            ))
+            await session.commit()
+    except IntegrityError:
+        logger.warning(f"Publish receipt for {idempotency_key} already recorded")
+    except Exception as e:
+        logger.error(f"Failed to record publish receipt for {idempotency_key}: {e}")
+
+
+async def prune_receipts() -> int:
+    """Delete receipts older than RECEIPT_TTL_DAYS; returns how many."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=RECEIPT_TTL_DAYS)
+    async with async_session_maker() as session:
+        result = await session.execute(
+            delete(PublishReceipt).where(PublishReceipt.published_at < cutoff)
+        )
+        await session.commit()
+    return result.rowcount or 0
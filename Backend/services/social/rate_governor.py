@@ -0,0 +1,375 @@
+"""
+Outbound Rate Governor for ContentOS
+
+Tracks per-account, per-platform quotas (SOCIAL_RATE_LIMITS) over rolling
+windows - e.g. Instagram's 25 published posts per 24 hours per account and
+its Graph API call budget - so publishes are held back before a platform
+answers 429, instead of failing.
+
+Every counted action (a publish, an API call) is a row in
+social_quota_events. Each worker keeps the recent events of the accounts it
+publishes for in memory: checks cost no database round trip, new events
+are written in batches (SOCIAL_RATE_FLUSH_MS), and an account's events are
+re-read at most every SOCIAL_RATE_SYNC_SECONDS to pick up other workers'.
+
+acquire() reserves a slot or says how long until one frees up; the
+scheduler uses that to requeue the post for the earliest possible time.
+A 429 from a platform blocks the account until its Retry-After.
+"""
+import asyncio
+import bisect
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple
+
+from sqlalchemy import select, delete, insert, and_, or_
+
+from config import settings
+from database import async_session_maker
+from models.quota_event import QuotaEvent
+from services.social.base import SocialPublishResult
+
+logger = logging.getLogger(__name__)
+
+# Block after a 429 that carries no Retry-After (seconds)
+DEFAULT_BLOCK_SECONDS = 60
+
+# (platform, user_id, kind)
+AccountKey = Tuple[str, int, str]
+
+
+@dataclass
+class Reservation:
+    """A counted action that can be given back (e.g. the publish failed)."""
+    platform: str
+    user_id: int
+    kind: str
+    at: datetime
+
+
+class RateGovernor:
+    """
+    Rolling-window quota tracker for outbound social API traffic.
+    """
+    
+    def __init__(self, rules: Optional[Dict[str, Dict[str, List[Tuple[int, int]]]]] = None):
+        self.rules = settings.social_rate_limit_rules if rules is None else rules
+        self.flush_delay = max(0, settings.social_rate_flush_ms) / 1000
+        self.sync_seconds = settings.social_rate_sync_seconds
+        
+        # Event timestamps (ascending) of each account within its longest window
+        self._events: Dict[AccountKey, List[float]] = {}
+        self._synced_at: Dict[AccountKey, float] = {}
+        self._locks: Dict[AccountKey, asyncio.Lock] = {}
+        
+        # (platform, user_id) -> blocked until (after a 429)
+        self._blocked_until: Dict[Tuple[str, int], float] = {}
+        
+        # Buffered writes: ("add" | "remove", Reservation)
+        self._buffer: List[Tuple[str, Reservation]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_lock = asyncio.Lock()
+        self._tasks: set = set()
+        
+        self.granted = 0
+        self.deferred = 0
+        self.released = 0
+        self.blocks = 0
+    
+    def _longest_window(self, platform: str, kind: str) -> int:
+        return max((window for _, window in self.rules.get(platform, {}).get(kind, [])), default=0)
+    
+    # ===========================================
+    # Persistence
+    # ===========================================
+    
+    def _persist(self, op: str, reservation: Reservation) -> None:
+        """Buffer a write; flushed after SOCIAL_RATE_FLUSH_MS."""
+        self._buffer.append((op, reservation))
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_delay, self._flush_soon)
+    
+    def _flush_soon(self) -> None:
+        self._flush_handle = None
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def flush(self) -> None:
+        """Write buffered events (inserts, then removals) in one transaction."""
+        async with self._flush_lock:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            ops, self._buffer = self._buffer, []
+            if not ops:
+                return
+            
+            added = [r for op, r in ops if op == "add"]
+            removed = [r for op, r in ops if op == "remove"]
+            try:
+                async with async_session_maker() as session:
+                    if added:
+                        await session.execute(insert(QuotaEvent), [
+                            {"user_id": r.user_id, "platform": r.platform, "kind": r.kind, "occurred_at": r.at}
+                            for r in added
+                        ])
+                    if removed:
+                        await session.execute(
+                            delete(QuotaEvent).where(or_(*(
+                                and_(
+                                    QuotaEvent.platform == r.platform,
+                                    QuotaEvent.user_id == r.user_id,
+                                    QuotaEvent.kind == r.kind,
+                                    QuotaEvent.occurred_at == r.at,
+                                )
+                                for r in removed
+                            )))
+                        )
+                    await session.commit()
+            except Exception as e:
+                # Keep them for the next flush; in-memory counts stay correct
+                logger.warning(f"Failed to save {len(ops)} quota events: {e}")
+                self._buffer[:0] = ops
+    
+    async def drain(self) -> None:
+        """Write everything buffered and wait for running flushes."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        await self.flush()
+    
+    async def _sync(self, key: AccountKey) -> List[float]:
+        """Account events, re-read from the database when stale."""
+        now = time.time()
+        if key in self._events and now - self._synced_at[key] < self.sync_seconds:
+            return self._events[key]
+        
+        platform, user_id, kind = key
+        since = datetime.fromtimestamp(now - self._longest_window(platform, kind), timezone.utc)
+        
+        # Our own buffered events must be in the database before re-reading
+        await self.flush()
+        try:
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(QuotaEvent.occurred_at)
+                    .where(
+                        QuotaEvent.platform == platform,
+                        QuotaEvent.user_id == user_id,
+                        QuotaEvent.kind == kind,
+                        QuotaEvent.occurred_at >= since,
+                    )
+                    .order_by(QuotaEvent.occurred_at)
+                )
+                events = [_timestamp(at) for at in result.scalars().all()]
+        except Exception as e:
+            logger.warning(f"Quota lookup failed for {platform} user {user_id}: {e}")
+            events = self._events.get(key, [])
+        
+        self._events[key] = events
+        self._synced_at[key] = now
+        return events
+    
+    # ===========================================
+    # Quota checks
+    # ===========================================
+    
+    def _wait(self, platform: str, kind: str, events: List[float], needed: int, now: float) -> float:
+        """
+        Seconds until `needed` more events fit in every window of a kind
+        (a need larger than a limit waits for that window to empty).
+        """
+        wait = 0.0
+        for limit, window in self.rules.get(platform, {}).get(kind, []):
+            recent = events[bisect.bisect_right(events, now - window):]
+            excess = len(recent) + min(needed, limit) - limit
+            if excess > 0:
+                # The excess-th oldest event in the window has to age out
+                wait = max(wait, recent[excess - 1] + window - now)
+        return wait
+    
+    async def _wait_for(self, platform: str, user_id: int, kind: str, now: float, calls: int = 1) -> float:
+        """
+        Seconds until an account may do one more action of a kind; a post
+        also needs `calls` unspent API calls (caller holds the kind's lock).
+        """
+        events = await self._sync((platform, user_id, kind))
+        
+        # Drop events older than the longest window
+        cutoff = bisect.bisect_right(events, now - self._longest_window(platform, kind))
+        if cutoff:
+            del events[:cutoff]
+        
+        wait = self._wait(platform, kind, events, 1, now)
+        if kind == "post" and "call" in self.rules.get(platform, {}):
+            call_key = (platform, user_id, "call")
+            async with self._locks.setdefault(call_key, asyncio.Lock()):
+                call_events = await self._sync(call_key)
+                wait = max(wait, self._wait(platform, "call", call_events, calls, now))
+        
+        blocked_until = self._blocked_until.get((platform, user_id), 0.0)
+        return max(wait, blocked_until - now)
+    
+    async def acquire(
+        self,
+        platform: str,
+        user_id: int,
+        kind: str = "post",
+        calls: int = 1
+    ) -> Tuple[Optional[Reservation], float]:
+        """
+        Reserve one action for an account if its quotas allow it now.
+        
+        A post is only granted while the account's call budget has room
+        for the `calls` API requests it may make (see api_calls_needed).
+        
+        Returns:
+            (reservation, 0) if granted (platforms without quotas are always
+            granted), or (None, seconds until a slot frees up)
+        """
+        platform = platform.lower()
+        if platform not in self.rules:
+            return Reservation(platform, user_id, kind, datetime.now(timezone.utc)), 0.0
+        
+        key = (platform, user_id, kind)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            now = time.time()
+            wait = await self._wait_for(platform, user_id, kind, now, calls)
+            if wait > 0:
+                self.deferred += 1
+                return None, wait
+            
+            reservation = Reservation(platform, user_id, kind, datetime.fromtimestamp(now, timezone.utc))
+            self._add(key, reservation)
+            self.granted += 1
+            return reservation, 0.0
+    
+    async def next_available(
+        self,
+        platform: str,
+        user_id: int,
+        kind: str = "post",
+        calls: int = 1
+    ) -> datetime:
+        """Earliest time an account may do one more action (now if it may)."""
+        platform = platform.lower()
+        now = time.time()
+        wait = max(0.0, self._blocked_until.get((platform, user_id), 0.0) - now)
+        if platform in self.rules:
+            async with self._locks.setdefault((platform, user_id, kind), asyncio.Lock()):
+                wait = max(wait, await self._wait_for(platform, user_id, kind, now, calls))
+        return datetime.fromtimestamp(now + wait, timezone.utc)
+    
+    async def record(self, platform: str, user_id: int, kind: str = "call") -> None:
+        """Count an action that already happened (e.g. an API request)."""
+        platform = platform.lower()
+        if kind not in self.rules.get(platform, {}):
+            return
+        key = (platform, user_id, kind)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            await self._sync(key)
+            self._add(key, Reservation(platform, user_id, kind, datetime.now(timezone.utc)))
+    
+    def _add(self, key: AccountKey, reservation: Reservation) -> None:
+        bisect.insort(self._events.setdefault(key, []), reservation.at.timestamp())
+        self._persist("add", reservation)
+    
+    def release(self, reservation: Reservation) -> None:
+        """Give back a reservation that wasn't used."""
+        key = (reservation.platform, reservation.user_id, reservation.kind)
+        events = self._events.get(key)
+        if events is None:
+            return
+        ts = reservation.at.timestamp()
+        i = bisect.bisect_left(events, ts)
+        if i < len(events) and events[i] == ts:
+            del events[i]
+            self._persist("remove", reservation)
+            self.released += 1
+    
+    def block(self, platform: str, user_id: int, seconds: Optional[float] = None) -> None:
+        """Hold an account back after the platform throttled it."""
+        seconds = DEFAULT_BLOCK_SECONDS if seconds is None else seconds
+        key = (platform.lower(), user_id)
+        self._blocked_until[key] = max(self._blocked_until.get(key, 0.0), time.time() + seconds)
+        self.blocks += 1
+        logger.warning(f"{platform} account of user {user_id} throttled; holding it back {seconds:.0f}s")
+    
+    def settle(self, reservation: Reservation, result: SocialPublishResult) -> None:
+        """
+        Account for a publish outcome: a failed publish doesn't count
+        against the quota, and a 429 blocks the account.
+        """
+        if result.success:
+            return
+        self.release(reservation)
+        if is_throttled(result):
+            self.block(reservation.platform, reservation.user_id, result.retry_after)
+    
+    def http_hooks(self, platform: str, user_id: int) -> Dict[str, list]:
+        """httpx event hooks that count every request as an API call."""
+        async def count_call(request) -> None:
+            await self.record(platform, user_id, "call")
+        
+        return {"request": [count_call]}
+    
+    async def prune(self) -> int:
+        """Delete events older than every window; returns rows removed."""
+        await self.flush()
+        now = time.time()
+        removed = 0
+        async with async_session_maker() as session:
+            for platform, kinds in self.rules.items():
+                for kind in kinds:
+                    since = datetime.fromtimestamp(now - self._longest_window(platform, kind), timezone.utc)
+                    result = await session.execute(
+                        delete(QuotaEvent).where(
+                            QuotaEvent.platform == platform,
+                            QuotaEvent.kind == kind,
+                            QuotaEvent.occurred_at < since,
+                        )
+                    )
+                    removed += result.rowcount or 0
+            await session.commit()
+        
+        self._blocked_until = {k: v for k, v in self._blocked_until.items() if v > now}
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "accounts_tracked": len(self._events),
+            "granted": self.granted,
+            "deferred": self.deferred,
+            "released": self.released,
+            "throttle_blocks": self.blocks,
+            "blocked_accounts": sum(1 for until in self._blocked_until.values() if until > now),
+            "unsaved_events": len(self._buffer),
+        }
+
+
+def _timestamp(value: datetime) -> float:
+    """SQLite hands back naive datetimes (stored as UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def is_throttled(result: SocialPublishResult) -> bool:
+    """Whether a publish failed because the platform rate-limited it."""
+    return not result.success and result.metadata.get("status_code") == 429
+
+
+# Singleton instance
+_rate_governor: Optional[RateGovernor] = None
+
+
+def get_rate_governor() -> RateGovernor:
+    """Get or create the rate governor singleton."""
+    global _rate_governor
+    if _rate_governor is None:
+        _rate_governor = RateGovernor()
+    return _rate_governor
@@ -0,0 +1,225 @@
+"""
+OAuth Token Store for ContentOS
+
+Persists social OAuth tokens in the social_accounts table (one active row
+per user and platform), so connections survive restarts and are shared by
+every worker.
+
+Reads go through an in-process cache: the publish path looks a token up
+on every post, and a cached token costs no database round trip. Entries
+live SOCIAL_TOKEN_CACHE_TTL seconds (missing tokens a shorter time, so a
+connection made on another worker shows up quickly) and never outlive the
+token itself. Writes (OAuth callback, refresh, disconnect) go to the
+database first and then update this worker's cache.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone, timedelta
+from typing import Optional, Dict, Any, List, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from config import settings
+from database import async_session_maker
+from models.social_account import SocialAccount
+
+logger = logging.getLogger(__name__)
+
+# Cache lifetime of "no token" answers (seconds)
+NEGATIVE_CACHE_TTL = 30
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """SQLite hands back naive datetimes (stored as UTC)."""
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+def expires_in(seconds: Optional[Any]) -> Optional[datetime]:
+    """Expiry time for an OAuth "expires_in" value."""
+    if not seconds:
+        return None
+    return datetime.now(timezone.utc) + timedelta(seconds=int(seconds))
+
+
+@dataclass
+class OAuthToken:
+    """A user's OAuth credentials for one platform."""
+    user_id: int
+    platform: str
+    access_token: str
+    refresh_token: Optional[str] = None
+    expires_at: Optional[datetime] = None
+    platform_user_id: Optional[str] = None
+    platform_username: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+    
+    @classmethod
+    def from_account(cls, account: SocialAccount) -> "OAuthToken":
+        return cls(
+            user_id=account.user_id,
+            platform=account.platform,
+            access_token=account.access_token,
+            refresh_token=account.refresh_token,
+            expires_at=_as_utc(account.token_expires_at),
+            platform_user_id=account.platform_user_id,
+            platform_username=account.platform_username,
+            extra=dict(account.extra_data or {}),
+        )
+    
+    def is_expired(self) -> bool:
+        return self.expires_at is not None and self.expires_at <= datetime.now(timezone.utc)
+
+
+class TokenStore:
+    """
+    social_accounts-backed token repository with a read-through cache.
+    """
+    
+    def __init__(self, cache_ttl: Optional[int] = None):
+        self.cache_ttl = settings.social_token_cache_ttl if cache_ttl is None else cache_ttl
+        
+        # (platform, user_id) -> (token or None, cache expiry timestamp)
+        self._cache: Dict[Tuple[str, int], Tuple[Optional[OAuthToken], float]] = {}
+        
+        self.hits = 0
+        self.misses = 0
+    
+    def _remember(self, platform: str, user_id: int, token: Optional[OAuthToken]) -> None:
+        cache_until = time.time() + (self.cache_ttl if token else min(self.cache_ttl, NEGATIVE_CACHE_TTL))
+        if token and token.expires_at:
+            cache_until = min(cache_until, token.expires_at.timestamp())
+        self._cache[(platform, user_id)] = (token, cache_until)
+    
+    def invalidate(self, platform: str, user_id: int) -> None:
+        """Drop a cached entry (next get() reads the database)."""
+        self._cache.pop((platform, user_id), None)
+    
+    async def get(self, platform: str, user_id: int, include_expired: bool = False) -> Optional[OAuthToken]:
+        """
+        Active, unexpired token of a user on a platform.
+        
+        Served from the cache when possible; otherwise one indexed query.
+        include_expired also returns an expired token (for the refresh
+        path: its refresh token may still be valid); it always reads the
+        database.
+        """
+        entry = self._cache.get((platform, user_id))
+        if not include_expired and entry is not None and entry[1] > time.time():
+            self.hits += 1
+            return entry[0]
+        
+        self.misses += 1
+        try:
+            async with async_session_maker() as session:
+                account = await session.scalar(
+                    select(SocialAccount).where(
+                        SocialAccount.user_id == user_id,
+                        SocialAccount.platform == platform,
+                        SocialAccount.is_active.is_(True),
+                    )
+                )
+        except Exception as e:
+            logger.warning(f"Token lookup failed for {platform} user {user_id}: {e}")
+            return None
+        
+        token = OAuthToken.from_account(account) if account else None
+        if token and token.is_expired():
+            if include_expired:
+                return token
+            token = None
+        self._remember(platform, user_id, token)
+        return token
+    
+    async def save(self, token: OAuthToken) -> OAuthToken:
+        """Insert or replace a user's token for a platform (write-through)."""
+        values = {
+            "access_token": token.access_token,
+            "refresh_token": token.refresh_token,
+            "token_expires_at": token.expires_at,
+            "platform_user_id": token.platform_user_id,
+            "platform_username": token.platform_username,
+            "extra_data": token.extra or None,
+            "is_active": True,
+        }
+        
+        for attempt in range(2):
+            try:
+                async with async_session_maker() as session:
+                    account = await session.scalar(
+                        select(SocialAccount).where(
+                            SocialAccount.user_id == token.user_id,
+                            SocialAccount.platform == token.platform,
+                        )
+                    )
+                    if account is None:
+                        session.add(SocialAccount(user_id=token.user_id, platform=token.platform, **values))
+                    else:
+                        for name, value in values.items():
+                            setattr(account, name, value)
+                    await session.commit()
+                break
+            except IntegrityError:
+                # Another worker inserted the row first; update it instead
+                if attempt:
+                    raise
+        
+        self._remember(token.platform, token.user_id, token)
+        logger.info(f"Stored {token.platform} token for user {token.user_id}")
+        return token
+    
+    async def delete(self, platform: str, user_id: int) -> bool:
+        """Deactivate a connection and clear its tokens."""
+        async with async_session_maker() as session:
+            result = await session.execute(
+                update(SocialAccount)
+                .where(
+                    SocialAccount.user_id == user_id,
+                    SocialAccount.platform == platform,
+                    SocialAccount.is_active.is_(True),
+                )
+                .values(is_active=False, access_token="", refresh_token=None)
+            )
+            await session.commit()
+        
+        self._remember(platform, user_id, None)
+        return bool(result.rowcount)
+    
+    async def expiring(self, within_seconds: float, platforms: Optional[List[str]] = None) -> List[OAuthToken]:
+        """Active tokens that expire within the given time (one query)."""
+        cutoff = datetime.now(timezone.utc) + timedelta(seconds=within_seconds)
+        query = select(SocialAccount).where(
+            SocialAccount.is_active.is_(True),
+            SocialAccount.token_expires_at.is_not(None),
+            SocialAccount.token_expires_at <= cutoff,
+        )
+        if platforms:
+            query = query.where(SocialAccount.platform.in_(platforms))
+        
+        async with async_session_maker() as session:
+            result = await session.execute(query.order_by(SocialAccount.token_expires_at))
+            return [OAuthToken.from_account(account) for account in result.scalars().all()]
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+_token_store: Optional[TokenStore] = None
+
+
+def get_token_store() -> TokenStore:
+    """Get or create the token store singleton."""
+    global _token_store
+    if _token_store is None:
+        _token_store = TokenStore()
+    return _token_store
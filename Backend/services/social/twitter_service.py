@@ -5,10 +5,19 @@ Uses twikit library - No API key required!
 Login with username/email/password to access Twitter's internal API.
 
 FREE and unlimited (within reasonable use).
+
+Clients are kept in a bounded per-user pool (LRU eviction). A user's
+cookie file is read once when their client enters the pool, and cookie
+files are read/written on a worker thread, so publishing never waits on
+disk. Publishes for the same account run one at a time.
 """
+import json
 import logging
+import os
 import secrets
 import asyncio
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any, List
 from pathlib import Path
@@ -18,6 +27,33 @@ from .base import BaseSocialProvider, SocialPublishResult
 
 logger = logging.getLogger(__name__)
 
+# How long "no cookie file" is remembered before checking disk again (seconds)
+MISSING_SESSION_TTL = 30
+
+
+def _read_cookies(path: Path) -> Optional[Any]:
+    """Cookie file contents, or None if there is none."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_cookies(path: Path, cookies: Any) -> None:
+    """Write a cookie file atomically (readers never see a partial file)."""
+    tmp_path = path.with_suffix(".json.part")
+    with open(tmp_path, "w") as f:
+        json.dump(cookies, f)
+    os.replace(tmp_path, path)
+
+
+def _remove_cookies(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
 
 class TwitterService(BaseSocialProvider):
     """
@@ -28,13 +64,21 @@ class TwitterService(BaseSocialProvider):
     
     platform_name = "twitter"
     
+    # Modern, realistic User-Agent to avoid Cloudflare blocks (Chrome 132)
+    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36"
+    
     def __init__(self):
         self.cookies_dir = Path('./cookies')
         self.cookies_dir.mkdir(exist_ok=True)
         
-        # User-specific clients and credentials
-        # {user_id: {'client': Client, 'logged_in': bool}}
-        self._sessions: Dict[int, Dict[str, Any]] = {}
+        # LRU pool of user sessions
+        # {user_id: {'client': Client | None, 'logged_in': bool, 'checked_at': float}}
+        self._sessions: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self.pool_size = max(1, settings.twitter_client_pool_size)
+        
+        # Per-user locks: one cookie load at a time, one publish at a time
+        self._load_locks: Dict[int, asyncio.Lock] = {}
+        self._publish_locks: Dict[int, asyncio.Lock] = {}
         
         logger.info("Twitter service initialized (twikit multi-user)")
     
@@ -46,10 +90,45 @@ class TwitterService(BaseSocialProvider):
         """Check if specific user is logged into Twitter."""
         return await self._ensure_client(user_id)
     
+    def _cookies_path(self, user_id: int) -> Path:
+        return self.cookies_dir / f"twitter_{user_id}.json"
+    
+    def _new_client(self):
+        from twikit import Client
+        
+        client = Client('en-US')
+        client._user_agent = self.USER_AGENT
+        return client
+    
+    def _store_session(self, user_id: int, session: Dict[str, Any]) -> None:
+        """Add/replace a pool entry, evicting the least recently used."""
+        session.setdefault('checked_at', time.monotonic())
+        self._sessions[user_id] = session
+        self._sessions.move_to_end(user_id)
+        
+        while len(self._sessions) > self.pool_size:
+            evicted, _ = self._sessions.popitem(last=False)
+            # Locks are only needed while someone uses them
+            for locks in (self._load_locks, self._publish_locks):
+                lock = locks.get(evicted)
+                if lock is not None and not lock.locked():
+                    del locks[evicted]
+            logger.debug(f"Twitter: evicted session for user {evicted}")
+    
+    def _cached_session(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Pool entry if usable (logged in, or a recent "not connected")."""
+        session = self._sessions.get(user_id)
+        if session is None:
+            return None
+        if not session.get('logged_in') and time.monotonic() - session['checked_at'] > MISSING_SESSION_TTL:
+            return None
+        self._sessions.move_to_end(user_id)
+        return session
+    
     async def connect_with_cookies(self, user_id: int, cookies: List[Dict[str, Any]]) -> bool:
         """Connect using manually provided cookies (bypasses login)."""
-        import json
-        from twikit import Client
+        cookies_path = self._cookies_path(user_id)
+        written = False
         
         try:
             # Validate cookies structure (basic check)
@@ -59,44 +138,38 @@ class TwitterService(BaseSocialProvider):
                     cookies = [{"name": k, "value": v} for k, v in cookies.items()]
                 else:
                     raise ValueError("Cookies must be a JSON list or dictionary")
-
-            # Save to file
-            cookies_path = self.cookies_dir / f"twitter_{user_id}.json"
-            with open(cookies_path, 'w') as f:
-                json.dump(cookies, f)
             
-            # Verify by loading
-            client = Client('en-US')
-            client._user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36"
-            
-            client.load_cookies(str(cookies_path))
+            # Verify by loading (same as load_cookies, without the file read)
+            client = self._new_client()
+            client.set_cookies(cookies)
             
             # Test connection (optional, get user info)
             # await client.user() 
             
-            self._sessions[user_id] = {
+            # Save to file
+            await asyncio.to_thread(_write_cookies, cookies_path, cookies)
+            written = True
+            
+            self._store_session(user_id, {
                 'client': client,
                 'logged_in': True,
                 'username': 'Cookie User' # We might update this later
-            }
+            })
             logger.info(f"Twitter: User {user_id} connected via manual cookies")
             return True
             
         except Exception as e:
             logger.error(f"Twitter cookie import failed: {e}")
-            # Clean up bad file
-            if 'cookies_path' in locals() and cookies_path.exists():
-                cookies_path.unlink()
+            # Clean up a file this call wrote; a user's existing cookies
+            # (and their logged-in session) stay when the import is invalid
+            if written:
+                await asyncio.to_thread(_remove_cookies, cookies_path)
             raise e
 
     async def connect(self, user_id: int, username: str, email: str, password: str) -> bool:
         """Connect a user using credentials."""
-        from twikit import Client
-        
         try:
-            client = Client('en-US')
-            # Use a modern, realistic User-Agent to avoid Cloudflare blocks (Chrome 132)
-            client._user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36"
+            client = self._new_client()
             
             # Login
             try:
@@ -115,15 +188,14 @@ class TwitterService(BaseSocialProvider):
                 raise login_err
             
             # Save cookies
-            cookies_path = self.cookies_dir / f"twitter_{user_id}.json"
-            client.save_cookies(str(cookies_path))
+            await asyncio.to_thread(_write_cookies, self._cookies_path(user_id), client.get_cookies())
             
             # Update session
-            self._sessions[user_id] = {
+            self._store_session(user_id, {
                 'client': client,
                 'logged_in': True,
                 'username': username
-            }
+            })
             logger.info(f"Twitter: User {user_id} ({username}) logged in successfully")
             return True
             
@@ -132,35 +204,38 @@ class TwitterService(BaseSocialProvider):
             raise e
 
     async def _ensure_client(self, user_id: int) -> bool:
-        """Initialize and login to Twitter client for specific user."""
-        if user_id in self._sessions and self._sessions[user_id].get('logged_in'):
-            return True
-            
-        try:
-            from twikit import Client
-            cookies_path = self.cookies_dir / f"twitter_{user_id}.json"
+        """
+        Make sure the user's client is in the pool, loading their cookie
+        file (off the event loop) only if it isn't.
+        """
+        session = self._cached_session(user_id)
+        if session is not None:
+            return session['logged_in']
+        
+        lock = self._load_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            # Another caller may have loaded it while we waited
+            session = self._cached_session(user_id)
+            if session is not None:
+                return session['logged_in']
             
-            if not cookies_path.exists():
-                return False
-                
-            client = Client('en-US')
-            client._user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
             try:
-                client.load_cookies(str(cookies_path))
+                cookies = await asyncio.to_thread(_read_cookies, self._cookies_path(user_id))
+                if cookies is None:
+                    self._store_session(user_id, {'client': None, 'logged_in': False})
+                    return False
                 
-                self._sessions[user_id] = {
+                client = self._new_client()
+                client.set_cookies(cookies)
+                self._store_session(user_id, {
                     'client': client,
                     'logged_in': True
-                }
+                })
                 logger.info(f"Twitter: Loaded session for user {user_id}")
                 return True
             except Exception as e:
                 logger.warning(f"Failed to load Twitter cookies for user {user_id}: {e}")
                 return False
-                
-        except Exception as e:
-            logger.error(f"Twitter client init failed: {e}")
-            return False
 
     async def get_auth_url(self, user_id: int, redirect_uri: str) -> str:
         """Not used for Twikit - uses direct login."""
@@ -191,10 +266,23 @@ class TwitterService(BaseSocialProvider):
                 success=False,
                 platform=self.platform_name,
                 error="Twitter not connected for this user",
+                retryable=False,
             )
             
         client = self._sessions[user_id]['client']
         
+        # One publish at a time per account (twikit clients are not safe
+        # to share across concurrent requests)
+        lock = self._publish_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            return await self._publish_with(client, content, media_paths)
+    
+    async def _publish_with(
+        self,
+        client,
+        content: str,
+        media_paths: Optional[List[str]],
+    ) -> SocialPublishResult:
         try:
             media_ids = []
             
@@ -237,13 +325,10 @@ class TwitterService(BaseSocialProvider):
     async def disconnect(self, user_id: int) -> bool:
         """Disconnect specific user."""
         try:
-            cookies_path = self.cookies_dir / f"twitter_{user_id}.json"
-            if cookies_path.exists():
-                cookies_path.unlink()
+            await asyncio.to_thread(_remove_cookies, self._cookies_path(user_id))
+            
+            self._store_session(user_id, {'client': None, 'logged_in': False})
             
-            if user_id in self._sessions:
-                del self._sessions[user_id]
-                
             return True
         except Exception as e:
             logger.error(f"Failed to disconnect Twitter user {user_id}: {e}")
@@ -3,17 +3,30 @@ Speech Service for ContentOS
 
 AWS Transcribe-first with free fallback:
 1. AWS Transcribe - PRIMARY for hackathon
-2. OpenAI Whisper (local) - FREE fallback
+2. OpenAI Whisper / faster-whisper (local) - FREE fallback, worker pool
 
-Supports audio transcription with timestamp extraction.
+Supports audio transcription with timestamp extraction. Long audio is
+split on silence (VAD) and the chunks are transcribed in parallel.
 """
+import asyncio
 import logging
 import tempfile
 import os
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
 from pathlib import Path
 
+import numpy as np
+
 from config import settings
+from services.transcription_pool import get_transcription_pool, TranscriptionJob
+from services.audio_processing import (
+    SAMPLE_RATE,
+    AudioChunk,
+    AudioDecodeError,
+    decode_audio_bytes,
+    load_audio,
+    split_on_silence,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +43,6 @@ class SpeechService:
     
     def __init__(self):
         self.aws_client = None
-        self.whisper_model = None
         
         # Initialize AWS Transcribe if configured
         if settings.aws_configured and settings.use_aws_transcribe:
@@ -46,19 +58,6 @@ class SpeechService:
             except Exception as e:
                 logger.warning(f"Failed to initialize AWS Transcribe: {e}")
     
-    def _load_whisper(self):
-        """Lazy load Whisper model."""
-        if self.whisper_model is None:
-            try:
-                import whisper
-                # Use 'base' model for balance of speed and accuracy
-                self.whisper_model = whisper.load_model("base")
-                logger.info("Whisper model loaded")
-            except Exception as e:
-                logger.error(f"Failed to load Whisper: {e}")
-                raise SpeechError(f"Whisper not available: {e}")
-        return self.whisper_model
-    
     async def transcribe_whisper(
         self,
         audio_path: str,
@@ -67,43 +66,187 @@ class SpeechService:
         """
         Transcribe audio using Whisper (FREE, local).
         
+        Runs in the transcription worker pool so the event loop stays free;
+        backend (openai / faster_whisper) and model size come from settings.
+        With VAD enabled the audio is split on silence and chunks are
+        transcribed in parallel, then stitched back in timeline order.
+        
         Args:
             audio_path: Path to audio file
             language: Optional language hint
             
         Returns:
-            Dict with text, segments, and language
+            Dict with text, segments, language, job_id and rtf
         """
         try:
-            model = self._load_whisper()
-            
-            options = {"task": "transcribe"}
-            if language:
-                options["language"] = language
-            
-            result = model.transcribe(audio_path, **options)
-            
-            # Extract segments with timestamps
-            segments = [
-                {
-                    "start": seg["start"],
-                    "end": seg["end"],
-                    "text": seg["text"].strip(),
-                }
-                for seg in result.get("segments", [])
-            ]
-            
-            return {
-                "text": result["text"].strip(),
-                "segments": segments,
-                "language": result.get("language", "en"),
-                "provider": "whisper",
-            }
+            audio = await asyncio.to_thread(load_audio, audio_path)
+        except Exception as e:
+            logger.error(f"Audio decode error: {e}")
+            raise SpeechError(f"Whisper failed: {e}")
+        
+        return await self.transcribe_whisper_array(audio, language)
+    
+    async def transcribe_whisper_array(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Transcribe 16 kHz mono float32 audio already in memory.
+        
+        Args:
+            audio: PCM samples in [-1, 1]
+            language: Optional language hint
+        """
+        try:
+            if not settings.audio_vad_enabled:
+                return await get_transcription_pool().transcribe(audio, language)
             
+            chunks = [chunk async for chunk in self.iter_whisper_chunks(audio, language)]
+            return self.stitch_chunks(chunks, len(audio) / SAMPLE_RATE)
         except Exception as e:
             logger.error(f"Whisper transcription error: {e}")
             raise SpeechError(f"Whisper failed: {e}")
     
+    async def iter_whisper_chunks(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Transcribe 16 kHz audio chunk by chunk, yielding each chunk as soon
+        as it finishes (completion order, not timeline order).
+        
+        Chunks are submitted to the worker pool through a small window so
+        long files never overflow the pool queue. Closing the iterator early
+        cancels chunks that haven't started yet.
+        
+        Yields:
+            Dict with index, start, end, text, segments (absolute
+            timestamps), language, provider and rtf
+        """
+        if settings.audio_vad_enabled:
+            chunks = split_on_silence(audio)
+        else:
+            chunks = [AudioChunk(index=0, start=0.0, end=len(audio) / SAMPLE_RATE, samples=audio)]
+        
+        pool = get_transcription_pool()
+        window = pool.workers * 2
+        pending_chunks = list(reversed(chunks))
+        in_flight: Dict[asyncio.Future, AudioChunk] = {}
+        
+        try:
+            while pending_chunks or in_flight:
+                while pending_chunks and len(in_flight) < window:
+                    chunk = pending_chunks.pop()
+                    try:
+                        _, future = pool.submit(chunk.samples, language)
+                    except Exception as e:
+                        raise SpeechError(f"Could not queue audio chunk: {e}")
+                    in_flight[future] = chunk
+                
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    chunk = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        raise SpeechError(f"Chunk {chunk.index} transcription failed: {e}")
+                    yield {
+                        "index": chunk.index,
+                        "start": chunk.start,
+                        "end": chunk.end,
+                        "text": result["text"],
+                        "segments": [
+                            {
+                                "start": chunk.start + seg["start"],
+                                "end": chunk.start + seg["end"],
+                                "text": seg["text"],
+                            }
+                            for seg in result.get("segments", [])
+                        ],
+                        "language": result.get("language", "en"),
+                        "provider": result.get("provider", "whisper"),
+                        "rtf": result.get("rtf"),
+                    }
+        finally:
+            for future in in_flight:
+                future.cancel()
+    
+    @staticmethod
+    def stitch_chunks(chunks: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+        """Merge per-chunk transcripts back into one timeline-ordered result."""
+        chunks = sorted(chunks, key=lambda c: c["start"])
+        
+        languages = [c["language"] for c in chunks if c.get("language")]
+        rtfs = [c["rtf"] for c in chunks if c.get("rtf") is not None]
+        
+        return {
+            "text": " ".join(c["text"] for c in chunks if c["text"]).strip(),
+            "segments": [seg for c in chunks for seg in c["segments"]],
+            "language": max(set(languages), key=languages.count) if languages else "en",
+            "provider": chunks[0]["provider"] if chunks else "whisper",
+            "duration": duration,
+            "chunks": len(chunks),
+            # Per-chunk RTF averaged; wall-clock is lower with parallel chunks
+            "rtf": sum(rtfs) / len(rtfs) if rtfs else None,
+        }
+    
+    async def load_audio_bytes(
+        self,
+        audio_bytes: bytes,
+        filename: str = "audio.wav"
+    ) -> np.ndarray:
+        """
+        Decode uploaded audio to 16 kHz mono float32.
+        
+        Decodes straight from the upload buffer (WAV parser or ffmpeg pipe);
+        a temp file is only written for containers ffmpeg can't read from a
+        pipe.
+        """
+        try:
+            return await asyncio.to_thread(decode_audio_bytes, audio_bytes)
+        except AudioDecodeError as e:
+            logger.info(f"In-memory decode failed for {filename}, using temp file: {e}")
+        
+        ext = Path(filename).suffix or ".wav"
+        with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as f:
+            f.write(audio_bytes)
+            temp_path = f.name
+        
+        try:
+            return await asyncio.to_thread(load_audio, temp_path)
+        except Exception as e:
+            raise SpeechError(f"Audio decode failed: {e}")
+        finally:
+            os.unlink(temp_path)
+    
+    async def submit_transcription_job(
+        self,
+        audio_bytes: bytes,
+        filename: str = "audio.wav",
+        language: Optional[str] = None
+    ) -> TranscriptionJob:
+        """
+        Queue audio for background Whisper transcription.
+        
+        Returns once the audio is decoded and queued; poll the job for
+        status, progress and result.
+        """
+        audio = await self.load_audio_bytes(audio_bytes, filename)
+        
+        try:
+            job, future = get_transcription_pool().submit(audio, language)
+        except Exception as e:
+            raise SpeechError(str(e))
+        
+        def _log_failure(fut):
+            if not fut.cancelled() and fut.exception():
+                logger.warning(f"Transcription job {job.job_id} failed: {fut.exception()}")
+        future.add_done_callback(_log_failure)
+        
+        return job
+    
     async def transcribe_google_free(
         self,
         audio_path: str,
@@ -166,11 +309,19 @@ class SpeechService:
             logger.warning("Whisper failed, trying Google Speech")
             fallback_used = True
         
+        return await self._transcribe_fallback(audio_path, language)
+    
+    async def _transcribe_fallback(
+        self,
+        audio_path: str,
+        language: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Providers after Whisper: Google Speech, then a placeholder."""
         # Fallback to Google Speech (free tier)
         try:
             lang_code = f"{language or 'en'}-US" if language else "en-US"
             result = await self.transcribe_google_free(audio_path, lang_code)
-            result["fallback_used"] = fallback_used
+            result["fallback_used"] = True
             return result
         except SpeechError as e:
             logger.warning(f"All speech providers failed: {e}, using simple fallback")
@@ -188,7 +339,8 @@ class SpeechService:
         self,
         audio_bytes: bytes,
         filename: str = "audio.wav",
-        language: Optional[str] = None
+        language: Optional[str] = None,
+        whisper: bool = True
     ) -> Dict[str, Any]:
         """
         Transcribe audio from bytes.
@@ -197,8 +349,27 @@ class SpeechService:
             audio_bytes: Audio file bytes
             filename: Original filename for extension detection
             language: Optional language hint
+            whisper: False when Whisper already failed on this audio (go
+                straight to Google Speech / the placeholder)
         """
-        # Get file extension
+        # In-memory path: decode the upload buffer and feed Whisper directly
+        audio = None
+        if whisper:
+            try:
+                audio = await self.load_audio_bytes(audio_bytes, filename)
+            except SpeechError as e:
+                logger.warning(f"In-memory audio decode failed: {e}")
+        
+        if audio is not None:
+            try:
+                result = await self.transcribe_whisper_array(audio, language)
+                result["fallback_used"] = False
+                return result
+            except SpeechError as e:
+                # Whisper already had its go; only the other providers remain
+                logger.warning(f"Whisper failed, trying Google Speech: {e}")
+        
+        # Temp file for the file-based path / providers that need a path
         ext = Path(filename).suffix or ".wav"
         
         # Write to temp file
@@ -207,7 +378,9 @@ class SpeechService:
             temp_path = f.name
         
         try:
-            return await self.transcribe(temp_path, language)
+            if whisper and audio is None:
+                return await self.transcribe(temp_path, language)
+            return await self._transcribe_fallback(temp_path, language)
         finally:
             # Cleanup temp file
             os.unlink(temp_path)
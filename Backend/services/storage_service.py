@@ -7,17 +7,44 @@ AWS S3-first with Firebase and local fallback:
 3. Local filesystem - Ultimate fallback
 
 Handles media uploads for social media publishing.
+
+Uploads are streamed: providers consume an async iterator of byte chunks,
+so peak memory per upload stays bounded by the chunk/part size however
+large the file is. SHA-256 and size are computed while streaming and the
+size limit is enforced mid-stream.
+- S3: multipart upload with concurrent parts (single PUT for small files)
+- Firebase: spooled to a temp file, then a resumable upload
+- Local: chunked writes to a .part file, renamed when complete
+When a fallback provider exists, the stream is also teed to a temp spool
+file, so a provider failing midway is retried on the next one from disk.
+
+Every blocking provider call (file writes, mkdir/rename/unlink, boto3,
+Firebase SDK) runs on a dedicated storage I/O executor
+(STORAGE_IO_WORKERS threads), so big uploads never block the event loop
+or starve the default executor used by other services.
+
+Content-addressed mode (STORAGE_DEDUP_ENABLED) keeps one stored copy per
+distinct file. The hash comes from the stream itself, so a new file costs
+nothing extra; a duplicate's fresh copy is deleted in favour of the indexed
+one. See content_index for reference counting.
 """
+import asyncio
+import functools
+import hashlib
 import logging
 import os
+import tempfile
 import uuid
 import mimetypes
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Any, BinaryIO
+from typing import Optional, Dict, Any, BinaryIO, AsyncIterator, AsyncIterable, Callable, List
 from abc import ABC, abstractmethod
 
 from config import settings
+from utils.aws import create_boto3_client
+from services.content_index import get_content_index, ContentIndexError
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +68,191 @@ class DownloadError(StorageError):
     pass
 
 
+class FileTooLargeError(UploadError):
+    """Upload exceeded the size limit (detected mid-stream)."""
+    pass
+
+
+class EmptyUploadError(UploadError):
+    """Upload contained no data."""
+    pass
+
+
+# ============================================
+# I/O Executor
+# ============================================
+
+_io_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_io_executor() -> ThreadPoolExecutor:
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.storage_io_workers),
+            thread_name_prefix="storage-io",
+        )
+    return _io_executor
+
+
+async def run_io(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking storage call on the storage I/O executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_io_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_storage_io() -> None:
+    """Stop the storage I/O executor (called on app shutdown)."""
+    global _io_executor
+    if _io_executor is not None:
+        _io_executor.shutdown(wait=False, cancel_futures=True)
+        _io_executor = None
+
+
+# ============================================
+# Upload Streams
+# ============================================
+
+# Chunks at least this large are hashed on the I/O executor
+_OFFLOAD_HASH_BYTES = 64 * 1024
+
+
+class HashingStream:
+    """
+    Async byte-chunk iterator that hashes and counts what passes through
+    and aborts with FileTooLargeError as soon as max_bytes is exceeded.
+    """
+    
+    def __init__(self, chunks: AsyncIterable[bytes], max_bytes: Optional[int] = None):
+        self._chunks = chunks.__aiter__()
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+    
+    def __aiter__(self) -> "HashingStream":
+        return self
+    
+    async def __anext__(self) -> bytes:
+        chunk = await self._chunks.__anext__()
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise FileTooLargeError(f"File exceeds {self.max_bytes} bytes")
+        if len(chunk) >= _OFFLOAD_HASH_BYTES:
+            # hashlib releases the GIL on large buffers; keep it off the loop
+            await run_io(self._sha256.update, chunk)
+        else:
+            self._sha256.update(chunk)
+        return chunk
+    
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+
+class SpoolingStream:
+    """
+    Async byte-chunk iterator that copies every chunk passing through to a
+    temp file, so a consumer that fails midway can be replayed from disk.
+    The file is created on the first chunk (path stays None for an empty
+    stream); the owner calls cleanup().
+    """
+    
+    def __init__(self, chunks: AsyncIterable[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._file: Optional[BinaryIO] = None
+        self.path: Optional[str] = None
+    
+    def __aiter__(self) -> "SpoolingStream":
+        return self
+    
+    async def __anext__(self) -> bytes:
+        chunk = await self._chunks.__anext__()
+        if self._file is None:
+            self._file = await run_io(tempfile.NamedTemporaryFile, delete=False)
+            self.path = self._file.name
+        await run_io(self._file.write, chunk)
+        return chunk
+    
+    async def close(self) -> None:
+        """Finish the spool file (call before replaying it)."""
+        if self._file is not None and not self._file.closed:
+            await run_io(self._file.close)
+    
+    async def cleanup(self) -> None:
+        await self.close()
+        if self.path:
+            await run_io(os.unlink, self.path)
+            self.path = None
+
+
+async def iter_bytes(data: bytes, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Stream an in-memory buffer as chunks (no copies beyond one chunk)."""
+    chunk_size = chunk_size or settings.upload_chunk_size
+    view = memoryview(data)
+    for offset in range(0, len(data), chunk_size):
+        yield bytes(view[offset:offset + chunk_size])
+
+
+async def iter_upload_file(file: Any, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Stream a FastAPI UploadFile (anything with async read(n)) in chunks."""
+    chunk_size = chunk_size or settings.upload_chunk_size
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def spool_upload_to_temp(
+    file: Any,
+    suffix: str = "",
+    max_bytes: Optional[int] = None
+) -> str:
+    """
+    Copy an UploadFile to a named temp file chunk by chunk.
+    
+    For tools that need a path (OpenCV, ffmpeg). The caller deletes the file.
+    
+    Raises:
+        FileTooLargeError: If the upload exceeds max_bytes (temp file removed)
+    """
+    return await spool_stream_to_temp(HashingStream(iter_upload_file(file), max_bytes), suffix)
+
+
+async def spool_stream_to_temp(chunks: AsyncIterable[bytes], suffix: str = "") -> str:
+    """Write a chunk stream to a named temp file; returns its path."""
+    tmp = await run_io(tempfile.NamedTemporaryFile, delete=False, suffix=suffix)
+    try:
+        async for chunk in chunks:
+            await run_io(tmp.write, chunk)
+        await run_io(tmp.close)
+    except BaseException:
+        await run_io(tmp.close)
+        await run_io(os.unlink, tmp.name)
+        raise
+    return tmp.name
+
+
+def _object_key(folder: str, filename: str) -> str:
+    """Unique dated key: folder/YYYY/MM/DD/<uuid><ext>."""
+    ext = Path(filename).suffix
+    return f"{folder}/{datetime.now().strftime('%Y/%m/%d')}/{uuid.uuid4().hex}{ext}"
+
+
+async def iter_file(path: str, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Stream a file from disk in chunks."""
+    chunk_size = chunk_size or settings.upload_chunk_size
+    fh = await run_io(open, path, "rb")
+    try:
+        while True:
+            chunk = await run_io(fh.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await run_io(fh.close)
+
+
 # ============================================
 # Abstract Base Provider
 # ============================================
@@ -54,21 +266,44 @@ class BaseStorageProvider(ABC):
         pass
     
     @abstractmethod
+    async def upload_stream(
+        self,
+        stream: HashingStream,
+        filename: str,
+        content_type: str,
+        folder: str = "uploads",
+        key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Upload a chunk stream and return URL and metadata.
+        
+        key overrides the generated object key (content-addressed uploads).
+        """
+        pass
+    
     async def upload(
         self, 
         file_data: bytes, 
         filename: str, 
         content_type: str,
-        folder: str = "uploads"
+        folder: str = "uploads",
+        key: Optional[str] = None
     ) -> Dict[str, Any]:
         """Upload a file and return URL and metadata."""
-        pass
+        return await self.upload_stream(
+            HashingStream(iter_bytes(file_data)), filename, content_type, folder, key
+        )
     
     @abstractmethod
     async def delete(self, file_path: str) -> bool:
         """Delete a file."""
         pass
     
+    @abstractmethod
+    async def download(self, file_path: str) -> bytes:
+        """Read a file's contents."""
+        pass
+    
     @abstractmethod
     async def get_url(self, file_path: str, expires_in: int = 3600) -> str:
         """Get a URL to access the file."""
@@ -88,12 +323,13 @@ class S3StorageProvider(BaseStorageProvider):
         
         if settings.aws_configured and self.bucket_name:
             try:
-                import boto3
-                self.client = boto3.client(
+                # Pool sized for the storage I/O executor
+                self.client = create_boto3_client(
                     's3',
-                    region_name=settings.aws_region,
-                    aws_access_key_id=settings.aws_access_key_id,
-                    aws_secret_access_key=settings.aws_secret_access_key,
+                    max_pool_connections=max(
+                        settings.aws_max_pool_connections,
+                        settings.storage_io_workers,
+                    ),
                 )
                 logger.info(f"AWS S3 initialized with bucket: {self.bucket_name}")
             except Exception as e:
@@ -102,63 +338,171 @@ class S3StorageProvider(BaseStorageProvider):
     def is_available(self) -> bool:
         return self.client is not None and self.bucket_name is not None
     
-    async def upload(
-        self, 
-        file_data: bytes, 
-        filename: str, 
+    async def upload_stream(
+        self,
+        stream: HashingStream,
+        filename: str,
         content_type: str,
-        folder: str = "uploads"
+        folder: str = "uploads",
+        key: Optional[str] = None
     ) -> Dict[str, Any]:
+        """
+        Stream to S3. Files smaller than one part go up in a single PUT;
+        larger ones use a multipart upload with up to
+        S3_MULTIPART_CONCURRENCY parts in flight. Reading from the stream
+        pauses while all part slots are busy, so memory stays bounded at
+        about (concurrency + 1) x part size.
+        """
         if not self.is_available():
             raise StorageError("S3 not configured")
         
+        key = key or _object_key(folder, filename)
+        part_size = max(settings.s3_multipart_part_size, 5 * 1024 * 1024)
+        slots = asyncio.Semaphore(max(1, settings.s3_multipart_concurrency))
+        buffer = bytearray()
+        upload_id: Optional[str] = None
+        parts: List[asyncio.Task] = []
+        
+        async def _start_part(data: bytes) -> None:
+            nonlocal upload_id
+            if upload_id is None:
+                response = await run_io(
+                    self.client.create_multipart_upload,
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    ContentType=content_type,
+                )
+                upload_id = response["UploadId"]
+            # Fail fast if an earlier part already failed
+            for task in parts:
+                if task.done() and task.exception():
+                    raise task.exception()
+            await slots.acquire()
+            parts.append(asyncio.create_task(
+                self._upload_part(key, upload_id, len(parts) + 1, data, slots)
+            ))
+        
         try:
-            # Generate unique key
-            ext = Path(filename).suffix
-            unique_name = f"{uuid.uuid4().hex}{ext}"
-            key = f"{folder}/{datetime.now().strftime('%Y/%m/%d')}/{unique_name}"
+            async for chunk in stream:
+                buffer += chunk
+                while len(buffer) >= part_size:
+                    data = bytes(buffer[:part_size])
+                    del buffer[:part_size]
+                    await _start_part(data)
             
-            # Upload to S3
-            self.client.put_object(
+            if upload_id is None:
+                await run_io(
+                    self.client.put_object,
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    Body=bytes(buffer),
+                    ContentType=content_type,
+                )
+            else:
+                if buffer:
+                    await _start_part(bytes(buffer))
+                    buffer.clear()
+                etags = await asyncio.gather(*parts)
+                await run_io(
+                    self.client.complete_multipart_upload,
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={"Parts": [
+                        {"ETag": etag, "PartNumber": number}
+                        for number, etag in enumerate(etags, start=1)
+                    ]},
+                )
+        except BaseException as e:
+            for task in parts:
+                task.cancel()
+            if upload_id is not None:
+                await self._abort_multipart(key, upload_id)
+            if isinstance(e, (FileTooLargeError, StorageError)) or not isinstance(e, Exception):
+                raise
+            logger.error(f"S3 upload error: {e}")
+            raise UploadError(f"S3 upload failed: {e}")
+        
+        # Generate URL
+        url = f"https://{self.bucket_name}.s3.{settings.aws_region}.amazonaws.com/{key}"
+        
+        return {
+            "url": url,
+            "key": key,
+            "provider": "s3",
+            "bucket": self.bucket_name,
+            "size": stream.size,
+            "sha256": stream.sha256,
+            "content_type": content_type,
+            "parts": len(parts) or 1,
+        }
+    
+    async def _upload_part(
+        self,
+        key: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+        slots: asyncio.Semaphore
+    ) -> str:
+        """Upload one multipart part and release its slot; returns the ETag."""
+        try:
+            response = await run_io(
+                self.client.upload_part,
                 Bucket=self.bucket_name,
                 Key=key,
-                Body=file_data,
-                ContentType=content_type,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=data,
+            )
+            return response["ETag"]
+        finally:
+            slots.release()
+    
+    async def _abort_multipart(self, key: str, upload_id: str) -> None:
+        """Abort so S3 doesn't keep (and bill) the uploaded parts."""
+        try:
+            await run_io(
+                self.client.abort_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id,
             )
-            
-            # Generate URL
-            url = f"https://{self.bucket_name}.s3.{settings.aws_region}.amazonaws.com/{key}"
-            
-            return {
-                "url": url,
-                "key": key,
-                "provider": "s3",
-                "bucket": self.bucket_name,
-                "size": len(file_data),
-                "content_type": content_type,
-            }
-            
         except Exception as e:
-            logger.error(f"S3 upload error: {e}")
-            raise UploadError(f"S3 upload failed: {e}")
+            logger.warning(f"S3 multipart abort failed for {key}: {e}")
     
     async def delete(self, file_path: str) -> bool:
         if not self.is_available():
             return False
         
         try:
-            self.client.delete_object(Bucket=self.bucket_name, Key=file_path)
+            await run_io(self.client.delete_object, Bucket=self.bucket_name, Key=file_path)
             return True
         except Exception as e:
             logger.error(f"S3 delete error: {e}")
             return False
     
+    async def download(self, file_path: str) -> bytes:
+        if not self.is_available():
+            raise StorageError("S3 not configured")
+        
+        def _read() -> bytes:
+            response = self.client.get_object(Bucket=self.bucket_name, Key=file_path)
+            return response["Body"].read()
+        
+        try:
+            return await run_io(_read)
+        except Exception as e:
+            logger.error(f"S3 download error: {e}")
+            raise DownloadError(f"S3 download failed: {e}")
+    
     async def get_url(self, file_path: str, expires_in: int = 3600) -> str:
         if not self.is_available():
             raise StorageError("S3 not configured")
         
         try:
-            url = self.client.generate_presigned_url(
+            url = await run_io(
+                self.client.generate_presigned_url,
                 'get_object',
                 Params={'Bucket': self.bucket_name, 'Key': file_path},
                 ExpiresIn=expires_in
@@ -208,38 +552,49 @@ class FirebaseStorageProvider(BaseStorageProvider):
     def is_available(self) -> bool:
         return self.bucket is not None
     
-    async def upload(
-        self, 
-        file_data: bytes, 
-        filename: str, 
+    async def upload_stream(
+        self,
+        stream: HashingStream,
+        filename: str,
         content_type: str,
-        folder: str = "uploads"
+        folder: str = "uploads",
+        key: Optional[str] = None
     ) -> Dict[str, Any]:
         if not self.is_available():
             raise StorageError("Firebase Storage not configured")
         
         try:
             # Generate unique path
-            ext = Path(filename).suffix
-            unique_name = f"{uuid.uuid4().hex}{ext}"
-            blob_path = f"{folder}/{datetime.now().strftime('%Y/%m/%d')}/{unique_name}"
+            blob_path = key or _object_key(folder, filename)
             
-            # Upload to Firebase
-            blob = self.bucket.blob(blob_path)
-            blob.upload_from_string(file_data, content_type=content_type)
+            # Spool to disk, then let the SDK do a (resumable) file upload
+            spool = await run_io(tempfile.TemporaryFile)
+            try:
+                async for chunk in stream:
+                    await run_io(spool.write, chunk)
+                
+                blob = self.bucket.blob(blob_path)
+                await run_io(
+                    blob.upload_from_file, spool, rewind=True, content_type=content_type
+                )
+            finally:
+                await run_io(spool.close)
             
             # Make publicly accessible
-            blob.make_public()
+            await run_io(blob.make_public)
             
             return {
                 "url": blob.public_url,
                 "key": blob_path,
                 "provider": "firebase",
                 "bucket": self.firebase_bucket,
-                "size": len(file_data),
+                "size": stream.size,
+                "sha256": stream.sha256,
                 "content_type": content_type,
             }
             
+        except FileTooLargeError:
+            raise
         except Exception as e:
             logger.error(f"Firebase upload error: {e}")
             raise UploadError(f"Firebase upload failed: {e}")
@@ -250,19 +605,30 @@ class FirebaseStorageProvider(BaseStorageProvider):
         
         try:
             blob = self.bucket.blob(file_path)
-            blob.delete()
+            await run_io(blob.delete)
             return True
         except Exception as e:
             logger.error(f"Firebase delete error: {e}")
             return False
     
+    async def download(self, file_path: str) -> bytes:
+        if not self.is_available():
+            raise StorageError("Firebase Storage not configured")
+        
+        try:
+            return await run_io(self.bucket.blob(file_path).download_as_bytes)
+        except Exception as e:
+            logger.error(f"Firebase download error: {e}")
+            raise DownloadError(f"Firebase download failed: {e}")
+    
     async def get_url(self, file_path: str, expires_in: int = 3600) -> str:
         if not self.is_available():
             raise StorageError("Firebase Storage not configured")
         
         try:
             blob = self.bucket.blob(file_path)
-            url = blob.generate_signed_url(
+            url = await run_io(
+                blob.generate_signed_url,
                 expiration=timedelta(seconds=expires_in)
             )
             return url
@@ -291,54 +657,68 @@ class LocalStorageProvider(BaseStorageProvider):
     def is_available(self) -> bool:
         return True  # Always available
     
-    async def upload(
-        self, 
-        file_data: bytes, 
-        filename: str, 
+    async def upload_stream(
+        self,
+        stream: HashingStream,
+        filename: str,
         content_type: str,
-        folder: str = "uploads"
+        folder: str = "uploads",
+        key: Optional[str] = None
     ) -> Dict[str, Any]:
+        # Generate unique relative path
+        relative_path = key or _object_key(folder, filename)
+        file_path = self.storage_path / relative_path
+        # Write under a temporary name so readers never see a partial file
+        part_path = file_path.with_name(file_path.name + ".part")
+        
         try:
-            # Generate unique path
-            ext = Path(filename).suffix
-            unique_name = f"{uuid.uuid4().hex}{ext}"
-            date_folder = datetime.now().strftime('%Y/%m/%d')
-            
             # Create directory structure
-            target_dir = self.storage_path / folder / date_folder
-            target_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Save file
-            file_path = target_dir / unique_name
-            file_path.write_bytes(file_data)
+            await run_io(file_path.parent.mkdir, parents=True, exist_ok=True)
             
-            # Generate relative path
-            relative_path = f"{folder}/{date_folder}/{unique_name}"
+            # Save file chunk by chunk
+            fh = await run_io(open, part_path, "wb")
+            try:
+                async for chunk in stream:
+                    await run_io(fh.write, chunk)
+            finally:
+                await run_io(fh.close)
+            await run_io(os.replace, part_path, file_path)
             
             return {
                 "url": f"{self.base_url}/{relative_path}",
                 "key": relative_path,
                 "provider": "local",
                 "path": str(file_path.absolute()),
-                "size": len(file_data),
+                "size": stream.size,
+                "sha256": stream.sha256,
                 "content_type": content_type,
             }
             
-        except Exception as e:
+        except BaseException as e:
+            await run_io(part_path.unlink, missing_ok=True)
+            if isinstance(e, FileTooLargeError) or not isinstance(e, Exception):
+                raise
             logger.error(f"Local storage error: {e}")
             raise UploadError(f"Local storage failed: {e}")
     
     async def delete(self, file_path: str) -> bool:
         try:
             full_path = self.storage_path / file_path
-            if full_path.exists():
-                full_path.unlink()
+            if await run_io(full_path.exists):
+                await run_io(full_path.unlink)
                 return True
             return False
         except Exception as e:
             logger.error(f"Local delete error: {e}")
             return False
     
+    async def download(self, file_path: str) -> bytes:
+        try:
+            return await run_io((self.storage_path / file_path).read_bytes)
+        except Exception as e:
+            logger.error(f"Local download error: {e}")
+            raise DownloadError(f"Local download failed: {e}")
+    
     async def get_url(self, file_path: str, expires_in: int = 3600) -> str:
         # Local files don't expire
         return f"{self.base_url}/{file_path}"
@@ -352,6 +732,12 @@ class StorageService:
     """
     Storage service with automatic fallback.
     Priority: S3 → Firebase → Local
+    
+    With STORAGE_DEDUP_ENABLED, files are content-addressed: reference-
+    counted by SHA-256 in the content index, so repeat uploads of identical
+    bytes all share the first stored copy. Every copy is written under its
+    own unique key, so deleting the last reference never races a re-upload
+    of the same bytes.
     """
     
     def __init__(self):
@@ -360,6 +746,7 @@ class StorageService:
             ("firebase", FirebaseStorageProvider()),
             ("local", LocalStorageProvider()),
         ]
+        self.index = get_content_index()
     
     def get_available_provider(self) -> tuple:
         """Get the first available provider."""
@@ -383,22 +770,49 @@ class StorageService:
             file_data: File contents as bytes
             filename: Original filename
             content_type: MIME type (auto-detected if not provided)
-            folder: Folder to upload to
+            folder: Folder to upload to (a duplicate resolves to the existing file)
             preferred_provider: Specific provider to use
             
         Returns:
-            Dict with url, key, provider, size, content_type
+            Dict with url, key, provider, size, sha256, content_type
+            (plus deduplicated and ref_count in content-addressed mode)
         """
         # Auto-detect content type
         if not content_type:
             content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
         
+        if settings.storage_dedup_enabled:
+            # The bytes are in memory, so check the index before uploading
+            digest = (await run_io(hashlib.sha256, file_data)).hexdigest()
+            existing = await self.index.acquire(digest)
+            if existing:
+                return existing
+        
+        result = await self._upload_replayable(
+            lambda: iter_bytes(file_data), filename, content_type, folder, preferred_provider
+        )
+        if settings.storage_dedup_enabled:
+            result = await self._index_upload(result)
+        self._queue_derived(result, file_data)
+        return result
+    
+    async def _upload_replayable(
+        self,
+        open_chunks: Callable[[], AsyncIterator[bytes]],
+        filename: str,
+        content_type: str,
+        folder: str,
+        preferred_provider: Optional[str]
+    ) -> Dict[str, Any]:
+        """Upload from a re-openable source, falling back across providers."""
         # Try preferred provider first
         if preferred_provider:
             for name, provider in self.providers:
                 if name == preferred_provider and provider.is_available():
                     try:
-                        return await provider.upload(file_data, filename, content_type, folder)
+                        return await provider.upload_stream(
+                            HashingStream(open_chunks()), filename, content_type, folder
+                        )
                     except UploadError:
                         logger.warning(f"Preferred provider {name} failed, trying fallbacks")
                         break
@@ -411,8 +825,9 @@ class StorageService:
             
             try:
                 logger.info(f"Uploading to {name}")
-                result = await provider.upload(file_data, filename, content_type, folder)
-                return result
+                return await provider.upload_stream(
+                    HashingStream(open_chunks()), filename, content_type, folder
+                )
             except UploadError as e:
                 errors.append(f"{name}: {e}")
                 logger.warning(f"Provider {name} failed, trying next")
@@ -420,12 +835,257 @@ class StorageService:
         
         raise UploadError(f"All providers failed: {'; '.join(errors)}")
     
+    async def upload_stream(
+        self,
+        chunks: AsyncIterable[bytes],
+        filename: str,
+        content_type: Optional[str] = None,
+        folder: str = "uploads",
+        preferred_provider: Optional[str] = None,
+        max_bytes: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Upload an async stream of byte chunks without buffering the file.
+        
+        The stream goes straight to the first available provider. When
+        another provider is available to fall back to, every chunk is also
+        copied to a temp spool file as it passes; if the provider fails,
+        the rest of the stream is read into the spool and the fallback
+        providers upload from it. In content-addressed mode the stream is
+        spooled and hashed first instead, and only uploaded if the same
+        bytes aren't stored yet (a duplicate is a metadata-only update).
+        
+        Args:
+            chunks: Async iterator of bytes (e.g. iter_upload_file(upload))
+            filename: Original filename
+            content_type: MIME type (auto-detected if not provided)
+            folder: Folder to upload to (a duplicate resolves to the existing file)
+            preferred_provider: Specific provider to use
+            max_bytes: Size limit, enforced while streaming
+            
+        Returns:
+            Dict with url, key, provider, size, sha256, content_type
+            (plus deduplicated and ref_count in content-addressed mode)
+            
+        Raises:
+            FileTooLargeError: Stream exceeded max_bytes (partial data removed)
+            EmptyUploadError: Stream contained no data
+            UploadError: Upload failed
+        """
+        if not content_type:
+            content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        
+        if settings.storage_dedup_enabled:
+            return await self._upload_stream_deduplicated(
+                chunks, filename, content_type, folder, preferred_provider, max_bytes
+            )
+        
+        # Preferred provider first, then the usual priority order
+        ordered = sorted(self.providers, key=lambda item: item[0] != preferred_provider)
+        available = [(name, provider) for name, provider in ordered if provider.is_available()]
+        if not available:
+            raise StorageError("No storage providers available")
+        
+        # A stream can only be read once: tee it to disk if a fallback may need it
+        spool = SpoolingStream(chunks) if len(available) > 1 else None
+        stream = HashingStream(spool or chunks, max_bytes)
+        
+        errors = []
+        try:
+            for attempt, (name, provider) in enumerate(available):
+                try:
+                    if attempt == 0:
+                        logger.info(f"Streaming upload to {name}")
+                        result = await provider.upload_stream(stream, filename, content_type, folder)
+                    else:
+                        logger.info(f"Uploading spooled copy to {name}")
+                        result = await provider.upload_stream(
+                            HashingStream(iter_file(spool.path)), filename, content_type, folder
+                        )
+                    break
+                except FileTooLargeError:
+                    raise
+                except UploadError as e:
+                    errors.append(f"{name}: {e}")
+                    if spool is None:
+                        raise UploadError(f"Streaming upload failed: {'; '.join(errors)}")
+                    if attempt == 0:
+                        # Read what the provider didn't into the spool
+                        async for _ in stream:
+                            pass
+                        await spool.close()
+                        if not stream.size:
+                            raise EmptyUploadError("Empty file")
+                    logger.warning(f"Provider {name} failed, trying next")
+            else:
+                raise UploadError(f"All providers failed: {'; '.join(errors)}")
+        finally:
+            if spool is not None:
+                await spool.cleanup()
+        
+        if not stream.size:
+            await provider.delete(result["key"])
+            raise EmptyUploadError("Empty file")
+        
+        logger.info(f"Uploaded {stream.size} bytes to {name}: {result['key']}")
+        self._queue_derived(result)
+        return result
+    
+    async def _upload_stream_deduplicated(
+        self,
+        chunks: AsyncIterable[bytes],
+        filename: str,
+        content_type: str,
+        folder: str,
+        preferred_provider: Optional[str],
+        max_bytes: Optional[int]
+    ) -> Dict[str, Any]:
+        """
+        upload_stream() in content-addressed mode.
+        
+        The hash is only known once the stream has been read, so it is
+        spooled to disk first; a duplicate then never reaches a provider,
+        and a new file is uploaded from the spool (with the usual fallback).
+        """
+        stream = HashingStream(chunks, max_bytes)
+        path = await spool_stream_to_temp(stream)
+        try:
+            if not stream.size:
+                raise EmptyUploadError("Empty file")
+            
+            existing = await self.index.acquire(stream.sha256)
+            if existing:
+                return existing
+            
+            result = await self._upload_replayable(
+                lambda: iter_file(path), filename, content_type, folder, preferred_provider
+            )
+        finally:
+            await run_io(os.unlink, path)
+        
+        logger.info(f"Uploaded {stream.size} bytes to {result['provider']}: {result['key']}")
+        result = await self._index_upload(result)
+        self._queue_derived(result)
+        return result
+    
+    async def _index_upload(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Record a freshly stored file in the content index.
+        
+        If the same bytes were indexed since the lookup before the upload
+        (a concurrent upload), the new copy is deleted and the indexed file
+        is returned with its reference count bumped.
+        """
+        indexed = await self.index.acquire(result["sha256"], uploaded=True)
+        if not indexed:
+            indexed = await self.index.register(result)
+        if indexed["provider"] == result["provider"] and indexed["key"] == result["key"]:
+            return indexed
+        
+        prov = self._provider(result["provider"])
+        if not await prov.delete(result["key"]):
+            logger.warning(f"Could not remove duplicate copy {result['provider']}/{result['key']}")
+        return indexed
+    
     async def delete(self, file_key: str, provider: str) -> bool:
-        """Delete a file from the specified provider."""
-        for name, prov in self.providers:
-            if name == provider:
-                return await prov.delete(file_key)
-        return False
+        """
+        Delete a file from the specified provider.
+        
+        Content-addressed files are shared: this drops one reference and
+        only removes the stored file when no references remain. If the
+        content index can't be consulted the file is left in place.
+        """
+        if settings.storage_dedup_enabled:
+            try:
+                remaining = await self.index.release(provider, file_key)
+            except ContentIndexError:
+                logger.error(f"Not deleting {provider}/{file_key}: reference count unknown")
+                return False
+            if remaining:
+                logger.info(f"Released {provider}/{file_key}; {remaining} reference(s) remain")
+                return True
+        
+        prov = self._provider(provider)
+        if prov is None:
+            return False
+        
+        deleted = await prov.delete(file_key)
+        if deleted:
+            from services.derived_assets import pop_derived_assets
+            for derived in await pop_derived_assets(provider, file_key):
+                await prov.delete(derived)
+        return deleted
+    
+    # ===========================================
+    # Derived assets (thumbnail / moderation JPEG / WebP)
+    # ===========================================
+    
+    def _provider(self, name: str) -> Optional[BaseStorageProvider]:
+        return next((prov for n, prov in self.providers if n == name), None)
+    
+    def _queue_derived(self, result: Dict[str, Any], file_data: Optional[bytes] = None) -> None:
+        """Queue rendition generation for a newly stored image (never blocks)."""
+        content_type = result.get("content_type") or ""
+        if (
+            not settings.derived_assets_enabled
+            or not content_type.startswith("image/")
+            or "svg" in content_type
+            or result.get("deduplicated")  # renditions already exist for the shared file
+        ):
+            return
+        
+        from services.derived_assets import get_derived_asset_worker, DerivedAssetJob
+        result["derived_pending"] = get_derived_asset_worker().enqueue(
+            DerivedAssetJob(
+                provider=result["provider"], key=result["key"], url=result.get("url"), data=file_data
+            )
+        )
+    
+    async def download(self, file_key: str, provider: str) -> bytes:
+        """Read a stored file from the specified provider."""
+        prov = self._provider(provider)
+        if prov is None:
+            raise StorageError(f"Provider {provider} not found")
+        return await prov.download(file_key)
+    
+    async def store_derived(
+        self,
+        provider: str,
+        key: str,
+        data: bytes,
+        content_type: str
+    ) -> Dict[str, Any]:
+        """Store a rendition under an exact key on the original's provider."""
+        prov = self._provider(provider)
+        if prov is None:
+            raise StorageError(f"Provider {provider} not found")
+        return await prov.upload(data, key, content_type, key=key)
+    
+    async def get_derived(self, file_key: str, provider: str) -> Dict[str, Dict[str, Any]]:
+        """Renditions recorded for an original, by name (empty while pending)."""
+        from services.derived_assets import get_derived_assets
+        return await get_derived_assets(provider, file_key)
+    
+    async def download_rendition(self, url: str, rendition: str) -> Optional[bytes]:
+        """
+        Bytes of a rendition of the stored original at url, or None if url
+        isn't one of our uploads or has no such rendition (yet).
+        """
+        from services.derived_assets import find_renditions
+        try:
+            found = (await find_renditions([url], rendition)).get(url)
+            if found is None:
+                return None
+            return await self.download(found["key"], found["provider"])
+        except Exception as e:
+            logger.warning(f"Could not read {rendition} rendition of {url}: {e}")
+            return None
+    
+    async def savings_report(self) -> Dict[str, Any]:
+        """Storage saved by content-addressed deduplication."""
+        report = await self.index.report()
+        report["dedup_enabled"] = settings.storage_dedup_enabled
+        return report
     
     async def get_url(self, file_key: str, provider: str, expires_in: int = 3600) -> str:
         """Get URL for a file from the specified provider."""
@@ -7,25 +7,275 @@ Uses APScheduler to run background tasks for:
 3. Cleanup of expired media
 
 Lightweight and works without Redis (perfect for MVP).
+
+Due posts are dispatched concurrently: each post is published in its own
+task, bounded by a global cap and a per-platform cap (so a slow Instagram
+call never holds up Twitter). No transaction stays open across a platform
+API call.
+
+Posts fire from an in-memory min-heap of (scheduled_at, post_id) instead
+of a per-minute DB poll. The heap holds the queued posts of the next
+SCHEDULER_WINDOW_SECONDS (loaded in one indexed query, then again when the
+window runs out), /schedule keeps it current through track()/untrack(),
+and a single timer task sleeps until the earliest entry is due - so posts
+go out within about a second of scheduled_at. A slow reconciliation poll
+(SCHEDULER_CHECK_INTERVAL) re-reads the window as a safety net for rows
+changed outside the API.
+
+Several instances (uvicorn workers, pods) can run the scheduler against one
+database. Before publishing, an instance claims the post with a single
+conditional UPDATE (queued -> publishing, claimed_by, claimed_until); only
+the instance whose UPDATE matched the row publishes it. The status write is
+fenced on claimed_by, and a claim whose lease expired (crashed instance) is
+reclaimed by whichever instance's timer reaches it first. While a platform
+call is running its lease is renewed every third of SCHEDULER_LEASE_SECONDS,
+so a slow publish (an Instagram container can take minutes) never looks
+like a crash. Providers publish at most once per post's stable
+idempotency_key (see services/social/publish_receipts.py), so an attempt
+made after an earlier one already succeeded returns the earlier post.
+
+Failed publishes are retried through the same timer: a retryable failure
+puts the post back in the queue with next_attempt_at set by jittered
+exponential backoff (never sooner than the platform's Retry-After), and a
+post that still fails after SCHEDULER_MAX_ATTEMPTS is moved to dead_letter.
+Failures a retry can't fix (account not connected, ...) fail immediately.
+
+The per-post database round trips (load, claim, status write-back) go
+through BatchCoalescer, which merges the requests of concurrent publish
+tasks into one statement per batch: loads and claims issued in the same
+event-loop tick become one SELECT / UPDATE ... WHERE id IN (...), and
+outcomes are buffered and written back as one executemany UPDATE every
+SCHEDULER_STATUS_FLUSH_MS or SCHEDULER_STATUS_BATCH_SIZE rows. Each batch
+is its own short transaction, so the SQLite write lock is taken once per
+batch instead of once per post.
+
+Platform quotas are enforced by the rate governor
+(services/social/rate_governor.py). A claimed post whose account is over a
+quota - or that the platform answered with 429 - goes back in the queue
+for the earliest time it may go out, without using up an attempt.
 """
 import logging
 import asyncio
-from datetime import datetime, timezone
-from typing import Optional, List, Callable, Any
+import heapq
+import os
+import random
+import socket
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone, timedelta
+from typing import Optional, List, Callable, Awaitable, Any, Dict, Tuple
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy import select, and_
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, and_, or_, func, bindparam, literal, cast, String
 
 from config import settings
 from database import async_session_maker
 from models.schedule import ScheduledPost, ScheduleStatus
+from services.social.base import SocialPublishResult
+from services.social.rate_governor import get_rate_governor, is_throttled
 
 logger = logging.getLogger(__name__)
 
 
+def _as_utc(value: datetime) -> datetime:
+    """SQLite hands back naive datetimes (stored as UTC)."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Seconds to wait before retrying after the given (1-based) attempt.
+    
+    Exponential backoff with "equal jitter" (half fixed, half random), so
+    posts that failed together don't all retry together; never sooner than
+    the platform's Retry-After.
+    """
+    backoff = min(
+        settings.scheduler_retry_max_seconds,
+        settings.scheduler_retry_base_seconds * 2 ** max(0, attempt - 1),
+    )
+    delay = backoff / 2 + random.uniform(0, backoff / 2)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class PublishMetrics:
+    """
+    Rolling publish metrics.
+    
+    - latency: duration of the platform publish call
+    - lag: scheduled_at -> final status written (how late posts actually go out)
+    - backlog: due posts waiting for a slot or being published
+    """
+    
+    def __init__(self, window: int = 1000):
+        self.latency_ms: deque = deque(maxlen=window)
+        self.lag_seconds: deque = deque(maxlen=window)
+        self.published: Counter = Counter()
+        self.failed: Counter = Counter()
+        self.retried: Counter = Counter()
+        self.dead_lettered: Counter = Counter()
+        self.deferred: Counter = Counter()
+        self.claim_conflicts = 0
+        self.waiting = 0
+        self.last_check_due = 0
+        self.last_check_at: Optional[datetime] = None
+    
+    def record(self, platform: str, status: str, latency_ms: float, lag_seconds: float) -> None:
+        self.latency_ms.append(latency_ms)
+        if status == ScheduleStatus.QUEUED.value:
+            self.retried[platform] += 1
+            return
+        if status == ScheduleStatus.PUBLISHED.value:
+            self.published[platform] += 1
+        elif status == ScheduleStatus.DEAD_LETTER.value:
+            self.dead_lettered[platform] += 1
+        else:
+            self.failed[platform] += 1
+        self.lag_seconds.append(lag_seconds)
+    
+    @staticmethod
+    def _percentile(values: deque, pct: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 2)
+    
+    def snapshot(self, in_flight: int) -> Dict[str, Any]:
+        return {
+            "published": dict(self.published),
+            "failed": dict(self.failed),
+            "retried": dict(self.retried),
+            "dead_lettered": dict(self.dead_lettered),
+            "deferred": dict(self.deferred),
+            "claim_conflicts": self.claim_conflicts,
+            "latency_ms": {
+                "p50": self._percentile(self.latency_ms, 0.50),
+                "p95": self._percentile(self.latency_ms, 0.95),
+                "max": self._percentile(self.latency_ms, 1.0),
+            },
+            "lag_seconds": {
+                "p50": self._percentile(self.lag_seconds, 0.50),
+                "p95": self._percentile(self.lag_seconds, 0.95),
+                "max": self._percentile(self.lag_seconds, 1.0),
+            },
+            "backlog": {
+                "in_flight": in_flight,
+                "waiting_for_slot": self.waiting,
+                "due_at_last_check": self.last_check_due,
+                "last_check_at": self.last_check_at.isoformat() if self.last_check_at else None,
+            },
+        }
+
+
+class BatchCoalescer:
+    """
+    Merges concurrent single-item requests into batched calls.
+    
+    submit(item) waits for the result of the batch containing the item. A
+    batch runs once it reaches max_size, or `delay` seconds after its first
+    item (delay 0: on the next event-loop iteration, i.e. it collects
+    everything submitted in the same tick). Batches run one at a time, each
+    through run_batch(items) -> results in the same order (or None).
+    """
+    
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], Awaitable[Optional[List[Any]]]],
+        max_size: int,
+        delay: float = 0.0,
+    ):
+        self._run_batch = run_batch
+        self.max_size = max(1, max_size)
+        self.delay = delay
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock = asyncio.Lock()
+        self._tasks: set = set()
+        self.batches = 0
+        self.items = 0
+    
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        
+        if len(self._pending) >= self.max_size:
+            self._flush_soon()
+        elif self._timer is None:
+            self._timer = (
+                loop.call_later(self.delay, self._flush_soon) if self.delay > 0
+                else loop.call_soon(self._flush_soon)
+            )
+        return await future
+    
+    def _flush_soon(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _flush(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        async with self._lock:
+            try:
+                results = await self._run_batch([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        
+        self.batches += 1
+        self.items += len(batch)
+        for i, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(results[i] if results is not None else None)
+    
+    async def drain(self) -> None:
+        """Run everything pending and wait for in-progress batches."""
+        self._flush_soon()
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch": round(self.items / self.batches, 1) if self.batches else 0,
+        }
+
+
+# Status write-back, executed once per buffered outcome (executemany).
+# Bind names must differ from column names in an UPDATE's SET clause.
+_status_update = (
+    update(ScheduledPost.__table__)
+    .where(
+        ScheduledPost.__table__.c.id == bindparam("b_id"),
+        ScheduledPost.__table__.c.claimed_by == bindparam("b_claimed_by"),
+    )
+    .values(
+        status=bindparam("b_status"),
+        attempts=bindparam("b_attempts"),
+        published_at=bindparam("b_published_at"),
+        external_post_id=bindparam("b_external_post_id"),
+        next_attempt_at=bindparam("b_next_attempt_at"),
+        last_error=bindparam("b_last_error"),
+        claimed_by=None,
+        claimed_until=None,
+    )
+)
+
+
 class TaskSchedulerService:
     """
     Background task scheduler using APScheduler.
@@ -36,6 +286,36 @@ class TaskSchedulerService:
         self.scheduler = AsyncIOScheduler()
         self.is_running = False
         self._social_services = {}
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        
+        # post_id -> publish task (also guards against double dispatch)
+        self._in_flight: Dict[int, asyncio.Task] = {}
+        self._global_slots: Optional[asyncio.Semaphore] = None
+        self._platform_slots: Dict[str, asyncio.Semaphore] = {}
+        self.metrics = PublishMetrics()
+        self.rate_governor = get_rate_governor()
+        
+        # Batched DB round trips shared by all publish tasks
+        self._loads = BatchCoalescer(self._load_batch, max_size=500)
+        self._claims = BatchCoalescer(self._claim_batch, max_size=500)
+        self.status_writes = BatchCoalescer(
+            self._write_status_batch,
+            max_size=settings.scheduler_status_batch_size,
+            delay=settings.scheduler_status_flush_ms / 1000,
+        )
+        self.lost_claims = 0
+        
+        # Posts in a platform call right now; their leases are renewed
+        self._publishing: set = set()
+        self._lease_task: Optional[asyncio.Task] = None
+        
+        # Upcoming posts: heap of (timestamp, post_id); _due holds each
+        # post's current timestamp, heap entries that don't match are stale
+        self._heap: List[Tuple[float, int]] = []
+        self._due: Dict[int, float] = {}
+        self._horizon = 0.0  # end of the loaded window (epoch seconds)
+        self._wakeup = asyncio.Event()
+        self._timer_task: Optional[asyncio.Task] = None
     
     def start(self):
         """Start the scheduler."""
@@ -43,12 +323,15 @@ class TaskSchedulerService:
             logger.warning("Scheduler already running")
             return
         
-        # Add job to check for pending posts every minute
+        # Timer task fires posts as they come due (loads its first window on start)
+        self._timer_task = asyncio.create_task(self._run_timer(), name="schedule-timer")
+        
+        # Reconciliation poll: re-read upcoming posts from the DB
         self.scheduler.add_job(
             self._check_pending_posts,
-            IntervalTrigger(seconds=60),
+            IntervalTrigger(seconds=max(1, settings.scheduler_check_interval)),
             id="check_pending_posts",
-            name="Check and publish pending posts",
+            name="Reconcile upcoming posts with the database",
             replace_existing=True,
         )
         
@@ -61,6 +344,24 @@ class TaskSchedulerService:
             replace_existing=True,
         )
         
+        # Drop quota events older than every rate window
+        self.scheduler.add_job(
+            self._prune_quota_events,
+            IntervalTrigger(hours=1),
+            id="prune_quota_events",
+            name="Prune expired rate quota events",
+            replace_existing=True,
+        )
+        
+        # Drop publish receipts older than any retry
+        self.scheduler.add_job(
+            self._prune_publish_receipts,
+            CronTrigger(hour=4, minute=30),
+            id="prune_publish_receipts",
+            name="Prune old publish receipts",
+            replace_existing=True,
+        )
+        
         # Add job to cleanup old uploads weekly
         self.scheduler.add_job(
             self._cleanup_old_uploads,
@@ -80,85 +381,565 @@ class TaskSchedulerService:
             return
         
         self.scheduler.shutdown(wait=True)
+        if self._timer_task:
+            self._timer_task.cancel()
+            self._timer_task = None
+        self._heap.clear()
+        self._due.clear()
+        self._horizon = 0.0
         self.is_running = False
         logger.info("Task scheduler stopped")
     
+    async def finish_in_flight(self, timeout: float) -> None:
+        """
+        Wait up to `timeout` seconds for publishes already in flight, then
+        cancel the rest (call after stop(), before draining status writes).
+        
+        A cancelled post keeps its claim; the lease is no longer renewed,
+        so it expires and the post is retried, and the publish receipt
+        prevents a duplicate if the platform call had gone through.
+        """
+        tasks = list(self._in_flight.values())
+        if tasks:
+            logger.info(f"Waiting for {len(tasks)} in-flight publishes")
+            _, pending = await asyncio.wait(tasks, timeout=max(0.0, timeout))
+            if pending:
+                logger.warning(f"Cancelling {len(pending)} publishes still running after {timeout:.0f}s")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        if self._lease_task:
+            self._lease_task.cancel()
+            self._lease_task = None
+    
     def register_social_service(self, platform: str, service: Any):
         """Register a social media service for publishing."""
         self._social_services[platform.lower()] = service
         logger.info(f"Registered social service: {platform}")
     
+    def _slots(self, platform: str) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        """Global and per-platform concurrency slots (created on first use)."""
+        if self._global_slots is None:
+            self._global_slots = asyncio.Semaphore(max(1, settings.scheduler_max_concurrency))
+        if platform not in self._platform_slots:
+            limit = settings.scheduler_platform_limits.get(
+                platform, settings.scheduler_platform_default_concurrency
+            )
+            self._platform_slots[platform] = asyncio.Semaphore(max(1, limit))
+        return self._global_slots, self._platform_slots[platform]
+    
+    @asynccontextmanager
+    async def publish_slot(self, platform: str):
+        """
+        Hold a publish slot for a platform outside the scheduler (e.g.
+        immediate publishes), sharing the limits scheduled posts use.
+        """
+        global_slots, platform_slots = self._slots(platform.lower())
+        async with platform_slots, global_slots:
+            yield
+    
+    def track(self, post_id: int, scheduled_at: datetime) -> None:
+        """
+        Add or move a queued post in the timer (called after /schedule
+        commits). Posts beyond the loaded window are picked up when the
+        window reaches them.
+        """
+        if not self.is_running:
+            return
+        
+        timestamp = _as_utc(scheduled_at).timestamp()
+        if timestamp > self._horizon:
+            self._due.pop(post_id, None)
+            return
+        
+        self._due[post_id] = timestamp
+        heapq.heappush(self._heap, (timestamp, post_id))
+        self._wakeup.set()
+    
+    def untrack(self, post_id: int) -> None:
+        """Drop a post from the timer (cancelled or published elsewhere)."""
+        # Its heap entry goes stale and is skipped when popped
+        self._due.pop(post_id, None)
+    
+    async def _load_window(self) -> None:
+        """Load queued posts due before now + window into the timer."""
+        now = datetime.now(timezone.utc)
+        horizon = now.timestamp() + max(1, settings.scheduler_window_seconds)
+        
+        try:
+            async with async_session_maker() as db:
+                window_end = datetime.fromtimestamp(horizon, timezone.utc)
+                # Queued posts by scheduled_at (or next retry); claimed ones
+                # by lease expiry (reclaimed if their instance never finishes)
+                result = await db.execute(
+                    select(
+                        ScheduledPost.id,
+                        func.coalesce(
+                            ScheduledPost.claimed_until,
+                            ScheduledPost.next_attempt_at,
+                            ScheduledPost.scheduled_at,
+                        ),
+                    ).where(
+                        or_(
+                            and_(
+                                ScheduledPost.status == ScheduleStatus.QUEUED.value,
+                                ScheduledPost.scheduled_at <= window_end,
+                                or_(
+                                    ScheduledPost.next_attempt_at.is_(None),
+                                    ScheduledPost.next_attempt_at <= window_end,
+                                ),
+                            ),
+                            and_(
+                                ScheduledPost.status == ScheduleStatus.PUBLISHING.value,
+                                ScheduledPost.claimed_until <= window_end,
+                            ),
+                        )
+                    )
+                )
+                rows = result.all()
+        except Exception as e:
+            logger.error(f"Error loading upcoming posts: {e}")
+            # Try again shortly rather than waiting a whole window
+            self._horizon = now.timestamp() + 5
+            return
+        
+        # Merge rather than replace: entries tracked while the query ran
+        # stay, and _dispatch re-checks the status of anything stale
+        due_now = 0
+        for post_id, due_at in rows:
+            if isinstance(due_at, str):
+                # coalesce() loses the DateTime type on SQLite
+                due_at = datetime.fromisoformat(due_at)
+            timestamp = _as_utc(due_at).timestamp()
+            due_now += timestamp <= now.timestamp()
+            if self._due.get(post_id) != timestamp:
+                self._due[post_id] = timestamp
+                heapq.heappush(self._heap, (timestamp, post_id))
+        
+        self._horizon = horizon
+        self.metrics.last_check_due = due_now
+        self.metrics.last_check_at = now
+        logger.debug(f"Loaded {len(rows)} upcoming posts ({due_now} due)")
+    
     async def _check_pending_posts(self):
-        """Check for posts that need to be published."""
-        logger.debug("Checking for pending posts...")
+        """Reconciliation poll: re-read the window and wake the timer."""
+        logger.debug("Reconciling upcoming posts...")
+        await self._load_window()
+        self._wakeup.set()
+    
+    def _fire_due(self, now: float) -> int:
+        """Dispatch every tracked post due at `now`; returns how many."""
+        fired = 0
+        while self._heap and self._heap[0][0] <= now:
+            timestamp, post_id = heapq.heappop(self._heap)
+            if self._due.get(post_id) != timestamp:
+                continue  # moved or untracked
+            del self._due[post_id]
+            if post_id not in self._in_flight:
+                self._spawn(post_id)
+                fired += 1
+        if fired:
+            logger.info(f"Dispatching {fired} posts ({len(self._in_flight)} in flight)")
+        return fired
+    
+    async def _run_timer(self) -> None:
+        """Sleep until the next post is due (or the window ends), fire, repeat."""
+        while True:
+            try:
+                if time.time() >= self._horizon:
+                    await self._load_window()
+                
+                self._wakeup.clear()
+                now = time.time()
+                self._fire_due(now)
+                
+                wake_at = self._horizon
+                if self._heap:
+                    wake_at = min(wake_at, self._heap[0][0])
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, wake_at - now))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Schedule timer error: {e}")
+                await asyncio.sleep(1)
+    
+    def _spawn(self, post_id: int, allow_retry: bool = False) -> asyncio.Task:
+        """Start publishing a post in its own task."""
+        task = asyncio.create_task(self._dispatch(post_id, allow_retry))
+        self._in_flight[post_id] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(post_id, None))
+        return task
+    
+    def _claimable(self, allow_retry: bool, now: datetime):
+        """WHERE clause for posts this instance may claim."""
+        conditions = [
+            and_(
+                ScheduledPost.status == ScheduleStatus.QUEUED.value,
+                or_(
+                    ScheduledPost.next_attempt_at.is_(None),
+                    ScheduledPost.next_attempt_at <= now,
+                ),
+            ),
+            and_(
+                ScheduledPost.status == ScheduleStatus.PUBLISHING.value,
+                ScheduledPost.claimed_until < now,
+            ),
+        ]
+        if allow_retry:
+            conditions.append(
+                ScheduledPost.status.notin_([
+                    ScheduleStatus.PUBLISHED.value,
+                    ScheduleStatus.PUBLISHING.value,
+                ])
+            )
+        return or_(*conditions)
+    
+    async def _load_batch(self, post_ids: List[int]) -> List[Optional[ScheduledPost]]:
+        """Load several posts in one SELECT."""
+        async with async_session_maker() as db:
+            result = await db.execute(select(ScheduledPost).where(ScheduledPost.id.in_(post_ids)))
+            found = {post.id: post for post in result.scalars().all()}
+        return [found.get(post_id) for post_id in post_ids]
+    
+    async def _claim_batch(self, post_ids: List[int], allow_retry: bool = False) -> List[Optional[ScheduledPost]]:
+        """
+        Atomically claim several posts for this instance (one UPDATE).
+        
+        Returns:
+            The claimed post for each id, or None where it isn't claimable
+            (another instance holds it, it was published/cancelled, ...)
+        """
+        now = datetime.now(timezone.utc)
+        lease_until = now + timedelta(seconds=settings.scheduler_lease_seconds)
+        # Unique per row, set once, then reused by every later attempt
+        new_key = literal(f"{uuid.uuid4().hex[:16]}-") + cast(ScheduledPost.id, String)
         
         async with async_session_maker() as db:
+            await db.execute(
+                update(ScheduledPost)
+                .where(ScheduledPost.id.in_(post_ids), self._claimable(allow_retry, now))
+                .values(
+                    status=ScheduleStatus.PUBLISHING.value,
+                    claimed_by=self.instance_id,
+                    claimed_until=lease_until,
+                    attempts=ScheduledPost.attempts + 1,
+                    idempotency_key=func.coalesce(ScheduledPost.idempotency_key, new_key),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            # (claimed_by, claimed_until) identifies the rows this UPDATE took
+            result = await db.execute(
+                select(ScheduledPost).where(
+                    ScheduledPost.id.in_(post_ids),
+                    ScheduledPost.claimed_by == self.instance_id,
+                    ScheduledPost.claimed_until == lease_until,
+                )
+            )
+            claimed = {post.id: post for post in result.scalars().all()}
+            await db.commit()
+        return [claimed.get(post_id) for post_id in post_ids]
+    
+    async def _claim(self, post_id: int, allow_retry: bool = False) -> Optional[ScheduledPost]:
+        """Claim one post; scheduled dispatches share batched claims."""
+        if allow_retry:
+            return (await self._claim_batch([post_id], allow_retry=True))[0]
+        return await self._claims.submit(post_id)
+    
+    def _hold_lease(self, post_id: int) -> None:
+        """Keep renewing a claimed post's lease until _release_lease()."""
+        self._publishing.add(post_id)
+        if self._lease_task is None or self._lease_task.done():
+            self._lease_task = asyncio.create_task(self._renew_leases(), name="lease-heartbeat")
+    
+    def _release_lease(self, post_id: int) -> None:
+        self._publishing.discard(post_id)
+    
+    async def _renew_leases(self) -> None:
+        """
+        Lease heartbeat: while any post is being published, push the
+        claimed_until of all of them forward in one UPDATE every third of
+        the lease, so a publish that outlasts the lease isn't reclaimed.
+        """
+        lease = settings.scheduler_lease_seconds
+        while self._publishing:
+            await asyncio.sleep(max(0.1, lease / 3))
+            post_ids = list(self._publishing)
+            if not post_ids:
+                break
             try:
-                # Find posts that are due
-                now = datetime.now(timezone.utc)
-                query = select(ScheduledPost).where(
-                    and_(
-                        ScheduledPost.status == ScheduleStatus.QUEUED.value,
-                        ScheduledPost.scheduled_at <= now
+                async with async_session_maker() as db:
+                    result = await db.execute(
+                        update(ScheduledPost)
+                        .where(
+                            ScheduledPost.id.in_(post_ids),
+                            ScheduledPost.claimed_by == self.instance_id,
+                            ScheduledPost.status == ScheduleStatus.PUBLISHING.value,
+                        )
+                        .values(claimed_until=datetime.now(timezone.utc) + timedelta(seconds=lease))
+                        .execution_options(synchronize_session=False)
                     )
-                ).order_by(ScheduledPost.scheduled_at)
-                
-                result = await db.execute(query)
-                pending_posts = result.scalars().all()
-                
-                if not pending_posts:
-                    logger.debug("No pending posts to publish")
-                    return
-                
-                logger.info(f"Found {len(pending_posts)} posts to publish")
-                
-                for post in pending_posts:
-                    await self._publish_post(db, post)
-                
-                await db.commit()
-                
+                    await db.commit()
+                if result.rowcount is not None and 0 <= result.rowcount < len(post_ids):
+                    logger.warning(f"{len(post_ids) - result.rowcount} posts lost their claim while publishing")
             except Exception as e:
-                logger.error(f"Error checking pending posts: {e}")
-                await db.rollback()
+                logger.error(f"Lease renewal failed: {e}")
+    
+    async def _write_status_batch(self, posts: List[ScheduledPost]) -> None:
+        """Write back several outcomes (fenced on the claim) in one executemany UPDATE."""
+        async with async_session_maker() as db:
+            result = await db.execute(_status_update, [
+                {
+                    "b_id": post.id,
+                    "b_claimed_by": self.instance_id,
+                    "b_status": post.status,
+                    "b_attempts": post.attempts,
+                    "b_published_at": post.published_at,
+                    "b_external_post_id": post.external_post_id,
+                    "b_next_attempt_at": post.next_attempt_at,
+                    "b_last_error": post.last_error,
+                }
+                for post in posts
+            ])
+            await db.commit()
+        
+        # executemany reports the total; a shortfall means claims were lost
+        if result.rowcount is not None and 0 <= result.rowcount < len(posts):
+            lost = len(posts) - result.rowcount
+            self.lost_claims += lost
+            logger.warning(f"{lost} posts lost their claim before their status was saved")
+    
+    async def _dispatch(self, post_id: int, allow_retry: bool = False) -> Optional[ScheduledPost]:
+        """
+        Publish one post: claim it, call the platform outside any
+        transaction, then write the status (fenced on the claim).
+        
+        Args:
+            post_id: Post to publish
+            allow_retry: Also publish posts that are not QUEUED (manual trigger)
+        
+        Returns:
+            The post with its new status, or None if it was not publishable
+        """
+        post = await self._loads.submit(post_id)
+        if post is None:
+            return None
+        
+        platform = (post.platform or "demo").lower()
+        global_slots, platform_slots = self._slots(platform)
+        
+        # Platform slot first, so posts queued behind a slow platform
+        # don't hold global slots other platforms could use. The claim is
+        # taken only once a slot is free, so the lease covers the publish
+        # call and not the wait.
+        self.metrics.waiting += 1
+        acquired = False
+        try:
+            async with platform_slots, global_slots:
+                self.metrics.waiting -= 1
+                acquired = True
+                post = await self._claim(post_id, allow_retry)
+                if post is None:
+                    self.metrics.claim_conflicts += 1
+                    logger.debug(f"Post {post_id} not claimable; skipped")
+                    return None
+                
+                self._hold_lease(post_id)
+                try:
+                    service = self._social_services.get(platform)
+                    calls = service.api_calls_needed() if hasattr(service, "api_calls_needed") else 1
+                    reservation, wait = await self.rate_governor.acquire(platform, post.user_id, calls=calls)
+                    if reservation is not None:
+                        start = time.perf_counter()
+                        result = await self._publish_post(post)
+                        latency_ms = (time.perf_counter() - start) * 1000
+                        self.rate_governor.settle(reservation, result)
+                finally:
+                    self._release_lease(post_id)
+        finally:
+            if not acquired:
+                self.metrics.waiting -= 1
+        
+        if reservation is None:
+            # Over the account's quota: requeue for when a slot frees up
+            return await self._defer(post, platform, wait)
+        
+        if is_throttled(result):
+            # The account is blocked now; wait for the block, not a backoff
+            next_at = await self.rate_governor.next_available(platform, post.user_id)
+            return await self._defer(post, platform, (next_at - datetime.now(timezone.utc)).total_seconds())
+        
+        if post.status == ScheduleStatus.PUBLISHED.value or not result.retryable:
+            post.next_attempt_at = None
+        elif post.attempts >= settings.scheduler_max_attempts:
+            post.status = ScheduleStatus.DEAD_LETTER.value
+            post.next_attempt_at = None
+            logger.error(f"Post {post_id} dead-lettered after {post.attempts} attempts")
+        else:
+            delay = retry_delay(post.attempts, result.retry_after)
+            post.status = ScheduleStatus.QUEUED.value
+            post.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            logger.warning(f"Post {post_id} attempt {post.attempts} failed; retrying in {delay:.0f}s")
+        
+        try:
+            await self.status_writes.submit(post)
+            if post.status == ScheduleStatus.QUEUED.value:
+                # If the claim was lost the new owner's status wins; the
+                # extra timer entry then just fails to claim
+                self.track(post_id, post.next_attempt_at)
+        except Exception as e:
+            # The claim's lease expires and the post is picked up again
+            logger.error(f"Failed to save status for post {post_id}: {e}")
+        
+        self.metrics.record(
+            platform,
+            post.status,
+            latency_ms,
+            (datetime.now(timezone.utc) - _as_utc(post.scheduled_at)).total_seconds(),
+        )
+        return post
     
-    async def _publish_post(self, db: AsyncSession, post: ScheduledPost):
-        """Publish a scheduled post to its target platform."""
-        logger.info(f"Publishing post {post.id} to {post.platform or 'default'}")
+    async def _defer(self, post: ScheduledPost, platform: str, wait: float) -> ScheduledPost:
+        """
+        Put a claimed post back in the queue until its account's quota
+        allows it (not counted as an attempt).
+        """
+        post.status = ScheduleStatus.QUEUED.value
+        post.attempts = max(0, post.attempts - 1)
+        post.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=max(1.0, wait))
+        logger.info(f"Post {post.id}: {platform} quota reached; deferred to {post.next_attempt_at.isoformat()}")
+        
+        try:
+            await self.status_writes.submit(post)
+            self.track(post.id, post.next_attempt_at)
+        except Exception as e:
+            logger.error(f"Failed to save status for post {post.id}: {e}")
+        
+        self.metrics.deferred[platform] += 1
+        return post
+    
+    async def _publish_post(self, post: ScheduledPost) -> SocialPublishResult:
+        """
+        Publish a scheduled post to its target platform.
+        
+        Sets post.status (PUBLISHED or FAILED) / post.published_at /
+        post.last_error on the (detached) post; the caller decides on
+        retries and persists them.
+        
+        Returns:
+            The platform result (its retry hints drive the backoff)
+        """
+        logger.info(f"Publishing post {post.id} to {post.platform or 'default'} (attempt {post.attempts})")
+        platform = (post.platform or "demo").lower()
         
         try:
-            platform = (post.platform or "demo").lower()
-            
             # Check if we have a service for this platform
             if platform in self._social_services:
                 service = self._social_services[platform]
-                result = await service.publish(
+                # Providers skip the platform call for an already-published key
+                publish = getattr(service, "publish_once", service.publish)
+                result = await publish(
                     user_id=post.user_id,
                     content=post.description or post.title,
                     title=post.title,
+                    idempotency_key=post.idempotency_key,
                 )
                 
-                if result.get("success"):
-                    post.status = ScheduleStatus.PUBLISHED.value
-                    post.published_at = datetime.now(timezone.utc)
-                    logger.info(f"Post {post.id} published successfully to {platform}")
-                else:
-                    post.status = ScheduleStatus.FAILED.value
-                    logger.error(f"Post {post.id} failed: {result.get('error')}")
+                # Providers return SocialPublishResult; tolerate plain dicts
+                if isinstance(result, dict):
+                    result = SocialPublishResult(
+                        success=bool(result.get("success")),
+                        platform=platform,
+                        post_id=result.get("post_id"),
+                        error=result.get("error"),
+                    )
             else:
                 # Demo mode - simulate publishing
                 logger.info(f"Demo mode: Simulating publish for post {post.id}")
-                post.status = ScheduleStatus.PUBLISHED.value
-                post.published_at = datetime.now(timezone.utc)
+                result = SocialPublishResult(success=True, platform=platform)
                 
         except Exception as e:
             logger.error(f"Failed to publish post {post.id}: {e}")
+            result = SocialPublishResult(success=False, platform=platform, error=str(e))
+        
+        if result.success:
+            post.status = ScheduleStatus.PUBLISHED.value
+            post.published_at = datetime.now(timezone.utc)
+            post.external_post_id = result.post_id
+            post.last_error = None
+            logger.info(f"Post {post.id} published successfully to {platform}")
+        else:
             post.status = ScheduleStatus.FAILED.value
+            post.last_error = (result.error or "Unknown error")[:2000]
+            logger.error(f"Post {post.id} failed: {result.error}")
+        return result
     
     async def _refresh_oauth_tokens(self):
-        """Refresh OAuth tokens that are about to expire."""
+        """
+        Refresh OAuth tokens that expire within
+        SOCIAL_TOKEN_REFRESH_WINDOW_HOURS: one query for all of them, then
+        bounded concurrent refresh calls.
+        """
+        from services.social.token_store import get_token_store
+        from services.social.instagram_service import get_instagram_service
+        from services.social.linkedin_service import get_linkedin_service
+        
         logger.info("Checking for expiring OAuth tokens...")
-        # TODO: Implement token refresh logic
-        pass
+        providers = {
+            "instagram": get_instagram_service(),
+            "linkedin": get_linkedin_service(),
+            **self._social_services,
+        }
+        
+        try:
+            tokens = await get_token_store().expiring(
+                settings.social_token_refresh_window_hours * 3600,
+                platforms=list(providers),
+            )
+        except Exception as e:
+            logger.error(f"Error loading expiring tokens: {e}")
+            return
+        
+        if not tokens:
+            logger.info("No OAuth tokens due for refresh")
+            return
+        
+        slots = asyncio.Semaphore(max(1, settings.social_token_refresh_concurrency))
+        
+        async def refresh(token) -> bool:
+            async with slots:
+                try:
+                    # Pass the loaded token: expired ones can still be
+                    # refreshed, but get() no longer returns them
+                    return bool(await providers[token.platform].refresh_token(token.user_id, token))
+                except Exception as e:
+                    logger.warning(f"Refreshing {token.platform} token for user {token.user_id} failed: {e}")
+                    return False
+        
+        results = await asyncio.gather(*(refresh(token) for token in tokens))
+        logger.info(f"Refreshed {sum(results)}/{len(tokens)} expiring OAuth tokens")
+    
+    async def _prune_quota_events(self):
+        """Delete quota events no rate window looks at any more."""
+        try:
+            removed = await self.rate_governor.prune()
+            if removed:
+                logger.info(f"Pruned {removed} expired quota events")
+        except Exception as e:
+            logger.error(f"Quota event pruning failed: {e}")
+    
+    async def _prune_publish_receipts(self):
+        """Delete publish receipts older than RECEIPT_TTL_DAYS."""
+        from services.social.publish_receipts import prune_receipts
+        try:
+            removed = await prune_receipts()
+            if removed:
+                logger.info(f"Pruned {removed} old publish receipts")
+        except Exception as e:
+            logger.error(f"Publish receipt pruning failed: {e}")
     
     async def _cleanup_old_uploads(self):
         """Clean up old temporary uploads."""
@@ -177,39 +958,57 @@ class TaskSchedulerService:
                     "next_run": str(job.next_run_time) if job.next_run_time else None,
                 })
         
+        next_due = min(self._due.values()) if self._due else None
         return {
             "running": self.is_running,
+            "instance_id": self.instance_id,
             "jobs": jobs,
             "registered_platforms": list(self._social_services.keys()),
+            "timer": {
+                "tracked_posts": len(self._due),
+                "next_due": datetime.fromtimestamp(next_due, timezone.utc).isoformat() if next_due else None,
+                "window_ends": datetime.fromtimestamp(self._horizon, timezone.utc).isoformat() if self._horizon else None,
+            },
+            "metrics": self.metrics.snapshot(in_flight=len(self._in_flight)),
+            "rate_governor": self.rate_governor.stats(),
+            "batches": {
+                "loads": self._loads.stats(),
+                "claims": self._claims.stats(),
+                "status_writes": self.status_writes.stats(),
+                "lost_claims": self.lost_claims,
+            },
         }
     
     async def trigger_post_now(self, post_id: int) -> dict:
         """Manually trigger a post to be published immediately."""
-        async with async_session_maker() as db:
-            try:
-                result = await db.execute(
-                    select(ScheduledPost).where(ScheduledPost.id == post_id)
-                )
-                post = result.scalar_one_or_none()
-                
-                if not post:
-                    return {"success": False, "error": "Post not found"}
-                
-                if post.status == ScheduleStatus.PUBLISHED.value:
-                    return {"success": False, "error": "Post already published"}
-                
-                await self._publish_post(db, post)
-                await db.commit()
-                
-                return {
-                    "success": post.status == ScheduleStatus.PUBLISHED.value,
-                    "status": post.status,
-                    "published_at": str(post.published_at) if post.published_at else None,
-                }
-                
-            except Exception as e:
-                logger.error(f"Error triggering post: {e}")
-                return {"success": False, "error": str(e)}
+        try:
+            post = await self._loads.submit(post_id)
+            if not post:
+                return {"success": False, "error": "Post not found"}
+            
+            if post.status == ScheduleStatus.PUBLISHED.value:
+                return {"success": False, "error": "Post already published"}
+            
+            if post_id in self._in_flight:
+                return {"success": False, "error": "Post is already being published"}
+            
+            self.untrack(post_id)
+            post = await self._spawn(post_id, allow_retry=True)
+            if post is None:
+                return {"success": False, "error": "Post is no longer publishable"}
+            
+            return {
+                "success": post.status == ScheduleStatus.PUBLISHED.value,
+                "status": post.status,
+                "published_at": str(post.published_at) if post.published_at else None,
+                "attempts": post.attempts,
+                "next_attempt_at": str(post.next_attempt_at) if post.next_attempt_at else None,
+                "error": post.last_error,
+            }
+            
+        except Exception as e:
+            logger.error(f"Error triggering post: {e}")
+            return {"success": False, "error": str(e)}
 
 
 # ============================================
@@ -239,3 +1038,16 @@ def stop_scheduler():
     global _scheduler_service
     if _scheduler_service:
         _scheduler_service.stop()
+
+
+async def shutdown_scheduler():
+    """
+    Stop the scheduler and flush its state: in-flight publishes finish
+    (or are cancelled after SCHEDULER_SHUTDOWN_TIMEOUT), then buffered
+    status writes and quota events are written.
+    """
+    service = get_scheduler_service()
+    service.stop()
+    await service.finish_in_flight(settings.scheduler_shutdown_timeout)
+    await service.status_writes.drain()
+    await service.rate_governor.drain()
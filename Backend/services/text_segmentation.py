@@ -0,0 +1,218 @@
+"""
+Text Segmentation for ContentOS
+
+Splits long documents (blog posts, content calendars) into translatable
+units that fit provider request limits, and stitches translations back
+with the original layout.
+
+- Blank lines, indentation and Markdown markers (#, -, *, 1., >) are kept
+  verbatim; only the text after them is translated
+- Markdown tables keep their pipes and separator rows; each cell is
+  translated on its own
+- Fenced code blocks are never translated
+- Paragraphs over the limit are split on sentence boundaries, including
+  the Indic danda (। ॥), then packed into chunks under the byte limit
+
+Units are paragraph-sized, so with per-unit caching an edit to one
+paragraph only re-translates that paragraph.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Union
+
+# Sentence end: . ! ? danda, double danda (plus closing quotes/brackets),
+# followed by whitespace
+_SENTENCE_END = re.compile(r"(?<=[.!?।॥])[\"'”’)\]]*\s+")
+
+# Markdown line prefixes kept out of translation. Numbered markers are
+# capped at 3 digits so a line opening with a year ("2024. A big year")
+# stays prose.
+_LINE_PREFIX = re.compile(r"^(\s*(?:#{1,6}\s+|[-*+]\s+|\d{1,3}[.)]\s+|>\s*)+)")
+
+_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+@dataclass
+class Unit:
+    """A piece of text to translate."""
+    text: str
+
+
+Piece = Union[str, Unit]
+
+
+@dataclass
+class SegmentedDocument:
+    """Document as literal layout strings interleaved with translatable units."""
+    pieces: List[Piece] = field(default_factory=list)
+    
+    @property
+    def units(self) -> List[str]:
+        return [p.text for p in self.pieces if isinstance(p, Unit)]
+    
+    def reassemble(self, translations: List[str]) -> str:
+        """Rebuild the document with units replaced, in order."""
+        it = iter(translations)
+        return "".join(p if isinstance(p, str) else next(it) for p in self.pieces)
+
+
+def utf8_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences, keeping each sentence's trailing whitespace
+    so "".join(result) == text.
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        sentences.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+    return sentences
+
+
+def _hard_split(text: str, max_bytes: int) -> List[str]:
+    """Split an over-long sentence at word boundaries (or anywhere, as a last resort)."""
+    parts, current = [], ""
+    for word in re.findall(r"\S+\s*", text):
+        if current and utf8_len(current + word) > max_bytes:
+            parts.append(current)
+            current = ""
+        while utf8_len(word) > max_bytes:
+            cut = max_bytes // 4 or 1  # 4 bytes/char worst case
+            parts.append(word[:cut])
+            word = word[cut:]
+        current += word
+    if current:
+        parts.append(current)
+    return parts
+
+
+def chunk_text(text: str, max_bytes: int) -> List[str]:
+    """
+    Pack sentences into chunks of at most max_bytes (UTF-8).
+    
+    "".join(result) == text, so inter-sentence spacing survives.
+    """
+    if utf8_len(text) <= max_bytes:
+        return [text]
+    
+    chunks, current = [], ""
+    for sentence in split_sentences(text):
+        pieces = [sentence] if utf8_len(sentence) <= max_bytes else _hard_split(sentence, max_bytes)
+        for piece in pieces:
+            if current and utf8_len(current + piece) > max_bytes:
+                chunks.append(current)
+                current = ""
+            current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _add_text(doc: SegmentedDocument, text: str, max_bytes: int) -> None:
+    """Add text as unit(s), keeping surrounding whitespace as literals."""
+    stripped = text.strip()
+    if not stripped:
+        doc.pieces.append(text)
+        return
+    
+    lead = text[: len(text) - len(text.lstrip())]
+    trail = text[len(text.rstrip()):]
+    if lead:
+        doc.pieces.append(lead)
+    
+    for chunk in chunk_text(stripped, max_bytes):
+        body = chunk.rstrip()
+        doc.pieces.append(Unit(body))
+        if chunk[len(body):]:
+            doc.pieces.append(chunk[len(body):])
+    
+    if trail:
+        doc.pieces.append(trail)
+
+
+def _add_table_row(doc: SegmentedDocument, line: str, max_bytes: int) -> None:
+    """Translate each cell of a Markdown table row, keeping the pipes."""
+    for i, cell in enumerate(re.split(r"(?<!\\)\|", line)):
+        if i:
+            doc.pieces.append("|")
+        _add_text(doc, cell, max_bytes)
+
+
+def _is_table_row(line: str) -> bool:
+    stripped = line.strip()
+    return stripped.startswith("|") and stripped.count("|") >= 2
+
+
+def has_markdown_table(text: str) -> bool:
+    """True if text contains a table row followed by a separator row."""
+    previous = ""
+    for line in text.splitlines():
+        if _TABLE_SEPARATOR.match(line) and _is_table_row(previous):
+            return True
+        previous = line
+    return False
+
+
+def segment_document(text: str, max_bytes: int) -> SegmentedDocument:
+    """
+    Split a document into layout literals and translatable units.
+    
+    Args:
+        text: Plain text or Markdown
+        max_bytes: Max UTF-8 size of a unit (provider request limit)
+    """
+    doc = SegmentedDocument()
+    paragraph: List[str] = []  # consecutive plain lines, newlines included
+    in_fence = False
+    
+    def flush_paragraph() -> None:
+        if paragraph:
+            raw = "".join(paragraph)
+            body = raw.rstrip("\r\n")
+            _add_text(doc, body, max_bytes)
+            if raw[len(body):]:
+                doc.pieces.append(raw[len(body):])
+            paragraph.clear()
+    
+    for line in text.splitlines(keepends=True):
+        body = line.rstrip("\r\n")
+        newline = line[len(body):]
+        
+        if _FENCE.match(body):
+            flush_paragraph()
+            in_fence = not in_fence
+            doc.pieces.append(line)
+            continue
+        
+        if in_fence or not body.strip() or _TABLE_SEPARATOR.match(body):
+            flush_paragraph()
+            doc.pieces.append(line)
+            continue
+        
+        if _is_table_row(body):
+            flush_paragraph()
+            _add_table_row(doc, body, max_bytes)
+            doc.pieces.append(newline)
+            continue
+        
+        prefix = _LINE_PREFIX.match(body)
+        if prefix:
+            # Headings, list items and quotes are units of their own
+            flush_paragraph()
+            doc.pieces.append(prefix.group(0))
+            _add_text(doc, body[prefix.end():], max_bytes)
+            doc.pieces.append(newline)
+            continue
+        
+        # Consecutive plain lines form one paragraph unit
+        paragraph.append(line)
+    
+    flush_paragraph()
+    return doc
@@ -0,0 +1,380 @@
+"""
+Transcription Worker Pool for ContentOS
+
+Runs Whisper off the event loop in a dedicated thread pool:
+1. openai-whisper (PyTorch) - default, one model per worker thread
+2. faster-whisper (CTranslate2) - optional int8 CPU backend, shared model
+
+Both backends release the GIL inside their native kernels, so threads
+scale without the memory cost of one model copy per process.
+
+Every submission is tracked as a TranscriptionJob (status, progress,
+real-time factor), and per-backend RTF totals are exposed via stats().
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Optional, Dict, Any, List, Tuple, Union
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Whisper models expect 16 kHz mono float32
+SAMPLE_RATE = 16000
+
+AudioInput = Union[str, np.ndarray]
+
+
+class TranscriptionError(Exception):
+    """Raised when a transcription job fails or cannot be queued."""
+    pass
+
+
+class JobStatus(str, Enum):
+    """Transcription job lifecycle."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class TranscriptionJob:
+    """A single transcription request tracked by the pool."""
+    job_id: str
+    backend: str
+    model_size: str
+    language: Optional[str] = None
+    status: JobStatus = JobStatus.QUEUED
+    progress: float = 0.0
+    audio_duration: Optional[float] = None
+    processing_time: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    @property
+    def rtf(self) -> Optional[float]:
+        """Real-time factor (processing seconds per second of audio)."""
+        if self.processing_time is None or not self.audio_duration:
+            return None
+        return self.processing_time / self.audio_duration
+    
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.job_id,
+            "status": self.status.value,
+            "progress": round(self.progress, 3),
+            "backend": self.backend,
+            "model_size": self.model_size,
+            "audio_duration": self.audio_duration,
+            "processing_time": self.processing_time,
+            "rtf": round(self.rtf, 3) if self.rtf is not None else None,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class TranscriptionPool:
+    """
+    Bounded thread pool for Whisper transcription.
+    
+    Backend, model size and worker count come from settings
+    (WHISPER_BACKEND, WHISPER_MODEL_SIZE, WHISPER_WORKERS).
+    """
+    
+    BACKENDS = ("openai", "faster_whisper")
+    
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        model_size: Optional[str] = None,
+        workers: Optional[int] = None,
+    ):
+        self.backend = (backend or settings.whisper_backend).lower()
+        if self.backend not in self.BACKENDS:
+            logger.warning(f"Unknown Whisper backend '{self.backend}', using openai")
+            self.backend = "openai"
+        
+        self.model_size = model_size or settings.whisper_model_size
+        self.workers = max(1, workers or settings.whisper_workers)
+        self.max_queue = settings.whisper_max_queue
+        
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="whisper",
+        )
+        
+        # openai-whisper installs per-call decoder hooks, so each worker
+        # thread gets its own model; faster-whisper is safe to share
+        self._local = threading.local()
+        self._shared_model = None
+        self._model_lock = threading.Lock()
+        
+        self._jobs: "OrderedDict[str, TranscriptionJob]" = OrderedDict()
+        self._pending = 0
+        self._stats: Dict[str, Dict[str, float]] = {}
+    
+    # ===========================================
+    # Model loading (runs inside worker threads)
+    # ===========================================
+    
+    def _load_openai_model(self):
+        model = getattr(self._local, "model", None)
+        if model is None:
+            import whisper
+            model = whisper.load_model(self.model_size, device="cpu")
+            self._local.model = model
+            logger.info(
+                f"Whisper model '{self.model_size}' loaded in {threading.current_thread().name}"
+            )
+        return model
+    
+    def _load_faster_whisper_model(self):
+        if self._shared_model is None:
+            with self._model_lock:
+                if self._shared_model is None:
+                    from faster_whisper import WhisperModel
+                    self._shared_model = WhisperModel(
+                        self.model_size,
+                        device="cpu",
+                        compute_type=settings.whisper_compute_type,
+                        cpu_threads=settings.whisper_cpu_threads,
+                        num_workers=self.workers,
+                    )
+                    logger.info(
+                        f"faster-whisper model '{self.model_size}' loaded "
+                        f"({settings.whisper_compute_type}, {self.workers} workers)"
+                    )
+        return self._shared_model
+    
+    # ===========================================
+    # Backends (blocking, called in worker threads)
+    # ===========================================
+    
+    def _run_openai(self, job: TranscriptionJob, audio: AudioInput) -> Dict[str, Any]:
+        import whisper
+        
+        model = self._load_openai_model()
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+        job.audio_duration = len(audio) / SAMPLE_RATE
+        
+        options = {"task": "transcribe", "fp16": False}
+        if job.language:
+            options["language"] = job.language
+        
+        result = model.transcribe(audio, **options)
+        segments = [
+            {
+                "start": seg["start"],
+                "end": seg["end"],
+                "text": seg["text"].strip(),
+            }
+            for seg in result.get("segments", [])
+        ]
+        return {
+            "text": result["text"].strip(),
+            "segments": segments,
+            "language": result.get("language", "en"),
+        }
+    
+    def _run_faster_whisper(self, job: TranscriptionJob, audio: AudioInput) -> Dict[str, Any]:
+        model = self._load_faster_whisper_model()
+        
+        segments_iter, info = model.transcribe(
+            audio,
+            language=job.language,
+            task="transcribe",
+            beam_size=settings.whisper_beam_size,
+        )
+        job.audio_duration = info.duration
+        
+        # Segments are decoded lazily, which lets us report progress
+        segments = []
+        for seg in segments_iter:
+            segments.append({
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text.strip(),
+            })
+            if info.duration:
+                job.progress = min(seg.end / info.duration, 0.99)
+        
+        return {
+            "text": " ".join(s["text"] for s in segments).strip(),
+            "segments": segments,
+            "language": info.language or "en",
+        }
+    
+    def _execute(self, job: TranscriptionJob, audio: AudioInput) -> Dict[str, Any]:
+        """Worker-thread entry point."""
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        start = time.perf_counter()
+        
+        try:
+            if self.backend == "faster_whisper":
+                result = self._run_faster_whisper(job, audio)
+            else:
+                result = self._run_openai(job, audio)
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            raise
+        finally:
+            job.processing_time = time.perf_counter() - start
+            job.finished_at = datetime.utcnow()
+        
+        result["provider"] = "whisper" if self.backend == "openai" else "faster_whisper"
+        result["model_size"] = self.model_size
+        result["rtf"] = job.rtf
+        
+        job.result = result
+        job.progress = 1.0
+        job.status = JobStatus.COMPLETED
+        self._record(job)
+        return result
+    
+    def _record(self, job: TranscriptionJob) -> None:
+        stats = self._stats.setdefault(
+            self.backend,
+            {"jobs": 0, "audio_seconds": 0.0, "processing_seconds": 0.0},
+        )
+        stats["jobs"] += 1
+        stats["audio_seconds"] += job.audio_duration or 0.0
+        stats["processing_seconds"] += job.processing_time or 0.0
+    
+    # ===========================================
+    # Public API
+    # ===========================================
+    
+    def _track(self, job: TranscriptionJob) -> None:
+        self._jobs[job.job_id] = job
+        # Keep a bounded history of finished jobs
+        while len(self._jobs) > settings.whisper_job_history:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+                break
+            self._jobs.pop(oldest_id)
+    
+    def submit(
+        self,
+        audio: AudioInput,
+        language: Optional[str] = None,
+    ) -> Tuple[TranscriptionJob, "asyncio.Future"]:
+        """
+        Queue audio (file path or 16 kHz float32 array) for transcription.
+        
+        Must be called from the event loop. Returns the job and an awaitable
+        future resolving to the transcription dict.
+        
+        Raises:
+            TranscriptionError: If the queue is full
+        """
+        if self.max_queue and self._pending >= self.max_queue:
+            raise TranscriptionError(
+                f"Transcription queue full ({self._pending} pending)"
+            )
+        
+        job = TranscriptionJob(
+            job_id=str(uuid.uuid4()),
+            backend=self.backend,
+            model_size=self.model_size,
+            language=language,
+        )
+        self._track(job)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._execute, job, audio)
+        
+        self._pending += 1
+        
+        def _done(_):
+            self._pending -= 1
+        future.add_done_callback(_done)
+        
+        return job, future
+    
+    async def transcribe(
+        self,
+        audio: AudioInput,
+        language: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Transcribe and wait for the result."""
+        job, future = self.submit(audio, language)
+        result = await future
+        return {**result, "job_id": job.job_id}
+    
+    def get_job(self, job_id: str) -> Optional[TranscriptionJob]:
+        return self._jobs.get(job_id)
+    
+    def list_jobs(self) -> List[TranscriptionJob]:
+        return list(self._jobs.values())
+    
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration, queue depth and real-time factor per backend."""
+        rtf = {}
+        for backend, s in self._stats.items():
+            rtf[backend] = {
+                "jobs": int(s["jobs"]),
+                "audio_seconds": round(s["audio_seconds"], 2),
+                "processing_seconds": round(s["processing_seconds"], 2),
+                "rtf": (
+                    round(s["processing_seconds"] / s["audio_seconds"], 3)
+                    if s["audio_seconds"] else None
+                ),
+            }
+        
+        running = sum(1 for j in self._jobs.values() if j.status == JobStatus.RUNNING)
+        return {
+            "backend": self.backend,
+            "model_size": self.model_size,
+            "compute_type": settings.whisper_compute_type if self.backend == "faster_whisper" else "float32",
+            "workers": self.workers,
+            "pending": self._pending,
+            "running": running,
+            "queued": max(self._pending - running, 0),
+            "max_queue": self.max_queue,
+            "backends": rtf,
+        }
+    
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+_transcription_pool: Optional[TranscriptionPool] = None
+
+
+def get_transcription_pool() -> TranscriptionPool:
+    """Get or create the transcription pool singleton."""
+    global _transcription_pool
+    if _transcription_pool is None:
+        _transcription_pool = TranscriptionPool()
+    return _transcription_pool
+
+
+def shutdown_transcription_pool() -> None:
+    """Stop the worker pool if it was started."""
+    global _transcription_pool
+    if _transcription_pool is not None:
+        _transcription_pool.shutdown()
+        _transcription_pool = None
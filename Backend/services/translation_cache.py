@@ -0,0 +1,314 @@
+"""
+Translation Cache for ContentOS
+
+Two-tier cache in front of the translation providers:
+1. In-process LRU (OrderedDict) - microsecond hits for hot captions/hashtags
+2. SQLite table (translation_cache) - survives restarts, shared by workers
+
+Keys are sha256(provider, source, target, normalized text), so results
+from different providers never mix and one provider's entries can be
+invalidated on their own. Entries expire after TRANSLATION_CACHE_TTL_HOURS.
+
+The cache is strictly best-effort: database errors are logged and the
+request falls through to the provider.
+"""
+import hashlib
+import logging
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Tuple
+
+from sqlalchemy import select, delete, update
+
+from config import settings
+from database import async_session_maker
+from models.translation_cache import TranslationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used for cache keys (NFC, trimmed).
+    
+    Inner whitespace is kept: line breaks and indentation are part of the
+    layout the translation comes back with.
+    """
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def cache_key(text_digest: str, source_lang: str, target_lang: str, provider: str) -> str:
+    # "v2": keys since inner whitespace stopped being collapsed (older rows
+    # are never matched and age out with the TTL)
+    raw = f"v2\0{provider}\0{source_lang}\0{target_lang}\0{text_digest}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    LRU + persistent translation cache with hit-rate accounting.
+    """
+    
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl_hours: Optional[float] = None,
+        persistent: Optional[bool] = None,
+    ):
+        self.max_size = max_size or settings.translation_cache_size
+        self.ttl_seconds = (ttl_hours or settings.translation_cache_ttl_hours) * 3600
+        self.persistent = settings.translation_cache_persistent if persistent is None else persistent
+        
+        # key -> (translated_text, provider, source_lang, target_lang, expires_ts)
+        self._lru: "OrderedDict[str, Tuple[str, str, str, str, float]]" = OrderedDict()
+        
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+    
+    # ===========================================
+    # Lookup / store
+    # ===========================================
+    
+    def _lru_get(self, key: str) -> Optional[Tuple[str, str]]:
+        entry = self._lru.get(key)
+        if entry is None:
+            return None
+        if entry[4] <= time.time():
+            self._lru.pop(key, None)
+            return None
+        self._lru.move_to_end(key)
+        return entry[0], entry[1]
+    
+    def _lru_put(
+        self,
+        key: str,
+        translated_text: str,
+        provider: str,
+        source_lang: str,
+        target_lang: str,
+        expires_ts: float,
+    ) -> None:
+        self._lru[key] = (translated_text, provider, source_lang, target_lang, expires_ts)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+    
+    async def get(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        providers: List[str],
+    ) -> Optional[Dict[str, str]]:
+        """
+        Look up a cached translation.
+        
+        Args:
+            text: Source text (normalized internally)
+            source_lang: Source language code
+            target_lang: Target language code
+            providers: Acceptable providers in priority order
+        
+        Returns:
+            Dict with translated_text, provider and tier ("memory"/"db"), or None
+        """
+        digest = text_hash(text)
+        keys = [(cache_key(digest, source_lang, target_lang, p), p) for p in providers]
+        
+        for key, _ in keys:
+            hit = self._lru_get(key)
+            if hit:
+                self.memory_hits += 1
+                return {"translated_text": hit[0], "provider": hit[1], "tier": "memory"}
+        
+        if self.persistent:
+            entry = await self._db_get([k for k, _ in keys])
+            if entry:
+                self.db_hits += 1
+                expires_at = entry.expires_at
+                if expires_at.tzinfo is None:
+                    # SQLite hands back naive datetimes (stored as UTC)
+                    expires_at = expires_at.replace(tzinfo=timezone.utc)
+                self._lru_put(
+                    entry.cache_key, entry.translated_text, entry.provider,
+                    source_lang, target_lang, expires_at.timestamp(),
+                )
+                return {"translated_text": entry.translated_text, "provider": entry.provider, "tier": "db"}
+        
+        self.misses += 1
+        return None
+    
+    async def _db_get(self, keys: List[str]) -> Optional[TranslationCacheEntry]:
+        """Fetch the highest-priority unexpired row among keys and bump its hit count."""
+        try:
+            now = datetime.now(timezone.utc)
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(TranslationCacheEntry).where(
+                        TranslationCacheEntry.cache_key.in_(keys),
+                        TranslationCacheEntry.expires_at > now,
+                    )
+                )
+                rows = {row.cache_key: row for row in result.scalars().all()}
+                entry = next((rows[k] for k in keys if k in rows), None)
+                if entry:
+                    await session.execute(
+                        update(TranslationCacheEntry)
+                        .where(TranslationCacheEntry.cache_key == entry.cache_key)
+                        .values(
+                            hit_count=TranslationCacheEntry.hit_count + 1,
+                            last_hit_at=now,
+                        )
+                    )
+                    await session.commit()
+                return entry
+        except Exception as e:
+            logger.warning(f"Translation cache read failed: {e}")
+            return None
+    
+    async def set(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        provider: str,
+        translated_text: str,
+    ) -> None:
+        """Store a translation in both tiers."""
+        digest = text_hash(text)
+        key = cache_key(digest, source_lang, target_lang, provider)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        
+        self._lru_put(key, translated_text, provider, source_lang, target_lang, expires_at.timestamp())
+        
+        if not self.persistent:
+            return
+        
+        try:
+            async with async_session_maker() as session:
+                await session.merge(TranslationCacheEntry(
+                    cache_key=key,
+                    text_hash=digest,
+                    source_lang=source_lang,
+                    target_lang=target_lang,
+                    provider=provider,
+                    translated_text=translated_text,
+                    hit_count=0,
+                    expires_at=expires_at,
+                ))
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Translation cache write failed: {e}")
+    
+    # ===========================================
+    # Invalidation
+    # ===========================================
+    
+    async def invalidate(
+        self,
+        provider: Optional[str] = None,
+        source_lang: Optional[str] = None,
+        target_lang: Optional[str] = None,
+    ) -> int:
+        """
+        Drop cached entries matching all given filters (all entries if none).
+        
+        Use provider= after a provider upgrade or a bad deploy to force
+        re-translation of only that provider's results.
+        
+        Returns:
+            Number of persistent rows deleted
+        """
+        def _matches(entry) -> bool:
+            _, p, src, tgt, _ = entry
+            return (
+                (provider is None or p == provider)
+                and (source_lang is None or src == source_lang)
+                and (target_lang is None or tgt == target_lang)
+            )
+        
+        for key in [k for k, v in self._lru.items() if _matches(v)]:
+            del self._lru[key]
+        
+        if not self.persistent:
+            return 0
+        
+        stmt = delete(TranslationCacheEntry)
+        if provider:
+            stmt = stmt.where(TranslationCacheEntry.provider == provider)
+        if source_lang:
+            stmt = stmt.where(TranslationCacheEntry.source_lang == source_lang)
+        if target_lang:
+            stmt = stmt.where(TranslationCacheEntry.target_lang == target_lang)
+        
+        try:
+            async with async_session_maker() as session:
+                result = await session.execute(stmt)
+                await session.commit()
+                logger.info(f"Invalidated {result.rowcount} cached translations")
+                return result.rowcount or 0
+        except Exception as e:
+            logger.warning(f"Translation cache invalidation failed: {e}")
+            return 0
+    
+    async def purge_expired(self) -> int:
+        """Delete expired rows from the persistent tier."""
+        now = time.time()
+        for key in [k for k, v in self._lru.items() if v[4] <= now]:
+            del self._lru[key]
+        
+        if not self.persistent:
+            return 0
+        
+        try:
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    delete(TranslationCacheEntry).where(
+                        TranslationCacheEntry.expires_at <= datetime.now(timezone.utc)
+                    )
+                )
+                await session.commit()
+                return result.rowcount or 0
+        except Exception as e:
+            logger.warning(f"Translation cache purge failed: {e}")
+            return 0
+    
+    # ===========================================
+    # Stats
+    # ===========================================
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and hit rates since process start."""
+        hits = self.memory_hits + self.db_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": settings.translation_cache_enabled,
+            "persistent": self.persistent,
+            "memory_entries": len(self._lru),
+            "max_memory_entries": self.max_size,
+            "ttl_hours": self.ttl_seconds / 3600,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_hit_rate": round(self.memory_hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+_translation_cache: Optional[TranslationCache] = None
+
+
+def get_translation_cache() -> TranslationCache:
+    """Get or create the translation cache singleton."""
+    global _translation_cache
+    if _translation_cache is None:
+        _translation_cache = TranslationCache()
+    return _translation_cache
@@ -11,14 +11,23 @@ Supports 9 Indian languages + English:
 - English (en)
 
 Also handles TRANSLITERATED text (Indian languages in English script).
+Results are cached per (text, source, target, provider) in a two-tier
+LRU + SQLite cache.
+Long documents and Markdown tables are segmented and translated
+paragraph by paragraph (see text_segmentation).
 """
+import asyncio
 import logging
-from typing import Optional, Dict, Any, List
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
 from enum import Enum
 
-from langdetect import detect, LangDetectException
-
 from config import settings
+from utils.aws import create_boto3_client
+from services.translation_cache import get_translation_cache
+from services.language_detection import LanguageDetector, DetectionResult
+from services.text_segmentation import segment_document, has_markdown_table, utf8_len
 
 logger = logging.getLogger(__name__)
 
@@ -81,21 +90,43 @@ class TranslationService:
     
     def __init__(self):
         self.aws_client = None
+        self.cache = get_translation_cache()
+        
+        # Precompiled script/transliteration detector (langdetect fallback)
+        self.detector = LanguageDetector(
+            self.TRANSLITERATION_HINTS,
+            [lang.value for lang in SupportedLanguage],
+        )
+        
+        # GoogleTranslator keeps request params on the instance, so
+        # instances are reused per language pair *per worker thread*
+        self._local = threading.local()
         
         # Initialize AWS Translate if configured
         if settings.aws_configured and settings.use_aws_translate:
             try:
-                import boto3
-                self.aws_client = boto3.client(
-                    'translate',
-                    region_name=settings.aws_region,
-                    aws_access_key_id=settings.aws_access_key_id,
-                    aws_secret_access_key=settings.aws_secret_access_key,
-                )
+                # Pooled client: shared by concurrent batch worker threads
+                self.aws_client = create_boto3_client('translate')
                 logger.info("AWS Translate initialized")
             except Exception as e:
                 logger.warning(f"Failed to initialize AWS Translate: {e}")
     
+    @property
+    def provider_chain(self) -> List[str]:
+        """Providers that translate() will try, in priority order."""
+        chain = ["aws_translate"] if self.aws_client else []
+        chain.append("google_free")
+        return chain
+    
+    def detect(self, text: str) -> DetectionResult:
+        """
+        Detect language and transliteration in one pass.
+        
+        Returns:
+            DetectionResult with language, is_transliterated, method, confidence
+        """
+        return self.detector.detect(text)
+    
     def detect_language(self, text: str) -> str:
         """
         Detect the language of input text.
@@ -112,25 +143,7 @@ class TranslationService:
         Returns:
             ISO 639-1 language code
         """
-        text_lower = text.lower()
-        words = text_lower.split()
-        
-        # First, check for transliterated Indian language words
-        for lang_code, hints in self.TRANSLITERATION_HINTS.items():
-            matches = sum(1 for word in words if word in hints)
-            if matches >= 2:  # At least 2 matching words
-                logger.info(f"Detected transliterated {lang_code} (matched {matches} words)")
-                return lang_code
-        
-        # Fall back to standard detection
-        try:
-            detected = detect(text)
-            # Map to our supported languages
-            if detected in [lang.value for lang in SupportedLanguage]:
-                return detected
-            return "en"  # Default to English
-        except LangDetectException:
-            return "en"
+        return self.detector.detect(text).language
     
     def detect_transliteration(self, text: str) -> Optional[str]:
         """
@@ -139,14 +152,7 @@ class TranslationService:
         Returns:
             Language code if transliterated, None otherwise
         """
-        text_lower = text.lower()
-        words = text_lower.split()
-        
-        for lang_code, hints in self.TRANSLITERATION_HINTS.items():
-            matches = sum(1 for word in words if word in hints)
-            if matches >= 2:
-                return lang_code
-        return None
+        return self.detector.detect(text).transliterated_lang
     
     async def translate_aws(
         self,
@@ -159,7 +165,8 @@ class TranslationService:
             raise TranslationError("AWS Translate not configured")
         
         try:
-            response = self.aws_client.translate_text(
+            response = await asyncio.to_thread(
+                self.aws_client.translate_text,
                 Text=text,
                 SourceLanguageCode=source_lang,
                 TargetLanguageCode=target_lang,
@@ -177,20 +184,31 @@ class TranslationService:
     ) -> str:
         """Translate using deep-translator (Google Translate wrapper - FREE)."""
         try:
-            from deep_translator import GoogleTranslator
-            
-            translator = GoogleTranslator(source=source_lang, target=target_lang)
-            result = translator.translate(text)
-            return result
+            return await asyncio.to_thread(
+                lambda: self._google_translator(source_lang, target_lang).translate(text)
+            )
         except Exception as e:
             logger.error(f"Free translation error: {e}")
             raise TranslationError(f"Free translation failed: {e}")
     
+    def _google_translator(self, source_lang: str, target_lang: str):
+        """GoogleTranslator for a language pair, cached per worker thread."""
+        translators = getattr(self._local, "translators", None)
+        if translators is None:
+            translators = self._local.translators = {}
+        
+        key = (source_lang, target_lang)
+        if key not in translators:
+            from deep_translator import GoogleTranslator
+            translators[key] = GoogleTranslator(source=source_lang, target=target_lang)
+        return translators[key]
+    
     async def translate(
         self,
         text: str,
         target_lang: str,
-        source_lang: Optional[str] = None
+        source_lang: Optional[str] = None,
+        detection: Optional[DetectionResult] = None
     ) -> Dict[str, Any]:
         """
         Translate text with automatic fallback.
@@ -200,33 +218,27 @@ class TranslationService:
             text: Text to translate (native or transliterated)
             target_lang: Target language code
             source_lang: Source language code (auto-detected if None)
+            detection: Detection result for this text, if the caller
+                already has one (skips detecting again)
             
         Returns:
             Dict with translated_text, source_lang, target_lang, provider
         """
-        # Auto-detect source language if not provided
-        if not source_lang:
-            source_lang = self.detect_language(text)
-        
-        # Check if source was transliterated
-        is_transliterated = self.detect_transliteration(text) is not None
+        if utf8_len(text) > settings.translation_max_chunk_bytes or has_markdown_table(text):
+            return await self.translate_document(text, target_lang, source_lang, detection)
         
-        # Skip if source and target are the same
-        if source_lang == target_lang:
-            return {
-                "translated_text": text,
-                "source_lang": source_lang,
-                "target_lang": target_lang,
-                "provider": "none",
-                "fallback_used": False,
-                "transliterated_input": is_transliterated,
-            }
+        source_lang, is_transliterated, resolved = await self._resolve(
+            text, target_lang, source_lang, detection
+        )
+        if resolved:
+            return resolved
         
         # Try AWS first
         if self.aws_client:
             try:
                 logger.info(f"Translating with AWS: {source_lang} → {target_lang}")
                 translated = await self.translate_aws(text, source_lang, target_lang)
+                await self._cache_result(text, source_lang, target_lang, "aws_translate", translated)
                 return {
                     "translated_text": translated,
                     "source_lang": source_lang,
@@ -234,6 +246,7 @@ class TranslationService:
                     "provider": "aws_translate",
                     "fallback_used": False,
                     "transliterated_input": is_transliterated,
+                    "cached": False,
                 }
             except TranslationError:
                 logger.warning("AWS Translate failed, using free fallback")
@@ -242,6 +255,7 @@ class TranslationService:
         try:
             logger.info(f"Translating with free provider: {source_lang} → {target_lang}")
             translated = await self.translate_free(text, source_lang, target_lang)
+            await self._cache_result(text, source_lang, target_lang, "google_free", translated)
             return {
                 "translated_text": translated,
                 "source_lang": source_lang,
@@ -249,22 +263,203 @@ class TranslationService:
                 "provider": "google_free",
                 "fallback_used": True,
                 "transliterated_input": is_transliterated,
+                "cached": False,
             }
         except TranslationError as e:
             raise TranslationError(f"All translation providers failed: {e}")
     
+    async def _resolve(
+        self,
+        text: str,
+        target_lang: str,
+        source_lang: Optional[str] = None,
+        detection: Optional[DetectionResult] = None
+    ) -> Tuple[str, bool, Optional[Dict[str, Any]]]:
+        """
+        Work that doesn't need a provider call: source detection,
+        same-language passthrough and cache lookup.
+        
+        Returns:
+            (source_lang, is_transliterated, result or None if a provider is needed)
+        """
+        # One detection pass gives both the source language and the
+        # transliteration flag (reused when the caller already detected)
+        detection = detection or self.detector.detect(text)
+        source_lang = source_lang or detection.language
+        is_transliterated = detection.is_transliterated
+        
+        # Skip if source and target are the same
+        if source_lang == target_lang:
+            return source_lang, is_transliterated, {
+                "translated_text": text,
+                "source_lang": source_lang,
+                "target_lang": target_lang,
+                "provider": "none",
+                "fallback_used": False,
+                "transliterated_input": is_transliterated,
+            }
+        
+        # Check cache (any provider in the active chain, best first)
+        chain = self.provider_chain
+        if settings.translation_cache_enabled:
+            cached = await self.cache.get(text, source_lang, target_lang, chain)
+            if cached:
+                return source_lang, is_transliterated, {
+                    "translated_text": cached["translated_text"],
+                    "source_lang": source_lang,
+                    "target_lang": target_lang,
+                    "provider": cached["provider"],
+                    "fallback_used": cached["provider"] != chain[0],
+                    "transliterated_input": is_transliterated,
+                    "cached": True,
+                }
+        
+        return source_lang, is_transliterated, None
+    
+    async def _cache_result(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        provider: str,
+        translated: str
+    ) -> None:
+        """Store a fresh provider result in the cache (skips empty output)."""
+        if not settings.translation_cache_enabled or not translated:
+            return
+        await self.cache.set(text, source_lang, target_lang, provider, translated)
+    
     async def translate_batch(
         self,
         texts: List[str],
         target_lang: str,
         source_lang: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Translate multiple texts."""
-        results = []
-        for text in texts:
-            result = await self.translate(text, target_lang, source_lang)
-            results.append(result)
-        return results
+        """
+        Translate multiple texts concurrently.
+        
+        Duplicate inputs are translated once. Every unique text goes
+        through translate() - cache lookup, provider fallback, and document
+        splitting for long or table-bearing texts - with at most
+        TRANSLATION_BATCH_CONCURRENCY in flight (neither AWS translate_text
+        nor deep-translator has a real batch endpoint). Results keep input
+        order.
+        """
+        if not texts:
+            return []
+        
+        unique = list(dict.fromkeys(texts))
+        semaphore = asyncio.Semaphore(max(1, settings.translation_batch_concurrency))
+        
+        async def _translate_one(text: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.translate(text, target_lang, source_lang)
+        
+        translated = await asyncio.gather(*(_translate_one(t) for t in unique))
+        by_text = dict(zip(unique, translated))
+        
+        # Copy so duplicate inputs don't share one mutable dict
+        return [dict(by_text[text]) for text in texts]
+    
+    async def translate_document(
+        self,
+        text: str,
+        target_lang: str,
+        source_lang: Optional[str] = None,
+        detection: Optional[DetectionResult] = None
+    ) -> Dict[str, Any]:
+        """
+        Translate a long or structured document.
+        
+        The text is split into paragraph/sentence units under
+        TRANSLATION_MAX_CHUNK_BYTES (Markdown markers, table pipes and
+        code fences stay verbatim), the units are translated concurrently
+        through translate_batch - so each unit is cached on its own and
+        repeated units are translated once - and the layout is rebuilt.
+        
+        Returns:
+            translate() result plus segments and cached_segments counts
+        """
+        detection = detection or self.detector.detect(text)
+        source_lang = source_lang or detection.language
+        
+        doc = segment_document(text, settings.translation_max_chunk_bytes)
+        units = doc.units
+        results = await self.translate_batch(units, target_lang, source_lang) if units else []
+        
+        providers = [r["provider"] for r in results if r["provider"] != "none"]
+        provider = max(set(providers), key=providers.count) if providers else "none"
+        cached_segments = sum(1 for r in results if r.get("cached"))
+        logger.info(
+            f"Translated document: {len(units)} segments "
+            f"({cached_segments} cached), {source_lang} → {target_lang}"
+        )
+        
+        return {
+            "translated_text": doc.reassemble([r["translated_text"] for r in results]),
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "provider": provider,
+            "fallback_used": any(r.get("fallback_used") for r in results),
+            "transliterated_input": detection.is_transliterated,
+            "cached": bool(results) and cached_segments == len(results),
+            "segments": len(units),
+            "cached_segments": cached_segments,
+        }
+    
+    async def translate_fanout(
+        self,
+        text: str,
+        target_langs: Optional[List[str]] = None,
+        source_lang: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Translate one text into many languages, yielding each result as
+        soon as it completes.
+        
+        The text is run through the detector once and the result (source
+        language and transliteration flag) is shared by every target;
+        targets run concurrently (TRANSLATION_BATCH_CONCURRENCY) and reuse
+        the translation cache. A failed target yields an "error" entry
+        instead of aborting the others.
+        
+        Args:
+            text: Text to localize
+            target_langs: Target codes (default: every supported language
+                except the source)
+            source_lang: Source language code (auto-detected if None)
+        """
+        detection = self.detector.detect(text)
+        source_lang = source_lang or detection.language
+        
+        if not target_langs:
+            target_langs = [lang.value for lang in SupportedLanguage if lang.value != source_lang]
+        target_langs = list(dict.fromkeys(target_langs))
+        
+        semaphore = asyncio.Semaphore(max(1, settings.translation_batch_concurrency))
+        start = time.perf_counter()
+        
+        async def _translate_to(target_lang: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    result = await self.translate(text, target_lang, source_lang, detection)
+                except Exception as e:
+                    logger.warning(f"Fan-out translation to {target_lang} failed: {e}")
+                    result = {
+                        "source_lang": source_lang,
+                        "target_lang": target_lang,
+                        "error": str(e),
+                    }
+            result["elapsed_ms"] = int((time.perf_counter() - start) * 1000)
+            return result
+        
+        tasks = [asyncio.create_task(_translate_to(lang)) for lang in target_langs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
     
     def get_supported_languages(self) -> List[Dict[str, str]]:
         """Get list of supported languages with metadata."""
@@ -13,6 +13,7 @@ Two-pass moderation for edge cases:
 - Pass 2: Gemini Vision (semantic understanding for violence, death, etc.)
 """
 import logging
+import asyncio
 import base64
 import re
 from typing import Optional, Dict, Any, List
@@ -21,6 +22,13 @@ from pathlib import Path
 import numpy as np
 
 from config import settings
+from utils.aws import create_boto3_client
+from services.image_normalizer import (
+    decode_for_analysis,
+    encode_for_cloud,
+    load_pil_for_analysis,
+    ImageNormalizationError,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +38,104 @@ class VisionError(Exception):
     pass
 
 
+# ===========================================
+# Fused color-class heuristics
+# ===========================================
+
+# One bit per color class, so a pixel's classes fit in a single uint8 code
+SKIN, RED, GREEN, PINK, DARK, BRIGHT = (1 << i for i in range(6))
+
+COLOR_CLASS_NAMES = {
+    SKIN: "skin_ratio",
+    RED: "red_ratio",
+    GREEN: "green_ratio",
+    PINK: "pink_ratio",
+    DARK: "dark_ratio",
+    BRIGHT: "bright_ratio",
+}
+
+# Inclusive OpenCV HSV ranges (H is 0-179): (bit, hue ranges, sat range, val range)
+HSV_CLASS_RANGES = [
+    (SKIN, [(0, 20)], (20, 255), (70, 255)),
+    (RED, [(0, 10), (160, 180)], (100, 255), (100, 255)),
+    (GREEN, [(35, 85)], (30, 255), (30, 255)),
+    (PINK, [(140, 170)], (20, 255), (100, 255)),
+]
+
+# Inclusive grayscale ranges: dark is gray < 40, bright is gray > 150
+GRAY_CLASS_RANGES = [
+    (DARK, (0, 39)),
+    (BRIGHT, (151, 255)),
+]
+
+
+def _build_color_luts():
+    """
+    Build per-channel lookup tables mapping a value to the bitmask of
+    classes whose range contains it. ANDing the H, S, V and gray codes
+    yields each pixel's full class membership.
+    """
+    hsv_bits = 0
+    for bit, _, _, _ in HSV_CLASS_RANGES:
+        hsv_bits |= bit
+    gray_bits = 0
+    for bit, _ in GRAY_CLASS_RANGES:
+        gray_bits |= bit
+    
+    # Gray classes pass through the HSV tables and vice versa
+    hsv_lut = np.full((256, 1, 3), gray_bits, dtype=np.uint8)
+    for bit, hue_ranges, (s_lo, s_hi), (v_lo, v_hi) in HSV_CLASS_RANGES:
+        for h_lo, h_hi in hue_ranges:
+            hsv_lut[h_lo:h_hi + 1, 0, 0] |= bit
+        hsv_lut[s_lo:s_hi + 1, 0, 1] |= bit
+        hsv_lut[v_lo:v_hi + 1, 0, 2] |= bit
+    
+    gray_lut = np.full(256, hsv_bits, dtype=np.uint8)
+    for bit, (lo, hi) in GRAY_CLASS_RANGES:
+        gray_lut[lo:hi + 1] |= bit
+    
+    # class_matrix[code, i] == 1 if class i is set in code
+    bits = np.array(list(COLOR_CLASS_NAMES.keys()), dtype=np.int64)
+    class_matrix = ((np.arange(256)[:, None] & bits[None, :]) > 0).astype(np.int64)
+    
+    return hsv_lut, gray_lut, class_matrix
+
+
+_HSV_LUT, _GRAY_LUT, _CLASS_MATRIX = _build_color_luts()
+
+
+def compute_color_ratios(img: np.ndarray) -> Dict[str, float]:
+    """
+    Compute every color-class ratio in a single LUT + histogram pass.
+    
+    Replaces one cv2.inRange mask and one full-frame sum per class with:
+    per-channel LUT -> AND into one uint8 code per pixel -> 256-bin
+    histogram -> class counts via a (256 x classes) matrix product.
+    
+    Args:
+        img: BGR uint8 image (ideally already downscaled)
+        
+    Returns:
+        Dict with skin/red/green/pink/dark/bright ratios (0-1)
+    """
+    import cv2
+    
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    
+    coded = cv2.LUT(hsv, _HSV_LUT)
+    codes = coded[..., 0] & coded[..., 1] & coded[..., 2] & cv2.LUT(gray, _GRAY_LUT)
+    
+    hist = np.bincount(codes.ravel(), minlength=256)
+    counts = hist @ _CLASS_MATRIX
+    total = codes.size or 1
+    
+    return {
+        name: float(count) / total
+        for name, count in zip(COLOR_CLASS_NAMES.values(), counts)
+    }
+
+
 class VisionService:
     """
     Vision service with AWS Rekognition primary and AI vision fallbacks.
@@ -49,13 +155,8 @@ class VisionService:
         # Initialize AWS Rekognition if configured
         if settings.aws_configured and settings.use_aws_rekognition:
             try:
-                import boto3
-                self.aws_client = boto3.client(
-                    'rekognition',
-                    region_name=settings.aws_region,
-                    aws_access_key_id=settings.aws_access_key_id,
-                    aws_secret_access_key=settings.aws_secret_access_key,
-                )
+                # Pooled client: moderation + label calls run concurrently
+                self.aws_client = create_boto3_client('rekognition')
                 logger.info("AWS Rekognition initialized")
             except Exception as e:
                 logger.warning(f"Failed to initialize AWS Rekognition: {e}")
@@ -80,21 +181,50 @@ class VisionService:
             except Exception as e:
                 logger.warning(f"Failed to initialize Groq Vision: {e}")
     
-    async def analyze_aws(self, image_bytes: bytes) -> Dict[str, Any]:
+    async def analyze_aws(
+        self,
+        image_bytes: bytes,
+        include_labels: bool = True,
+    ) -> Dict[str, Any]:
         """
         Analyze image using AWS Rekognition.
         
         Returns moderation labels and confidence scores.
+        
+        Args:
+            image_bytes: Encoded image
+            include_labels: Also run detect_labels (skip when only
+                moderation is needed to save a request)
         """
         if not self.aws_client:
             raise VisionError("AWS Rekognition not configured")
         
         try:
-            # Detect moderation labels
-            moderation_response = self.aws_client.detect_moderation_labels(
-                Image={'Bytes': image_bytes},
-                MinConfidence=50.0
-            )
+            # Compact EXIF-free JPEG (no-op if already normalized)
+            image_bytes = await asyncio.to_thread(encode_for_cloud, image_bytes)
+            
+            # One payload shared by both requests, issued concurrently off-loop
+            image = {'Bytes': image_bytes}
+            calls = [
+                asyncio.to_thread(
+                    self.aws_client.detect_moderation_labels,
+                    Image=image,
+                    MinConfidence=50.0,
+                )
+            ]
+            if include_labels:
+                calls.append(
+                    asyncio.to_thread(
+                        self.aws_client.detect_labels,
+                        Image=image,
+                        MaxLabels=10,
+                        MinConfidence=70.0,
+                    )
+                )
+            
+            responses = await asyncio.gather(*calls)
+            moderation_response = responses[0]
+            labels_response = responses[1] if include_labels else {}
             
             moderation_labels = [
                 {
@@ -105,13 +235,6 @@ class VisionService:
                 for label in moderation_response.get("ModerationLabels", [])
             ]
             
-            # Detect labels for content understanding
-            labels_response = self.aws_client.detect_labels(
-                Image={'Bytes': image_bytes},
-                MaxLabels=10,
-                MinConfidence=70.0
-            )
-            
             content_labels = [
                 {
                     "name": label["Name"],
@@ -155,11 +278,10 @@ class VisionService:
             raise VisionError("Gemini Vision not configured")
         
         try:
-            import PIL.Image
-            import io
-            
-            # Convert bytes to PIL Image
-            image = PIL.Image.open(io.BytesIO(image_bytes))
+            # Downscaled, upright RGB image (Gemini doesn't need full resolution)
+            image = await asyncio.to_thread(
+                load_pil_for_analysis, image_bytes, settings.image_max_side_cloud
+            )
             
             # Moderation prompt for comprehensive analysis
             moderation_prompt = """Analyze this image for content moderation. Be thorough and detect:
@@ -268,55 +390,18 @@ EXPLANATION: [why this score was given]"""
         Balanced approach - avoids false positives on flowers/nature.
         """
         try:
-            import cv2
-            
-            # Decode image
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if img is None:
+            # Decode at reduced resolution + one fused LUT/histogram pass (off-loop)
+            try:
+                ratios = await asyncio.to_thread(self._opencv_color_ratios, image_bytes)
+            except ImageNormalizationError:
                 raise VisionError("Failed to decode image")
             
-            # Convert to different color spaces for analysis
-            hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            # Analyze color distribution
-            h, w = img.shape[:2]
-            total_pixels = h * w
-            
-            # Check for excessive skin tones (heuristic)
-            lower_skin = np.array([0, 20, 70], dtype=np.uint8)
-            upper_skin = np.array([20, 255, 255], dtype=np.uint8)
-            skin_mask = cv2.inRange(hsv, lower_skin, upper_skin)
-            skin_ratio = np.sum(skin_mask > 0) / total_pixels
-            
-            # Check for red colors (could be flowers, blood, etc.)
-            lower_red1 = np.array([0, 100, 100], dtype=np.uint8)
-            upper_red1 = np.array([10, 255, 255], dtype=np.uint8)
-            lower_red2 = np.array([160, 100, 100], dtype=np.uint8)
-            upper_red2 = np.array([180, 255, 255], dtype=np.uint8)
-            red_mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-            red_mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-            red_ratio = (np.sum(red_mask1 > 0) + np.sum(red_mask2 > 0)) / total_pixels
-            
-            # Check for green (nature/plants - strong positive indicator)
-            lower_green = np.array([35, 30, 30], dtype=np.uint8)
-            upper_green = np.array([85, 255, 255], dtype=np.uint8)
-            green_mask = cv2.inRange(hsv, lower_green, upper_green)
-            green_ratio = np.sum(green_mask > 0) / total_pixels
-            
-            # Check for pink (flowers, but also sometimes suggestive)
-            lower_pink = np.array([140, 20, 100], dtype=np.uint8)
-            upper_pink = np.array([170, 255, 255], dtype=np.uint8)
-            pink_mask = cv2.inRange(hsv, lower_pink, upper_pink)
-            pink_ratio = np.sum(pink_mask > 0) / total_pixels
-            
-            # Check for darkness
-            dark_ratio = np.sum(gray < 40) / total_pixels
-            
-            # Check for bright colors (flowers are usually bright)
-            bright_ratio = np.sum(gray > 150) / total_pixels
+            skin_ratio = ratios["skin_ratio"]
+            red_ratio = ratios["red_ratio"]
+            green_ratio = ratios["green_ratio"]
+            pink_ratio = ratios["pink_ratio"]
+            dark_ratio = ratios["dark_ratio"]
+            bright_ratio = ratios["bright_ratio"]
             
             # Simple heuristic scoring
             moderation_labels = []
@@ -392,7 +477,13 @@ EXPLANATION: [why this score was given]"""
             logger.error(f"OpenCV analysis error: {e}")
             raise VisionError(f"OpenCV failed: {e}")
     
-    async def analyze(self, image_bytes: bytes) -> Dict[str, Any]:
+    @staticmethod
+    def _opencv_color_ratios(image_bytes: bytes) -> Dict[str, float]:
+        """Decode (downscaled) and compute all color-class ratios."""
+        img = decode_for_analysis(image_bytes, settings.image_max_side_opencv)
+        return compute_color_ratios(img)
+    
+    async def analyze(self, image_bytes: bytes, include_labels: bool = True) -> Dict[str, Any]:
         """
         Analyze image with automatic fallback chain.
         
@@ -401,14 +492,22 @@ EXPLANATION: [why this score was given]"""
         For edge cases (artistic violence, etc.), uses two-pass:
         - Pass 1: Fast provider (OpenCV if no cloud)
         - Pass 2: Gemini Vision verification if safety_score is high but uncertain
+        
+        Set include_labels=False when only moderation labels are needed
+        (skips Rekognition detect_labels).
         """
         fallback_used = False
         
+        # Normalize once for cloud providers so every fallback reuses it
+        cloud_bytes = image_bytes
+        if self.aws_client or self.gemini_model:
+            cloud_bytes = await asyncio.to_thread(encode_for_cloud, image_bytes)
+        
         # Try AWS Rekognition first (PRIMARY)
         if self.aws_client:
             try:
                 logger.info("Analyzing with AWS Rekognition")
-                result = await self.analyze_aws(image_bytes)
+                result = await self.analyze_aws(cloud_bytes, include_labels=include_labels)
                 result["fallback_used"] = fallback_used
                 return result
             except VisionError:
@@ -419,7 +518,7 @@ EXPLANATION: [why this score was given]"""
         if self.gemini_model:
             try:
                 logger.info("Analyzing with Gemini Vision (AI semantic)")
-                result = await self.analyze_gemini_vision(image_bytes)
+                result = await self.analyze_gemini_vision(cloud_bytes)
                 result["fallback_used"] = fallback_used
                 return result
             except VisionError:
@@ -438,7 +537,7 @@ EXPLANATION: [why this score was given]"""
                 not opencv_result.get("moderation_labels")):
                 try:
                     logger.info("Two-pass: Verifying with Gemini Vision for edge cases")
-                    gemini_result = await self.analyze_gemini_vision(image_bytes)
+                    gemini_result = await self.analyze_gemini_vision(cloud_bytes)
                     
                     # If Gemini found issues that OpenCV missed, use lower score
                     if gemini_result["safety_score"] < opencv_result["safety_score"] - 20:
@@ -0,0 +1,16 @@
+"""
+Shared test setup: a throwaway SQLite database and Backend/ on sys.path.
+
+DATABASE_URL is set before anything imports config, so tests never touch
+a real database.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmp.name}/test.db"
+os.environ["DEBUG"] = "false"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,80 @@
+"""
+Language detector: script, transliteration and ASCII decisions without a
+model, and the memoized langdetect fallback.
+"""
+import pytest
+
+from services.language_detection import LanguageDetector
+
+HINTS = {
+    "hi": ["main", "hai", "kya", "nahi", "accha"],
+    "te": ["nenu", "chala", "bagundi", "nalla"],
+    "ml": ["njan", "nalla", "valare"],
+}
+SUPPORTED = ["en", "hi", "te", "ml", "ta", "bn", "fr"]
+
+
+@pytest.fixture
+def detector():
+    return LanguageDetector(HINTS, SUPPORTED, cache_size=8)
+
+
+def test_native_script(detector):
+    result = detector.detect("నమస్కారం, మీరు ఎలా ఉన్నారు?")
+    assert result.language == "te"
+    assert result.method == "script"
+    assert not result.is_transliterated
+    
+    assert detector.detect("नमस्ते दुनिया 🙏").language == "hi"
+    assert detector.detect("வணக்கம்").language == "ta"
+
+
+def test_transliteration(detector):
+    result = detector.detect("nenu chala bagundi")
+    assert result.language == "te"
+    assert result.is_transliterated
+    assert result.transliterated_lang == "te"
+    assert result.method == "transliteration"
+
+
+def test_one_hint_word_is_not_enough(detector):
+    result = detector.detect("The main point")
+    assert result.language == "en"
+    assert result.method == "ascii"
+
+
+def test_shared_hint_words_tie_break_by_hint_order(detector):
+    # "nalla" is both Telugu and Malayalam; Telugu is listed first
+    assert detector.transliteration_match("nalla nalla") == ("te", 2)
+    assert detector.transliteration_match("njan valare nalla") == ("ml", 3)
+
+
+def test_ascii_and_blank_text(detector):
+    assert detector.detect("Hello world!").method == "ascii"
+    blank = detector.detect("   ")
+    assert blank.language == "en" and blank.confidence == 0.0
+
+
+def test_langdetect_only_for_non_indic_text_and_memoized(detector):
+    detector.detect("नमस्ते दुनिया")
+    detector.detect("nenu chala bagundi")
+    detector.detect("Hello world")
+    assert detector.cache_info().misses == 0
+    
+    text = "C'est une très belle journée à Paris"
+    first = detector.detect(text)
+    assert first.method == "langdetect"
+    assert first.language == "fr"
+    
+    # Whitespace is normalized before the cache lookup
+    again = detector.detect("C'est une  très belle\njournée à Paris")
+    assert again == first
+    info = detector.cache_info()
+    assert info.misses == 1 and info.hits == 1
+
+
+def test_unsupported_langdetect_result_falls_back_to_english():
+    detector = LanguageDetector(HINTS, ["en", "hi"], cache_size=8)
+    result = detector.detect("C'est une très belle journée à Paris")
+    assert result.language == "en"
+    assert result.method == "langdetect"
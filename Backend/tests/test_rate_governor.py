@@ -0,0 +1,172 @@
+"""
+Outbound rate governor: rolling-window math, call budgets for multi-request
+publishes, releasing and settling reservations, and 429 blocks.
+"""
+import asyncio
+import time
+
+import pytest
+
+from database import init_db
+from services.social.base import SocialPublishResult
+from services.social.rate_governor import RateGovernor, is_throttled
+
+HOUR = 3600
+
+
+async def _governor(rules) -> RateGovernor:
+    await init_db()
+    return RateGovernor(rules)
+
+
+def _failure(status: int, retry_after=None) -> SocialPublishResult:
+    return SocialPublishResult(
+        success=False,
+        platform="instagram",
+        metadata={"status_code": status},
+        retry_after=retry_after,
+    )
+
+
+def test_wait_until_oldest_event_in_window_ages_out():
+    governor = RateGovernor({"instagram": {"post": [(2, 100)]}})
+    now = 1_000_000.0
+    
+    # One slot left
+    assert governor._wait("instagram", "post", [now - 50], 1, now) == 0
+    # Full: the older of the two events frees the next slot
+    assert governor._wait("instagram", "post", [now - 90, now - 50], 1, now) == pytest.approx(10)
+    # Events outside the window don't count
+    assert governor._wait("instagram", "post", [now - 150, now - 50], 1, now) == 0
+    # Two more needed: both events have to age out
+    assert governor._wait("instagram", "post", [now - 90, now - 50], 2, now) == pytest.approx(50)
+
+
+def test_wait_takes_the_longest_of_all_windows():
+    governor = RateGovernor({"instagram": {"post": [(1, 60), (2, HOUR)]}})
+    now = 1_000_000.0
+    
+    assert governor._wait("instagram", "post", [now - 30], 1, now) == pytest.approx(30)
+    assert governor._wait("instagram", "post", [now - 600, now - 30], 1, now) == pytest.approx(HOUR - 600)
+
+
+def test_need_larger_than_limit_waits_for_an_empty_window():
+    governor = RateGovernor({"instagram": {"call": [(10, 100)]}})
+    now = 1_000_000.0
+    
+    # A 36-call carousel never fits a 10-call window; it goes once the window is empty
+    assert governor._wait("instagram", "call", [], 36, now) == 0
+    assert governor._wait("instagram", "call", [now - 30], 36, now) == pytest.approx(70)
+    assert governor._wait("instagram", "call", [now - 80, now - 30], 36, now) == pytest.approx(70)
+
+
+@pytest.mark.asyncio
+async def test_acquire_defers_when_full_and_release_frees_the_slot():
+    governor = await _governor({"instagram": {"post": [(1, HOUR)]}})
+    
+    reservation, wait = await governor.acquire("instagram", 101)
+    assert reservation is not None and wait == 0
+    
+    denied, wait = await governor.acquire("instagram", 101)
+    assert denied is None
+    assert HOUR - 5 < wait <= HOUR
+    
+    # Other accounts have their own quota
+    other, _ = await governor.acquire("instagram", 102)
+    assert other is not None
+    
+    governor.release(reservation)
+    again, wait = await governor.acquire("instagram", 101)
+    assert again is not None and wait == 0
+    
+    stats = governor.stats()
+    assert stats["granted"] == 3 and stats["deferred"] == 1 and stats["released"] == 1
+    await governor.drain()
+
+
+@pytest.mark.asyncio
+async def test_platforms_without_rules_are_always_granted():
+    governor = await _governor({"instagram": {"post": [(1, HOUR)]}})
+    for _ in range(3):
+        reservation, wait = await governor.acquire("twitter", 103)
+        assert reservation is not None and wait == 0
+
+
+@pytest.mark.asyncio
+async def test_post_needs_room_for_its_api_calls():
+    governor = await _governor({"instagram": {"post": [(25, 24 * HOUR)], "call": [(40, HOUR)]}})
+    for _ in range(5):
+        await governor.record("instagram", 104, "call")
+    
+    reservation, _ = await governor.acquire("instagram", 104, calls=35)
+    assert reservation is not None
+    
+    denied, wait = await governor.acquire("instagram", 104, calls=36)
+    assert denied is None
+    assert HOUR - 5 < wait <= HOUR
+    await governor.drain()
+
+
+@pytest.mark.asyncio
+async def test_settle_keeps_successes_and_releases_failures():
+    governor = await _governor({"instagram": {"post": [(1, HOUR)]}})
+    
+    reservation, _ = await governor.acquire("instagram", 105)
+    governor.settle(reservation, _failure(500))
+    reservation, _ = await governor.acquire("instagram", 105)
+    assert reservation is not None
+    
+    governor.settle(reservation, SocialPublishResult(success=True, platform="instagram"))
+    denied, _ = await governor.acquire("instagram", 105)
+    assert denied is None
+    await governor.drain()
+
+
+@pytest.mark.asyncio
+async def test_429_blocks_the_account_until_retry_after():
+    governor = await _governor({"instagram": {"post": [(10, HOUR)]}})
+    throttled = _failure(429, retry_after=120)
+    assert is_throttled(throttled)
+    assert not is_throttled(_failure(500))
+    
+    reservation, _ = await governor.acquire("instagram", 106)
+    governor.settle(reservation, throttled)
+    
+    denied, wait = await governor.acquire("instagram", 106)
+    assert denied is None
+    assert 115 < wait <= 120
+    
+    next_at = await governor.next_available("instagram", 106)
+    assert 115 < next_at.timestamp() - time.time() <= 120
+    assert governor.stats()["blocked_accounts"] == 1
+    await governor.drain()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_publish_keeps_its_reservation(monkeypatch):
+    from routers import social_connect
+    
+    governor = await _governor({"instagram": {"post": [(1, HOUR)]}})
+    monkeypatch.setattr(social_connect, "get_rate_governor", lambda: governor)
+    
+    class Service:
+        def __init__(self, error):
+            self.error = error
+        
+        def api_calls_needed(self, media_urls=None):
+            return 1
+        
+        async def publish(self, user_id, **kwargs):
+            raise self.error
+    
+    # A failed publish gives its slot back
+    with pytest.raises(RuntimeError):
+        await social_connect._governed_publish("instagram", Service(RuntimeError("boom")), user_id=107, content="x")
+    assert governor.stats()["released"] == 1
+    
+    # A cancelled one may already be live, so it stays counted
+    with pytest.raises(asyncio.CancelledError):
+        await social_connect._governed_publish("instagram", Service(asyncio.CancelledError()), user_id=107, content="x")
+    denied, _ = await governor.acquire("instagram", 107)
+    assert denied is None
+    await governor.drain()
@@ -0,0 +1,134 @@
+"""
+Document segmentation: chunk boundaries under the byte limit, Markdown
+layout kept out of translation, and table cells rejoined with their pipes.
+"""
+from services.text_segmentation import (
+    Unit,
+    chunk_text,
+    has_markdown_table,
+    segment_document,
+    split_sentences,
+    utf8_len,
+)
+
+
+def _upper(text: str, max_bytes: int = 1000) -> str:
+    """Segment, 'translate' every unit to upper case and reassemble."""
+    doc = segment_document(text, max_bytes)
+    return doc.reassemble([unit.upper() for unit in doc.units])
+
+
+def test_split_sentences_round_trips():
+    text = "First one. Second one! Third? नमस्ते। ठीक है॥ \"Quoted.\" Done"
+    sentences = split_sentences(text)
+    assert "".join(sentences) == text
+    assert sentences[:3] == ["First one. ", "Second one! ", "Third? "]
+    assert sentences[3] == "नमस्ते। "
+    assert sentences[-1] == "Done"
+
+
+def test_chunks_stay_under_the_byte_limit():
+    text = " ".join(f"Sentence number {i} is here." for i in range(50))
+    chunks = chunk_text(text, 100)
+    assert "".join(chunks) == text
+    assert len(chunks) > 1
+    assert all(utf8_len(chunk) <= 100 for chunk in chunks)
+    # Packed on sentence boundaries
+    assert all(chunk.rstrip().endswith(".") for chunk in chunks)
+
+
+def test_chunks_count_bytes_not_characters():
+    text = "नमस्ते दुनिया। " * 20  # 3 bytes per Devanagari character
+    chunks = chunk_text(text, 120)
+    assert "".join(chunks) == text
+    assert all(utf8_len(chunk) <= 120 for chunk in chunks)
+
+
+def test_overlong_sentence_is_split_at_words():
+    text = "word " * 100
+    chunks = chunk_text(text, 50)
+    assert "".join(chunks) == text
+    assert all(utf8_len(chunk) <= 50 for chunk in chunks)
+    assert all(chunk.startswith("word") for chunk in chunks)
+
+
+def test_overlong_word_is_cut():
+    text = "x" * 200
+    chunks = chunk_text(text, 64)
+    assert "".join(chunks) == text
+    assert all(utf8_len(chunk) <= 64 for chunk in chunks)
+
+
+def test_layout_is_kept_and_only_text_translated():
+    text = (
+        "# Title\n"
+        "\n"
+        "Intro line one\n"
+        "intro line two\n"
+        "\n"
+        "- first item\n"
+        "  * nested item\n"
+        "1. numbered\n"
+        "> quoted\n"
+    )
+    doc = segment_document(text, 1000)
+    assert doc.units == [
+        "Title",
+        "Intro line one\nintro line two",
+        "first item",
+        "nested item",
+        "numbered",
+        "quoted",
+    ]
+    assert _upper(text) == (
+        "# TITLE\n"
+        "\n"
+        "INTRO LINE ONE\n"
+        "INTRO LINE TWO\n"
+        "\n"
+        "- FIRST ITEM\n"
+        "  * NESTED ITEM\n"
+        "1. NUMBERED\n"
+        "> QUOTED\n"
+    )
+
+
+def test_year_at_line_start_is_not_a_list_marker():
+    doc = segment_document("2024. A big year\n12. Twelfth item\n", 1000)
+    assert doc.units == ["2024. A big year", "Twelfth item"]
+    assert doc.pieces[0] == Unit("2024. A big year")
+
+
+def test_code_fences_are_not_translated():
+    text = "Run this:\n```\nprint('hi')\n```\nDone\n"
+    doc = segment_document(text, 1000)
+    assert doc.units == ["Run this:", "Done"]
+    assert _upper(text) == "RUN THIS:\n```\nprint('hi')\n```\nDONE\n"
+
+
+def test_table_cells_are_translated_and_rejoined():
+    text = (
+        "| Day | Post |\n"
+        "|-----|:----:|\n"
+        "| Mon | Launch \\| teaser |\n"
+    )
+    assert has_markdown_table(text)
+    doc = segment_document(text, 1000)
+    assert doc.units == ["Day", "Post", "Mon", "Launch \\| teaser"]
+    assert _upper(text) == (
+        "| DAY | POST |\n"
+        "|-----|:----:|\n"
+        "| MON | LAUNCH \\| TEASER |\n"
+    )
+
+
+def test_pipes_without_separator_are_not_a_table():
+    assert not has_markdown_table("a | b\nc | d\n")
+
+
+def test_long_paragraph_becomes_several_units():
+    text = " ".join(f"Sentence number {i} is here." for i in range(20)) + "\n"
+    doc = segment_document(text, 100)
+    assert len(doc.units) > 1
+    assert all(utf8_len(unit) <= 100 for unit in doc.units)
+    assert doc.reassemble(doc.units) == text
@@ -0,0 +1,132 @@
+"""
+Two-tier translation cache: LRU and SQLite tiers, TTL expiry, key
+normalization, and the admin-only invalidation endpoint.
+"""
+import asyncio
+import unicodedata
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select, func
+
+from config import settings
+from database import init_db, async_session_maker
+from models.translation_cache import TranslationCacheEntry
+from models.user import User
+from services.translation_cache import TranslationCache, normalize_text, text_hash
+
+
+async def _fresh_cache(**kwargs) -> TranslationCache:
+    await init_db()
+    async with async_session_maker() as db:
+        await db.execute(delete(TranslationCacheEntry))
+        await db.commit()
+    return TranslationCache(persistent=True, **kwargs)
+
+
+async def _rows() -> int:
+    async with async_session_maker() as db:
+        return await db.scalar(select(func.count()).select_from(TranslationCacheEntry))
+
+
+def test_normalize_text_keeps_layout():
+    decomposed = unicodedata.normalize("NFD", "café")
+    assert normalize_text(f"  {decomposed}\n") == "café"
+    assert normalize_text("line one\nline two") == "line one\nline two"
+    assert normalize_text("a  b") == "a  b"
+
+
+def test_keys_follow_normalization():
+    assert text_hash(" hello ") == text_hash("hello")
+    assert text_hash(unicodedata.normalize("NFD", "é")) == text_hash("é")
+    assert text_hash("a\nb") != text_hash("a b")
+
+
+@pytest.mark.asyncio
+async def test_memory_then_db_tier():
+    cache = await _fresh_cache()
+    await cache.set("hello", "en", "hi", "google", "नमस्ते")
+    
+    hit = await cache.get("hello ", "en", "hi", ["google"])
+    assert hit == {"translated_text": "नमस्ते", "provider": "google", "tier": "memory"}
+    
+    # A new process only has the SQLite tier; a hit refills the LRU
+    restarted = TranslationCache(persistent=True)
+    assert (await restarted.get("hello", "en", "hi", ["google"]))["tier"] == "db"
+    assert (await restarted.get("hello", "en", "hi", ["google"]))["tier"] == "memory"
+    assert restarted.stats()["db_hits"] == 1 and restarted.stats()["memory_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_provider_priority_and_isolation():
+    cache = await _fresh_cache()
+    await cache.set("hello", "en", "hi", "google", "from google")
+    await cache.set("hello", "en", "hi", "aws", "from aws")
+    
+    assert (await cache.get("hello", "en", "hi", ["aws", "google"]))["translated_text"] == "from aws"
+    assert (await cache.get("hello", "en", "hi", ["google"]))["translated_text"] == "from google"
+    assert await cache.get("hello", "en", "hi", ["libre"]) is None
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_oldest():
+    cache = await _fresh_cache(max_size=2)
+    for word in ("one", "two", "three"):
+        await cache.set(word, "en", "hi", "google", word.upper())
+    
+    assert len(cache._lru) == 2
+    # Evicted from memory, still served by the persistent tier
+    assert (await cache.get("one", "en", "hi", ["google"]))["tier"] == "db"
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_in_both_tiers():
+    cache = await _fresh_cache(ttl_hours=0.5 / 3600)  # half a second
+    await cache.set("hello", "en", "hi", "google", "नमस्ते")
+    await asyncio.sleep(0.6)
+    
+    assert await cache.get("hello", "en", "hi", ["google"]) is None
+    assert await TranslationCache(persistent=True).get("hello", "en", "hi", ["google"]) is None
+    assert await cache.purge_expired() == 1
+    assert await _rows() == 0
+
+
+@pytest.mark.asyncio
+async def test_invalidate_by_provider():
+    cache = await _fresh_cache()
+    await cache.set("hello", "en", "hi", "google", "a")
+    await cache.set("hello", "en", "hi", "aws", "b")
+    
+    assert await cache.invalidate(provider="google") == 1
+    assert await cache.get("hello", "en", "hi", ["google"]) is None
+    assert (await cache.get("hello", "en", "hi", ["aws"]))["translated_text"] == "b"
+    assert await _rows() == 1
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from routers import translation
+    from routers.auth import get_current_user
+    
+    monkeypatch.setattr(settings, "admin_emails", "admin@example.com")
+    app = FastAPI()
+    app.include_router(translation.router, prefix="/api/v1/translate")
+    user = {"email": "someone@example.com"}
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, name="t", hashed_password="x", **user)
+    asyncio.run(init_db())
+    with TestClient(app) as test_client:
+        test_client.user = user
+        yield test_client
+
+
+def test_cache_delete_requires_admin(client):
+    assert client.delete("/api/v1/translate/cache").status_code == 403
+    
+    client.user["email"] = "admin@example.com"
+    response = client.delete("/api/v1/translate/cache", params={"provider": "google"})
+    assert response.status_code == 200
+    assert response.json()["filters"]["provider"] == "google"
+    
+    # Stats stay public
+    assert client.get("/api/v1/translate/cache").status_code == 200
@@ -1,4 +1,5 @@
 """Utils package initialization."""
 from utils.logging import setup_logging, get_logger
+from utils.aws import create_boto3_client
 
-__all__ = ["setup_logging", "get_logger"]
+__all__ = ["setup_logging", "get_logger", "create_boto3_client"]
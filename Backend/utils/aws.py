@@ -0,0 +1,40 @@
+"""
+AWS Client Helpers for Content Room Backend
+
+Shared boto3 client factory so every service gets the same pooled,
+thread-safe client configuration (clients are reused across
+asyncio.to_thread workers, so the HTTP pool must be sized for them).
+"""
+from typing import Any
+
+from config import settings
+
+
+def create_boto3_client(service_name: str, **config_overrides: Any):
+    """
+    Create a boto3 client with connection pooling and adaptive retries.
+    
+    Args:
+        service_name: AWS service name (e.g. "rekognition")
+        **config_overrides: Extra botocore Config options
+        
+    Returns:
+        Configured boto3 client
+    """
+    import boto3
+    from botocore.config import Config
+    
+    options = {
+        "max_pool_connections": settings.aws_max_pool_connections,
+        "retries": {"max_attempts": settings.aws_max_retries, "mode": "adaptive"},
+        "tcp_keepalive": True,
+    }
+    options.update(config_overrides)
+    
+    return boto3.client(
+        service_name,
+        region_name=settings.aws_region,
+        aws_access_key_id=settings.aws_access_key_id,
+        aws_secret_access_key=settings.aws_secret_access_key,
+        config=Config(**options),
+    )